@@ -0,0 +1,79 @@
+
+
+# Cost of a debug log call on a node running at the info level, with the
+# observers set up the way NodeLoggingMixin sets them up :
+#
+#   eager   : twisted Logger, message built with str.format at the call site
+#   fields  : twisted Logger, message given as a format string and fields
+#   gated   : LazyLogger, message given as a format string and fields
+#
+#   python benchmarks/bench_logging.py [-n 100000]
+
+import io
+import timeit
+import argparse
+from datetime import datetime
+
+from twisted.logger import Logger
+from twisted.logger import LogLevel
+from twisted.logger import LogPublisher
+from twisted.logger import FilteringLogObserver
+from twisted.logger import LogLevelFilterPredicate
+from twisted.logger import textFileLogObserver
+
+from ebs.iot.linuxnode.lazylog import LazyLogger
+from ebs.iot.linuxnode.lazylog import set_log_level_gate
+
+
+class Event(object):
+    # Like events.Event, its repr does some work.
+    def __init__(self, eid):
+        self.eid = eid
+        self.start_time = datetime.now()
+
+    def __repr__(self):
+        return "{0:3} {1:.2f}".format(
+            self.eid, (self.start_time - datetime.now()).total_seconds()
+        )
+
+
+def publisher(level):
+    return LogPublisher(
+        FilteringLogObserver(textFileLogObserver(io.StringIO()),
+                             predicates=[LogLevelFilterPredicate(LogLevel.warn)]),
+        FilteringLogObserver(textFileLogObserver(io.StringIO()),
+                             predicates=[LogLevelFilterPredicate(level)]),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    observer = publisher(LogLevel.info)
+    set_log_level_gate(LogLevel.info)
+    plain = Logger(namespace='bench', observer=observer)
+    lazy = LazyLogger(namespace='bench', observer=observer)
+    event = Event(1)
+    entries = list(range(20))
+
+    cases = [
+        ('eager', lambda: plain.debug(
+            "Executed Event : {0}, {1} Entries".format(event, len(entries)))),
+        ('fields', lambda: plain.debug(
+            "Executed Event : {event}, {n} Entries", event=event, n=len(entries))),
+        ('gated', lambda: lazy.debug(
+            "Executed Event : {event}, {n} Entries", event=event, n=len(entries))),
+    ]
+    results = {}
+    for name, case in cases:
+        elapsed = min(timeit.repeat(case, number=args.number, repeat=3))
+        results[name] = elapsed / args.number * 1e9
+        print("{0:8} {1:10.0f} ns/call".format(name, results[name]))
+    print("gated is {0:.1f}x faster than eager".format(
+        results['eager'] / results['gated']))
+
+
+if __name__ == '__main__':
+    main()
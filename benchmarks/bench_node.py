@@ -0,0 +1,283 @@
+# Benchmarks of the node's hot paths, run headless. See harness.py for how
+# the node is set up.
+#
+#   split_string            marquee text split into chunks
+#   event_insert[n]         n events inserted one by one, as the API does
+#   event_next[n]           EventManager.next with n events in the database
+#   cache_trim[n]           trimming the oldest few files from a cache of n
+#   pdf_images[n]           generate_pdf_images for a document of n pages
+#   timetable_redraw[n]     Timetable.redraw_entries with n entries. The
+#                           labels are built but never rendered, and the
+#                           animations it starts are settled untimed.
+#   http_download[size]     download from a local server, with throughput
+#
+# Results are written as JSON, and can be compared to those of an earlier
+# run to catch regressions between releases.
+#
+#   python benchmarks/bench_node.py [-o results.json] [-c previous.json]
+#                                   [-r 3] [-k event_ -k cache_]
+
+import harness
+
+import os
+import time
+import shutil
+import argparse
+from itertools import cycle
+from functools import partial
+from datetime import datetime
+from datetime import timedelta
+
+from twisted.internet.task import react
+from twisted.internet.defer import inlineCallbacks
+
+from ebs.iot.linuxnode.constants import CONTENT
+from ebs.iot.linuxnode.constants import WEBRESOURCE
+from ebs.iot.linuxnode.resources import ResourceModel
+
+
+def bench_split_string(results, node):
+    from ebs.iot.linuxnode.widgets.marquee import split_string
+    text = ("Platform 3 : The 10:45 service to Central is delayed by "
+            "approximately 15 minutes. We apologise for the inconvenience. ") * 8
+    results.measure('split_string', lambda: split_string(text, 40),
+                    number=1000, chars=len(text))
+
+
+def _clear_events(em):
+    session = em.db()
+    try:
+        session.query(em.db_model).delete()
+        session.commit()
+    finally:
+        session.close()
+
+
+def _fill_events(em, n):
+    _clear_events(em)
+    start = datetime.now() + timedelta(minutes=10)
+    session = em.db()
+    try:
+        session.bulk_save_objects([
+            em.db_model(eid=str(i), etype=WEBRESOURCE,
+                        resource='{0:03}.mp4'.format(i % 100),
+                        start_time=start + timedelta(seconds=30 * i))
+            for i in range(n)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def bench_event_insert(results, node, sizes=(100, 1000)):
+    em = node.event_manager(WEBRESOURCE)
+    start = datetime.now() + timedelta(minutes=10)
+
+    def _insert(n):
+        for i in range(n):
+            em.insert(str(i), etype=WEBRESOURCE,
+                      resource='http://127.0.0.1/{0:03}.mp4'.format(i % 100),
+                      start_time=start + timedelta(seconds=30 * i))
+
+    for n in sizes:
+        results.measure('event_insert[{0}]'.format(n), partial(_insert, n),
+                        setup=partial(_clear_events, em), events=n)
+    _clear_events(em)
+
+
+def bench_event_next(results, node, sizes=(1000, 10000)):
+    em = node.event_manager(WEBRESOURCE)
+    for n in sizes:
+        results.measure('event_next[{0}]'.format(n), em.next,
+                        setup=partial(_fill_events, em, n), number=10,
+                        events=n)
+    _clear_events(em)
+
+
+def bench_cache_trim(results, node, sizes=(100, 1000, 10000),
+                     trimmed=10, file_size=1024):
+    rm = node.resource_manager
+    payload = b'\0' * file_size
+
+    def _fill_cache(n):
+        for filename in list(rm.cache_files):
+            os.remove(rm.cache_path(filename))
+        session = rm.db()
+        try:
+            session.query(ResourceModel).delete()
+            session.bulk_save_objects([
+                ResourceModel(filename='{0:05}.png'.format(i), rtype=CONTENT,
+                              url='http://127.0.0.1/{0:05}.png'.format(i))
+                for i in range(n)
+            ])
+            session.commit()
+        finally:
+            session.close()
+        now = time.time()
+        for i in range(n):
+            path = rm.cache_path('{0:05}.png'.format(i))
+            with open(path, 'wb') as f:
+                f.write(payload)
+            os.utime(path, (now - n + i, now - n + i))
+
+    def _trim(n):
+        for _ in rm.cache_trim(max_size=(n - trimmed) * file_size):
+            pass
+
+    for n in sizes:
+        results.measure('cache_trim[{0}]'.format(n), partial(_trim, n),
+                        setup=partial(_fill_cache, n), files=n,
+                        trimmed=trimmed)
+    _fill_cache(0)
+
+
+def bench_pdf_images(results, node, sizes=(1, 10)):
+    from ebs.iot.linuxnode.widgets.pdfplayer import generate_pdf_images
+    for n in sizes:
+        source = os.path.join(harness.root, 'document-{0}.pdf'.format(n))
+        target = os.path.join(harness.root, 'document-{0}'.format(n))
+        harness.write_pdf(source, n)
+        results.measure('pdf_images[{0}]'.format(n),
+                        partial(generate_pdf_images, source, target, None),
+                        setup=partial(shutil.rmtree, target, True), pages=n)
+
+
+def bench_timetable(results, node, sizes=(6, 12)):
+    from ebs.iot.linuxnode.timetable.base import Timetable
+    from ebs.iot.linuxnode.timetable.base import TimetableEntry
+    from ebs.iot.linuxnode.tables.spec import BasicTableSpec
+    from ebs.iot.linuxnode.tables.spec import BasicColumnSpec
+    from ebs.iot.linuxnode.tables.spec import BasicTablePalette
+
+    class BenchTimetableEntry(TimetableEntry):
+        @property
+        def name(self):
+            return self.data['name']
+
+        @property
+        def ts_start(self):
+            return self.data['start']
+
+        @property
+        def ts_end(self):
+            return self.data['end']
+
+    spec = BasicTableSpec(None, [
+        BasicColumnSpec("Name", 'name', i18n=False),
+        BasicColumnSpec("Start Time", 'ts_start', i18n=False),
+        BasicColumnSpec("End Time", 'ts_end', i18n=False)],
+        dedup_keys=['name', 'ts_start'], show_column_header=False,
+        row_height=90, row_spacing=10, font_size='42sp', font_bold=False)
+    table = Timetable(node, spec=spec)
+    table.palette = BasicTablePalette(
+        color_cell_background=(0.2, 0.2, 0.2, 1),
+        color_cell_foreground=(1, 1, 1, 1),
+        color_header_cell_background=(0.1, 0.1, 0.1, 1),
+        color_header_cell_foreground=(1, 1, 1, 1),
+        color_grid_background=(0, 0, 0, 1),
+    )
+    table.build(entries=[])
+
+    def _settle():
+        # Finish whatever the last redraw started, as its animations would
+        # have had they been allowed to run.
+        finish = table._animations._finish_handler
+        table._animations.clear()
+        if table._animation_lock and finish:
+            finish()
+
+    def _entries(n, page):
+        rv = []
+        for i in range(n):
+            entry = BenchTimetableEntry({
+                'name': "Session {0}.{1}".format(page, i),
+                'start': "{0:02}:00".format(i % 24),
+                'end': "{0:02}:45".format(i % 24),
+            })
+            entry.parent = table
+            rv.append(entry)
+        return rv
+
+    for n in sizes:
+        pages = cycle([_entries(n, 0), _entries(n, 1)])
+        results.measure('timetable_redraw[{0}]'.format(n),
+                        lambda: table.redraw_entries(next(pages)),
+                        setup=_settle, entries=n)
+    _settle()
+
+
+@inlineCallbacks
+def bench_http_download(results, node, reactor, sizes=(1, 16)):
+    served = os.path.join(harness.root, 'served')
+    os.makedirs(served, exist_ok=True)
+    port = harness.serve_directory(reactor, served)
+    try:
+        for size in sizes:
+            name = 'http_download[{0}M]'.format(size)
+            if not results.wanted(name):
+                continue
+            filename = 'payload-{0}M.bin'.format(size)
+            with open(os.path.join(served, filename), 'wb') as f:
+                f.write(os.urandom(size * 1024 * 1024))
+            url = 'http://127.0.0.1:{0}/{1}'.format(
+                port.getHost().port, filename)
+            dst = os.path.join(harness.root, filename)
+            runs = []
+            for _ in range(results.repeat):
+                if os.path.exists(dst):
+                    os.remove(dst)
+                started = time.perf_counter()
+                yield node.http_download(url, dst)
+                runs.append(time.perf_counter() - started)
+            results.record(name, runs, bytes=size * 1024 * 1024,
+                           mbps=round(size * 8 / min(runs), 1))
+    finally:
+        yield port.stopListening()
+
+
+_benchmarks = [
+    bench_split_string,
+    bench_event_insert,
+    bench_event_next,
+    bench_cache_trim,
+    bench_pdf_images,
+    bench_timetable,
+]
+
+
+@inlineCallbacks
+def run(reactor, args):
+    results = harness.Results(repeat=args.repeat, only=args.only)
+    node = harness.headless_node(reactor=reactor)
+    for bench in _benchmarks:
+        try:
+            bench(results, node)
+        except Exception as e:
+            print("{0} failed : {1!r}".format(bench.__name__, e))
+    try:
+        yield bench_http_download(results, node, reactor)
+    except Exception as e:
+        print("bench_http_download failed : {0!r}".format(e))
+
+    output = args.output or 'bench-{0}.json'.format(
+        datetime.now().strftime('%Y%m%d-%H%M%S'))
+    results.save(output)
+    print("Results written to {0}".format(output))
+    if args.compare and results.compare(args.compare):
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-o', '--output', default=None)
+    parser.add_argument('-c', '--compare', default=None,
+                        help="results of an earlier run to compare against")
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-k', '--only', action='append', default=None,
+                        help="only run cases with names containing this")
+    args = parser.parse_args()
+    react(run, (args,))
+
+
+if __name__ == '__main__':
+    main()
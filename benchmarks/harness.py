@@ -0,0 +1,171 @@
+# Headless harness for the node benchmarks.
+#
+# Importing this sets the node up to run without a display or any of the
+# node's own state : config, cache, database and log directories all go to
+# a temporary directory, Kivy runs with no window and the mock GL backend,
+# and nothing is drawn. It has to be imported before anything from
+# ebs.iot.linuxnode, since those read their paths and Kivy its options
+# when they are first imported. The package itself has to be installed,
+# pip install -e . will do.
+
+import os
+import sys
+import json
+import time
+import shutil
+import atexit
+import platform
+import tempfile
+import pkg_resources
+from datetime import datetime
+
+root = tempfile.mkdtemp(prefix='iotnode-bench-')
+atexit.register(shutil.rmtree, root, True)
+
+for _name, _value in (('XDG_CONFIG_HOME', os.path.join(root, 'config')),
+                      ('XDG_CACHE_HOME', os.path.join(root, 'cache')),
+                      ('XDG_DATA_HOME', os.path.join(root, 'data')),
+                      ('KIVY_HOME', os.path.join(root, 'kivy'))):
+    os.makedirs(_value, exist_ok=True)
+    os.environ[_name] = _value
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+# No window provider, kivy.core.window.Window is None.
+os.environ.setdefault('KIVY_WINDOW', '')
+
+from twisted.web.static import File                         # noqa: E402
+from twisted.web.server import Site                         # noqa: E402
+
+from ebs.iot.linuxnode import config as node_config         # noqa: E402
+
+
+def headless_node(**kwargs):
+    # A node with an event manager for web resources, as a signage node
+    # would have, without a GUI. It's never started.
+    from ebs.iot.linuxnode.events import EventManagerMixin
+    from ebs.iot.linuxnode.events import WebResourceEventManager
+    from ebs.iot.linuxnode.events import ScheduledResourceClass
+    from ebs.iot.linuxnode.constants import WEBRESOURCE
+
+    class BenchNode(EventManagerMixin):
+        pass
+
+    if getattr(node_config, 'current_config', None) is None:
+        node_config.current_config = node_config.IoTNodeConfig()
+    kwargs.setdefault('resource_class', ScheduledResourceClass)
+    node = BenchNode(**kwargs)
+    node.event_manager_install(WebResourceEventManager(node, WEBRESOURCE))
+    return node
+
+
+def serve_directory(reactor, path):
+    # A local stand-in for the content server. Returns the listening port.
+    return reactor.listenTCP(0, Site(File(path)), interface='127.0.0.1')
+
+
+def write_pdf(path, pages):
+    # A plain PDF with a line of text on each page, so that there is
+    # something to rasterize without shipping a sample file.
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{0}] /Count {1} >>".format(
+            ' '.join('{0} 0 R'.format(4 + 2 * i) for i in range(pages)), pages),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        stream = "BT /F1 48 Tf 72 400 Td (Page {0}) Tj ET".format(i + 1)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 842 595] "
+            "/Resources << /Font << /F1 3 0 R >> >> /Contents {0} 0 R >>"
+            "".format(5 + 2 * i))
+        objects.append("<< /Length {0} >>\nstream\n{1}\nendstream".format(
+            len(stream), stream))
+
+    content = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(content))
+        content += "{0} 0 obj\n{1}\nendobj\n".format(number, body).encode()
+    xref = len(content)
+    content += "xref\n0 {0}\n0000000000 65535 f \n".format(
+        len(objects) + 1).encode()
+    for offset in offsets:
+        content += "{0:010d} 00000 n \n".format(offset).encode()
+    content += "trailer\n<< /Size {0} /Root 1 0 R >>\nstartxref\n{1}\n" \
+               "%%EOF\n".format(len(objects) + 1, xref).encode()
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+class Results(object):
+    # Timings of each case, keyed by name. Each case is run repeat times,
+    # with setup run untimed before each, and the fastest run is reported.
+    def __init__(self, repeat=3, only=None):
+        self.repeat = repeat
+        self.only = only
+        self.results = {}
+
+    def wanted(self, name):
+        return not self.only or any(x in name for x in self.only)
+
+    def measure(self, name, func, setup=None, number=1, **info):
+        if not self.wanted(name):
+            return
+        runs = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            runs.append((time.perf_counter() - started) / number)
+        self.record(name, runs, **info)
+
+    def record(self, name, runs, **info):
+        result = {'seconds': min(runs), 'runs': runs}
+        result.update(info)
+        self.results[name] = result
+        print("{0:32} {1:12.6f} s{2}".format(
+            name, result['seconds'],
+            ''.join("  {0}={1}".format(k, v) for k, v in info.items())))
+        sys.stdout.flush()
+
+    def save(self, path):
+        try:
+            version = pkg_resources.get_distribution('ebs-iot-linuxnode').version
+        except pkg_resources.DistributionNotFound:
+            version = None
+        with open(path, 'w') as f:
+            json.dump({
+                'version': version,
+                'time': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'repeat': self.repeat,
+                'results': self.results,
+            }, f, indent=2, sort_keys=True)
+
+    def compare(self, path, tolerance=0.1):
+        # Prints how each case compares to an earlier run. Returns the
+        # names of those which got slower by more than tolerance.
+        with open(path) as f:
+            previous = json.load(f)
+        print("Compared to {0} ({1}) :".format(
+            previous.get('version'), previous.get('time')))
+        regressions = []
+        for name, result in sorted(self.results.items()):
+            before = previous['results'].get(name)
+            if not before:
+                continue
+            ratio = result['seconds'] / before['seconds']
+            flag = ''
+            if ratio > 1 + tolerance:
+                flag = '  SLOWER'
+                regressions.append(name)
+            elif ratio < 1 - tolerance:
+                flag = '  faster'
+            print("{0:32} {1:8.2f}x{2}".format(name, ratio, flag))
+        return regressions
@@ -25,6 +25,7 @@ class BackgroundGuiMixin(ConfigMixin, BaseGuiMixin):
         self._bg = None
         self._bg_container = None
         self._bg_current = None
+        self._bg_paused = None
         super(BackgroundGuiMixin, self).__init__(*args, **kwargs)
 
     def bg_is_structured(self, value):
@@ -192,18 +193,52 @@ class BackgroundGuiMixin(ConfigMixin, BaseGuiMixin):
     def gui_bg_update(self):
         self.gui_bg = self.config.background
 
-    def gui_bg_pause(self):
-        self.log.debug("Pausing Background")
+    def _gui_bg_pause_mode(self, duration):
+        # How to get a background video out of the way of foreground media
+        # which is expected to play for duration seconds :
+        #  - hide    : Leave it playing out of sight, for very short media.
+        #  - freeze  : Pause it where it is.
+        #  - release : Stop it altogether and start it again afterwards,
+        #              for long media, to free the decoder.
+        # Media of unknown duration freezes the background.
+        if not isinstance(self.gui_bg, (Video, ExternalMediaPlayer)):
+            return 'hide'
+        if duration is None:
+            return 'freeze'
+        if duration <= self.config.background_hide_threshold:
+            return 'hide'
+        if duration <= self.config.background_freeze_threshold:
+            return 'freeze'
+        return 'release'
+
+    def gui_bg_pause(self, duration=None):
+        if self._bg_paused == 'release':
+            # Released for media before this one and not resumed since.
+            # There is nothing left to pause, and it has to stay released
+            # for the resume to bring it back.
+            return
+        mode = self._gui_bg_pause_mode(duration)
+        self.log.debug("Pausing Background ({mode})", mode=mode)
+        self._bg_paused = mode
         self.gui_main_content.remove_widget(self._bg_container)
-        if isinstance(self.gui_bg, Video):
-            self.gui_bg.state = 'pause'
+        if mode == 'release':
+            self.gui_bg_clear()
+            self._bg_current = None
+        elif mode == 'freeze':
+            if isinstance(self.gui_bg, Video):
+                self.gui_bg.state = 'pause'
+            elif isinstance(self.gui_bg, ExternalMediaPlayer):
+                self.gui_bg.pause()
         elif isinstance(self.gui_bg, ExternalMediaPlayer):
-            self.gui_bg.pause()
+            self.gui_bg.hide()
 
     def gui_bg_resume(self):
         self.log.debug("Resuming Background")
         if not self._bg_container.parent:
             self.gui_main_content.add_widget(self._bg_container, len(self.gui_main_content.children))
+        if self._bg_paused == 'release':
+            self.gui_bg_update()
+        self._bg_paused = None
         if hasattr(self.gui_bg, 'retrigger'):
             self.gui_bg.retrigger()
         if isinstance(self.gui_bg, Video):
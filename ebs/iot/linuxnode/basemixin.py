@@ -6,6 +6,7 @@ import shutil
 import tempfile
 from appdirs import user_cache_dir
 from twisted.internet import reactor
+from .scheduler import TickScheduler
 from .structure import BaseGuiStructureMixin
 from .widgets.colors import GuiPalette
 
@@ -20,6 +21,7 @@ class BaseMixin(object):
         self._cache_dir = None
         self._db_dir = None
         self._temp_dir = None
+        self._scheduler = None
         super(BaseMixin, self).__init__(*args, **kwargs)
 
     @property
@@ -45,6 +47,12 @@ class BaseMixin(object):
     def reactor(self):
         return self._reactor
 
+    @property
+    def scheduler(self):
+        if not self._scheduler:
+            self._scheduler = TickScheduler(self.reactor)
+        return self._scheduler
+
     @property
     def appname(self):
         return self._appname
@@ -6,6 +6,8 @@ from .busy import BusySpinnerGuiMixin
 from .background import OverlayWindowGuiMixin
 from .marquee import MarqueeGuiMixin
 from .text import AdvancedTextGuiMixin
+from .metrics import MetricsGuiMixin
+from .profiling import ProfilingGuiMixin
 
 from .log import NodeLoggingMixin
 from .nodeid import NodeIDMixin
@@ -13,12 +15,18 @@ from .busy import NodeBusyMixin
 from .http import HttpClientMixin
 from .shell import BaseShellMixin
 from .text import AdvancedTextMixin
+from .metrics import MetricsMixin
+from .profiling import ProfilingMixin
 
 from .resources import ResourceManagerMixin
+from .mediainfo import MediaMetadataMixin
+from .widgets.image import image_pool
 
 
-class BaseIoTNode(ResourceManagerMixin, HttpClientMixin, BaseShellMixin,
-                  NodeBusyMixin, AdvancedTextMixin, NodeLoggingMixin, NodeIDMixin):
+class BaseIoTNode(ResourceManagerMixin, MediaMetadataMixin, HttpClientMixin,
+                  BaseShellMixin, NodeBusyMixin, AdvancedTextMixin,
+                  MetricsMixin, ProfilingMixin, NodeLoggingMixin,
+                  NodeIDMixin):
     _has_gui = False
 
     def __init__(self, *args, **kwargs):
@@ -39,7 +47,7 @@ class BaseIoTNode(ResourceManagerMixin, HttpClientMixin, BaseShellMixin,
 
 class BaseIoTNodeGui(NodeIDGuiMixin, BusySpinnerGuiMixin, LoggingGuiMixin,
                      MarqueeGuiMixin, AdvancedTextGuiMixin, OverlayWindowGuiMixin,
-                     BaseIoTNode):
+                     MetricsGuiMixin, ProfilingGuiMixin, BaseIoTNode):
 
     def __init__(self, *args, **kwargs):
         self._application = kwargs.pop('application')
@@ -51,8 +59,13 @@ class BaseIoTNodeGui(NodeIDGuiMixin, BusySpinnerGuiMixin, LoggingGuiMixin,
         from kivy.config import Config
         Config.set('input', 'mouse', 'mouse,multitouch_on_demand')
 
+    def memory_restart(self):
+        # The application stops the reactor along with it.
+        self._application.stop()
+
     def gui_setup(self):
         self._gui_disable_multitouch_emulation()
+        image_pool.capacity = self.config.image_pool_size
         super(BaseIoTNodeGui, self).gui_setup()
         # # Setup GUI elements from other Mixins
         # OverlayWindowGuiMixin.gui_setup(self)
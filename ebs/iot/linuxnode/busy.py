@@ -29,7 +29,7 @@ class NodeBusyMixin(NodeLoggingMixin, BaseMixin):
             self._busy = 0
 
     def _busy_setter(self, value):
-        self.log.debug("Setting node busy status to {0}".format(value))
+        self.log.debug("Setting node busy status to {value}", value=value)
         self._busy = value
 
 
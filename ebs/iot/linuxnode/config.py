@@ -90,10 +90,110 @@ class IoTNodeConfig(object):
     def gui_log_display(self):
         return self._config.getboolean('debug', 'gui_log_display', fallback=False)
 
+    @property
+    def gui_loop_overlay(self):
+        return self._config.getboolean('debug', 'gui_loop_overlay', fallback=False)
+
     @property
     def gui_log_level(self):
         return self._config.get('debug', 'gui_log_level', fallback='info')
 
+    # Logging
+    @property
+    def log_max_size(self):
+        return self._config.getint('log', 'max_size', fallback=5 * 1024 * 1024)
+
+    @property
+    def log_backups(self):
+        return self._config.getint('log', 'backups', fallback=10)
+
+    @property
+    def log_compress(self):
+        return self._config.getboolean('log', 'compress', fallback=True)
+
+    @property
+    def log_queue_size(self):
+        return self._config.getint('log', 'queue_size', fallback=10000)
+
+    @property
+    def log_structured(self):
+        return self._config.getboolean('log', 'structured', fallback=False)
+
+    # Metrics
+    @property
+    def metrics_port(self):
+        # Prometheus text format at /metrics. 0 to disable.
+        return self._config.getint('metrics', 'port', fallback=9108)
+
+    @property
+    def metrics_interface(self):
+        return self._config.get('metrics', 'interface', fallback='127.0.0.1')
+
+    @property
+    def event_trace_size(self):
+        # Number of recent events kept for the trace summary
+        return self._config.getint('metrics', 'event_trace_size', fallback=500)
+
+    # Profiling
+    @property
+    def profiling(self):
+        return self._config.getboolean('profiling', 'enabled', fallback=False)
+
+    @property
+    def profiling_sampler_interval(self):
+        # Seconds between stack samples. 0 to disable.
+        return self._config.getfloat('profiling', 'sampler_interval', fallback=0.01)
+
+    @property
+    def profiling_tracemalloc_interval(self):
+        # Seconds between tracemalloc reports. 0 to disable.
+        return self._config.getint('profiling', 'tracemalloc_interval', fallback=900)
+
+    @property
+    def profiling_tracemalloc_top(self):
+        return self._config.getint('profiling', 'tracemalloc_top', fallback=25)
+
+    @property
+    def profiling_stall_threshold(self):
+        # Seconds the reactor may block before its stack is recorded.
+        # 0 to record no stacks, the loop monitor then only measures lag.
+        return self._config.getfloat('profiling', 'stall_threshold', fallback=0.25)
+
+    @property
+    def loop_monitor(self):
+        # Measure reactor loop lag and record stalls, whether or not
+        # profiling is enabled.
+        return self._config.getboolean('profiling', 'loop_monitor', fallback=False)
+
+    @property
+    def loop_monitor_interval(self):
+        # Seconds between heartbeats of the loop monitor.
+        return self._config.getfloat('profiling', 'loop_monitor_interval', fallback=0.05)
+
+    # Memory Watchdog
+    @property
+    def memory_watchdog_interval(self):
+        # Seconds between samples of the type counts. Each walks the whole
+        # heap, in a thread but still contending for the GIL, so this is
+        # off unless a leak is being looked for. 0 to disable.
+        return self._config.getint('memory', 'watchdog_interval', fallback=0)
+
+    @property
+    def memory_watchdog_window(self):
+        # Samples over which a type has to keep growing to be suspected
+        return self._config.getint('memory', 'watchdog_window', fallback=6)
+
+    @property
+    def memory_watchdog_min_growth(self):
+        return self._config.getint('memory', 'watchdog_min_growth', fallback=100)
+
+    @property
+    def memory_restart_rss(self):
+        # RSS in MB beyond which the node is stopped, to be restarted by
+        # whatever supervises it. Checked every minute, whether or not the
+        # watchdog is enabled. 0 to disable.
+        return self._config.getint('memory', 'restart_rss', fallback=0)
+
     # Display
     @property
     def fullscreen(self):
@@ -163,6 +263,10 @@ class IoTNodeConfig(object):
     def foundation_image(self):
         return self._config.get('display-rpi', 'foundation_image', fallback=None)
 
+    @property
+    def image_pool_size(self):
+        return self._config.getint('display', 'image_pool_size', fallback=4)
+
     @property
     def image_bgcolor(self):
         return self._parse_color(self._config.get('display', 'image_bgcolor', fallback='auto'))
@@ -177,6 +281,18 @@ class IoTNodeConfig(object):
         self._config.set('display', 'background', value)
         self._write_config()
 
+    @property
+    def background_hide_threshold(self):
+        # Foreground media shorter than this leaves a background video
+        # playing while hidden.
+        return self._config.getint('display', 'background_hide_threshold', fallback=15)
+
+    @property
+    def background_freeze_threshold(self):
+        # Foreground media longer than this stops a background video
+        # altogether. In between, it is paused.
+        return self._config.getint('display', 'background_freeze_threshold', fallback=600)
+
     @property
     def background_external_player(self):
         if self.platform == 'rpi':
@@ -298,12 +414,37 @@ class IoTNodeConfig(object):
     def cache_max_size(self):
         return self._config.getint('cache', 'max_size', fallback='10000000')
 
+    # Gallery
+    @property
+    def gallery_preload_lookahead(self):
+        return self._config.getint('gallery', 'preload_lookahead', fallback=1)
+
+    @property
+    def gallery_dayparts(self):
+        # Of the form morning=06:00-12:00, evening=17:00-23:00
+        return self._config.get('gallery', 'dayparts', fallback='')
+
     # Video
+    @property
+    def video_external_command(self):
+        # Any command line player, eg. mpv --really-quiet {filepath}
+        return self._config.get('video', 'external_command', fallback=None)
+
     @property
     def video_external_player(self):
+        if self.video_external_command:
+            return True
         if self.platform == 'rpi':
             return self._config.getboolean('video-rpi', 'external_player', fallback=False)
 
+    @property
+    def video_prewarm(self):
+        return self._config.getboolean('video', 'prewarm', fallback=True)
+
+    @property
+    def video_native_playlist(self):
+        return self._config.getboolean('video', 'native_playlist', fallback=True)
+
     @property
     def video_dispmanx_layer(self):
         if self.platform == 'rpi':
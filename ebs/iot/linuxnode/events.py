@@ -1,6 +1,7 @@
 
 
 import os
+import time
 from datetime import datetime
 from datetime import timedelta
 from cached_property import threaded_cached_property_with_ttl
@@ -8,7 +9,6 @@ from six.moves.urllib.parse import urlparse
 from twisted.internet.task import deferLater
 from twisted.internet.threads import deferToThread
 from twisted.internet.defer import DeferredSemaphore
-from twisted import logger
 
 from sqlalchemy import Column
 from sqlalchemy import Integer
@@ -19,10 +19,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
 
+from .lazylog import LazyLogger
+from .tracing import EventTraceRecorder
 from .basenode import BaseIoTNode
 from .resources import CacheableResource
 from .mediaplayer import MediaPlayerBusy
-from .marquee import MarqueeBusy
+from .marquee import MarqueeExpired
 from .widgets.pdfplayer import generate_pdf_images
 
 from .constants import WEBRESOURCE
@@ -202,7 +204,13 @@ class EventManager(object):
         self._current_event = None
         self._current_event_resource = None
         self._preprocess_semaphore = None
+        self._trace = None
         self._log = None
+        self._lateness = node.metrics.histogram(
+            'node_event_lateness_seconds',
+            'Time from the scheduled start of events to their trigger',
+            labels=('emid',)
+        ).labels(emid)
         _ = self.db
 
     @property
@@ -212,7 +220,7 @@ class EventManager(object):
     @property
     def log(self):
         if not self._log:
-            self._log = logger.Logger(namespace="em.{0}".format(self.emid), source=self)
+            self._log = LazyLogger(namespace="em.{0}".format(self.emid), source=self)
         return self._log
 
     @property
@@ -381,6 +389,7 @@ class EventManager(object):
         raise NotImplementedError
 
     def _event_scheduler(self):
+        wake = time.time()
         event = None
         nevent = None
         le, ne = self.previous(follow=True)
@@ -401,13 +410,27 @@ class EventManager(object):
                     event = ne
                     nevent = nne
         if event:
+            # An event which is retried keeps the trace from its first
+            # wakeup, and is triggered when the retry goes through.
+            if self._trace is None or self._trace.eid != event.eid:
+                self._trace = self._node.event_traces.start(
+                    self._emid, event.eid, event.start_time)
+                self._trace.mark('wake', wake)
+            self._trace.mark('trigger')
+            lateness = (datetime.now() - event.start_time).total_seconds()
             retry = self._trigger_event(event)
             if retry:
+                self._trace.clear('trigger')
                 self._execute_task = deferLater(self._node.reactor, 0.1,
                                                 self._event_scheduler)
                 return
+            self._trace = None
+            self._lateness.observe(lateness)
         self._execute_task = self._event_scheduler_hop(nevent)
 
+    def _prepare_event(self, event):
+        pass
+
     def _event_scheduler_hop(self, next_event=None):
         if not next_event:
             next_event = self.next()
@@ -420,6 +443,8 @@ class EventManager(object):
                 next_start = timedelta(seconds=60)
             elif next_start > timedelta(seconds=60):
                 next_start = timedelta(seconds=60)
+            else:
+                self._prepare_event(next_event)
         self.log.debug("SCHED {emid} HOP {ns}", emid=self._emid,
                        ns=next_start.seconds)
         return deferLater(self._node.reactor, next_start.seconds,
@@ -432,21 +457,49 @@ class EventManager(object):
 
 
 class TextEventManager(EventManager):
+    # Text events are handed to the marquee queue as soon as they are due,
+    # and play once whatever is ahead of them is done. An event which
+    # could not start before the end of its window is dropped.
+    @property
+    def current_event(self):
+        message = self._node.marquee_now_playing
+        if message:
+            return message.tag
+
+    @property
+    def current_event_resource(self):
+        message = self._node.marquee_now_playing
+        if message:
+            return message.text
+
     def _trigger_event(self, event):
-        try:
-            d = self._node.marquee_play(text=event.resource,
-                                        duration=event.duration)
-            d.addCallback(self._finish_event)
-            self.log.info("Executed Event : {0}".format(event))
-            self._current_event = event.eid
-            self._current_event_resource = event.resource
-        except MarqueeBusy as e:
-            # self._node.log.warn("Marquee busy for {event} : {e}",
-            #                     event=event, e=e.now_playing)
-            return e.collision_count
+        deadline = None
+        if event.duration:
+            deadline = event.start_time + timedelta(seconds=event.duration)
+        d = self._node.marquee_play(text=event.resource,
+                                    duration=event.duration,
+                                    deadline=deadline, tag=event.eid)
+        d.addCallbacks(self._finish_text_event, self._expire_text_event,
+                       callbackArgs=(event.eid,), errbackArgs=(event.eid,))
+        # Text is only traced as far as the marquee queue.
+        self._trace.mark('ready')
+        self._trace.finish()
+        self.log.info("Queued Event : {event}", event=event)
         self.remove(event.eid)
         self.prune()
 
+    def _finish_text_event(self, forced, eid):
+        if forced:
+            self.log.info("Event {eid} was force stopped.", eid=eid)
+        else:
+            self.log.info("Successfully finished event {eid}", eid=eid)
+            self._succeed_event(eid)
+
+    def _expire_text_event(self, failure, eid):
+        failure.trap(MarqueeExpired)
+        self.log.warn("Event {eid} expired before it could be played",
+                      eid=eid)
+
     def _succeed_event(self, event):
         try:
             self._node.api_text_success([event])
@@ -455,25 +508,50 @@ class TextEventManager(EventManager):
 
 
 class WebResourceEventManager(EventManager):
+    # Events without a duration play till the media ends. For media with a
+    # known length, they are stopped anyway this long after it should have
+    # ended, in case the player hangs.
+    _watchdog_margin = 10
+
+    def _event_duration(self, event, resource):
+        if event.duration:
+            return event.duration
+        info = self._node.media_metadata.get(resource.filepath)
+        if info and info.duration:
+            return info.duration + self._watchdog_margin
+        return None
+
     def _trigger_event(self, event):
         r = self._node.resource_manager.get(event.resource)
         if r.available:
             try:
-                d = self._node.media_play(content=r,
-                                          duration=event.duration)
+                d = self._node.media_play(
+                    content=r, duration=self._event_duration(event, r),
+                    trace=self._trace
+                )
                 d.addCallback(self._finish_event)
-                self.log.info("Executed Event : {0}".format(event))
+                self.log.info("Executed Event : {event}", event=event)
                 self._current_event = event.eid
                 self._current_event_resource = event.resource
             except MediaPlayerBusy as e:
-                # self.log.warn("Mediaplayer busy for {event} : {e}",
-                #               event=event, e=e.now_playing)
+                # At info, so that collisions can be queried from the
+                # structured log of a node which isn't logging debug.
+                self.log.info("Mediaplayer busy for {eid}, collision "
+                              "{collision_count}", eid=event.eid,
+                              collision_count=e.collision_count,
+                              now_playing=e.now_playing)
                 return e.collision_count
         else:
+            self._trace.finish()
             self.log.warn("Media not ready for {event}", event=event)
         self.remove(event.eid)
         self.prune()
 
+    def _prepare_event(self, event):
+        r = self._node.resource_manager.get(event.resource)
+        if r.available:
+            self._node.media_prepare(r)
+
     def _succeed_event(self, event):
         try:
             self._node.api_media_success([event])
@@ -545,11 +623,21 @@ class WebResourceEventManager(EventManager):
 class EventManagerMixin(BaseIoTNode):
     def __init__(self, *args, **kwargs):
         self._event_managers = {}
+        self._event_traces = None
         self._success_api_engine = None
         super(EventManagerMixin, self).__init__(*args, **kwargs)
 
+    @property
+    def event_traces(self):
+        if not self._event_traces:
+            self._event_traces = EventTraceRecorder(
+                size=self.config.event_trace_size, metrics=self.metrics
+            )
+        return self._event_traces
+
     def event_manager_install(self, manager):
-        self.log.info("Installing Event Manager {1} with emid {0}".format(manager.emid, manager))
+        self.log.info("Installing Event Manager {manager} with emid {emid}",
+                      manager=manager, emid=manager.emid)
         self._event_managers[manager.emid] = manager
 
     def event_manager(self, emid):
@@ -1,17 +1,63 @@
 
 
-import subprocess
+import os
+import shlex
+import queue
+import signal
+import threading
+from collections import OrderedDict
+from twisted.python.failure import Failure
+from twisted.internet.defer import Deferred
+from twisted.internet.defer import TimeoutError
+from twisted.internet.defer import succeed
+from twisted.internet.protocol import ProcessProtocol
+from twisted.internet.error import ProcessExitedAlready
+
+from kivy.clock import Clock
 
-from pymediainfo import MediaInfo
 from omxplayer.player import OMXPlayer
 from dbus.exceptions import DBusException
 
-_mediainfo_available = MediaInfo.can_parse()
+from .lazylog import LazyLogger
+from .mediainfo import _mediainfo_available
+
+
+class _BackdropProtocol(ProcessProtocol):
+    def __init__(self, manager):
+        self._manager = manager
+
+    def processEnded(self, reason):
+        self._manager._process_ended(self)
 
 
 class BackdropManager(object):
-    def __init__(self):
-        self._process = None
+    # Runs the backdrop helper, which paints a layer behind external video.
+    # Geometry changes are written to its stdin through the reactor, so this
+    # never blocks on the helper. They are also coalesced to at most one
+    # write per frame, and skipped if nothing changed. If the helper dies
+    # it is restarted with the latest geometry, but not more often than
+    # once every _restart_interval seconds.
+    _restart_interval = 5
+    _terminate_delay = 0.5
+
+    def __init__(self, node):
+        self._node = node
+        self._log = None
+        self._protocol = None
+        self._transport = None
+        self._layer = None
+        self._geometry = None
+        self._written = None
+        self._spawned = None
+        self._retry = None
+        self._closed = False
+        self._trigger = Clock.create_trigger(self._flush)
+
+    @property
+    def log(self):
+        if not self._log:
+            self._log = LazyLogger(namespace="backdrop", source=self)
+        return self._log
 
     def start(self, layer=None, x=None, y=None, width=None, height=None):
         if not x:
@@ -22,127 +68,683 @@ class BackdropManager(object):
             width = 1
         if not height:
             height = 1
+        self._layer = layer
+        self._geometry = (int(x), int(y), int(width), int(height))
+        self._closed = False
+        self._spawn()
 
+    def _spawn(self):
+        x, y, width, height = self._geometry
         cmd = ['backdrop']
-        if layer:
-            cmd.extend(['-l', str(layer)])
-        if x:
-            cmd.extend(['-x', str(int(x))])
-        if y:
-            cmd.extend(['-y', str(int(y))])
-        if width:
-            cmd.extend(['-w', str(int(width))])
-        if height:
-            cmd.extend(['-h', str(int(height))])
-        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        if self._layer:
+            cmd.extend(['-l', str(self._layer)])
+        cmd.extend(['-x', str(x), '-y', str(y),
+                    '-w', str(width), '-h', str(height)])
+        self._protocol = _BackdropProtocol(self)
+        self._spawned = self._node.reactor.seconds()
+        self._written = self._geometry
+        self._transport = self._node.reactor.spawnProcess(
+            self._protocol, cmd[0], cmd, env=os.environ
+        )
+
+    def _process_ended(self, protocol):
+        if protocol is not self._protocol:
+            return
+        self._transport = None
+        self._protocol = None
+        if not self._closed:
+            self.log.warn("Backdrop process exited unexpectedly")
+            self._trigger()
 
     def set_geometry(self, x, y, width, height):
-        if not self._process:
-            self.start(x, y, width, height)
-        geometry = "{0},{1},{2},{3}\n".format(int(x), int(y),
-                                              int(width), int(height))
-        self._process.stdin.write(geometry.encode())
-        self._process.stdin.flush()
+        self._geometry = (int(x), int(y), int(width), int(height))
+        self._trigger()
+
+    def _flush(self, *_):
+        if self._closed or self._geometry is None:
+            return
+        if not self._transport:
+            wait = 0
+            if self._spawned is not None:
+                wait = self._spawned + self._restart_interval - \
+                    self._node.reactor.seconds()
+            if wait > 0:
+                if not self._retry or not self._retry.active():
+                    self._retry = self._node.reactor.callLater(
+                        wait, self._trigger
+                    )
+                return
+            self._spawn()
+            return
+        if self._geometry == self._written:
+            return
+        self._transport.write("{0},{1},{2},{3}\n".format(
+            *self._geometry).encode())
+        self._written = self._geometry
 
     def close(self):
-        if self._process:
-            self._process.stdin.write('0,0,0,0'.encode())
-            self._process.stdin.flush()
-            self._process.terminate()
+        self._closed = True
+        self._trigger.cancel()
+        if self._retry and self._retry.active():
+            self._retry.cancel()
+        if self._transport:
+            # Writes are buffered by the reactor. Closing stdin sends the
+            # last geometry out before it closes, and the helper is only
+            # told to go once it has had the chance to act on it.
+            transport = self._transport
+            transport.write('0,0,0,0\n'.encode())
+            transport.closeStdin()
+            self._node.reactor.callLater(self._terminate_delay,
+                                         self._terminate, transport)
 
+    @staticmethod
+    def _terminate(transport):
+        try:
+            transport.signalProcess(signal.SIGTERM)
+        except ProcessExitedAlready:
+            pass
 
-class ExternalMediaPlayer(object):
-    def __init__(self, filepath, geometry, when_done, node,
-                 layer=None, loop=False, dbus_name=None, orientation=0):
-        self._player = None
-        self._pposition = None
-        self._pstate = None
-        self._paused = False
-        self._filepath = filepath
-        self._cover = None
+
+class PlayerCommandQueue(object):
+    # Runs control calls for a player one at a time and in order, in a
+    # worker thread of its own, so that a slow or hung player never holds up
+    # the reactor. A call submitted with the key of one which is still
+    # waiting takes its place, and the deferred of the call it replaced
+    # fires with None. Deferreds returned by submit() fail with TimeoutError
+    # if the call doesn't complete within its timeout of being started,
+    # however long it waited behind others, but the worker still waits for
+    # it before going on to the next one.
+    def __init__(self, reactor, name, timeout=2):
+        self._reactor = reactor
+        self._name = name
+        self._timeout = timeout
+        self._log = None
+        self._pending = OrderedDict()
+        self._counter = 0
+        self._busy = False
+        self._closing = False
+        self._jobs = None
+        self._thread = None
+
+    @property
+    def log(self):
+        if not self._log:
+            self._log = LazyLogger(namespace="player.{0}".format(self._name),
+                                   source=self)
+        return self._log
+
+    def submit(self, func, *args, **kwargs):
+        key = kwargs.pop('key', None)
+        timeout = kwargs.pop('timeout', None) or self._timeout
+        if key is None:
+            self._counter += 1
+            key = self._counter
+        d = Deferred()
+        superseded = self._pending.get(key, None)
+        self._pending[key] = (func, args, d, timeout)
+        if superseded and not superseded[2].called:
+            superseded[2].callback(None)
+        self._closing = False
+        self._dispatch()
+        return d
+
+    def flush(self):
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for _, _, d, _ in pending:
+            if not d.called:
+                d.callback(None)
+
+    def close(self):
+        # Let the worker exit once everything submitted so far is done.
+        self._closing = True
+        self._dispatch()
+
+    def _dispatch(self):
+        if self._busy:
+            return
+        while self._pending:
+            key, (func, args, d, timeout) = self._pending.popitem(last=False)
+            if d.called:
+                # Given up on by whoever submitted it
+                self.log.warn("Dropped {func} ({key}), no longer wanted",
+                              func=getattr(func, '__name__', func), key=key)
+                continue
+            if self._thread is None:
+                self._jobs = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._worker, args=(self._jobs,),
+                    name=self._name, daemon=True
+                )
+                self._thread.start()
+            self._busy = True
+            d.addTimeout(timeout, self._reactor)
+            self._jobs.put((func, args, d))
+            return
+        if self._closing and self._thread is not None:
+            self._jobs.put(None)
+            self._jobs = None
+            self._thread = None
+            self._closing = False
+
+    def _worker(self, jobs):
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            func, args, d = job
+            try:
+                result = func(*args)
+            except Exception:
+                result = Failure()
+            self._reactor.callFromThread(self._completed, d, result)
+
+    def _completed(self, d, result):
+        self._busy = False
+        if not d.called:
+            if isinstance(result, Failure):
+                d.errback(result)
+            else:
+                d.callback(result)
+        self._dispatch()
+
+
+class ExternalPlayerBackend(object):
+    # Controls a single external player process. Backends which can't do
+    # something, such as hiding the video or changing its layer, quietly
+    # don't. on_exit is called in the reactor thread when the process
+    # exits by itself. launch() and play() return deferreds which fire
+    # once the player has been started, or been asked to play.
+    def __init__(self, node):
         self._node = node
-        self._loop = loop
+        self._log = None
+        self._filepath = None
+        self.on_exit = None
+
+    @property
+    def log(self):
+        if not self._log:
+            self._log = LazyLogger(namespace="player", source=self)
+        return self._log
+
+    @property
+    def filepath(self):
+        return self._filepath
+
+    @property
+    def dbus_name(self):
+        return None
+
+    @property
+    def alive(self):
+        raise NotImplementedError
+
+    def launch(self, filepath, geometry, layer=None, loop=False,
+               orientation=0, paused=False, hidden=False):
+        raise NotImplementedError
+
+    def play(self):
+        raise NotImplementedError
+
+    def pause(self):
+        raise NotImplementedError
+
+    def show(self):
+        pass
+
+    def hide(self):
+        pass
+
+    def set_layer(self, layer):
+        pass
+
+    def set_geometry(self, x, y, width, height):
+        pass
+
+    def position(self):
+        return succeed(None)
+
+    def set_position(self, position):
+        pass
+
+    def quit(self):
+        raise NotImplementedError
+
+    def _exited(self, exit_state):
+        if self.on_exit:
+            self.on_exit(exit_state)
+
+
+class OMXPlayerBackend(ExternalPlayerBackend):
+    # All D-Bus traffic with omxplayer, including the launch itself, goes
+    # through a command queue and never blocks the reactor. Playback state,
+    # alpha, layer and geometry changes are coalesced, so only the latest
+    # of each which is still waiting is sent.
+    _command_timeout = 2
+    # Starting omxplayer and waiting for it on D-Bus takes a few seconds on
+    # its own, more on a slow or busy Pi.
+    _launch_timeout = 15
+
+    def __init__(self, node, dbus_name=None):
+        super(OMXPlayerBackend, self).__init__(node)
         self._dbus_name = dbus_name
-        self._geometry = geometry
-        self._orientation = orientation
-        self._when_done = when_done
+        self._player = None
+        self._launching = False
+        self._quitting = False
+        self._commands = PlayerCommandQueue(
+            node.reactor, name=dbus_name or 'omxplayer',
+            timeout=self._command_timeout
+        )
 
-        if not layer:
-            layer = self._node.config.video_dispmanx_layer
-        self._layer = layer
+    @property
+    def dbus_name(self):
+        return self._dbus_name
+
+    @property
+    def alive(self):
+        return self._launching or self._player is not None
 
-        self._launch_player()
+    def _primary_rotation(self, filepath):
+        return self._node.media_metadata.get_now(filepath).rotation or 0
 
     def _exit_handler(self, player, exit_state):
-        if self._when_done and not self._paused:
-            self._node.reactor.callFromThread(self._when_done)
+        # Called from the omxplayer-wrapper monitoring thread
+        self._node.reactor.callFromThread(self._exit, player, exit_state)
 
-    def _primary_rotation(self):
-        mi = MediaInfo.parse(self._filepath)
-        return int(float(mi.video_tracks[0].rotation))
+    def _exit(self, player, exit_state):
+        if player is not None and player is not self._player:
+            return
+        self._player = None
+        if not self._quitting:
+            self._exited(exit_state)
 
-    def _launch_player(self, paused=False):
-        x, y, width, height = self._geometry
+    def launch(self, filepath, geometry, layer=None, loop=False,
+               orientation=0, paused=False, hidden=False):
+        self._filepath = filepath
+        self._quitting = False
+        x, y, width, height = geometry
 
         args = [
             '--no-osd', '--aspect-mode', 'letterbox',
-            '--layer', str(self._layer),
+            '--layer', str(layer),
             '--win', '{0},{1},{2},{3}'.format(x, y, x + width, y + height),
             '--adev', 'hdmi',
         ]
 
-        if _mediainfo_available:
-            orientation = self._primary_rotation() - self._orientation
-            if orientation < 0:
-                orientation = 360 + orientation
-            args.extend(['--orientation', '{}'.format(orientation)])
+        if hidden:
+            args.extend(['--alpha', '0'])
 
-        if self._loop:
+        if loop:
             args.append('--loop')
 
-        try:
-            # print("Launching player on {0} with {1}".format(self._dbus_name, self._filepath))
-            self._player = OMXPlayer(self._filepath, args=args, dbus_name=self._dbus_name)
-            if paused:
-                self._player.pause()
-            # print("Installing exit handler")
-            self._player.exitEvent = self._exit_handler
-        except SystemError as e:
+        def _launch():
+            # Runs in the command queue worker. The rotation lookup is in
+            # here too, since it parses the file if the metadata isn't
+            # already known.
+            player = None
+            try:
+                launch_args = list(args)
+                if _mediainfo_available:
+                    rotation = self._primary_rotation(filepath) - orientation
+                    if rotation < 0:
+                        rotation = 360 + rotation
+                    launch_args.extend(
+                        ['--orientation', '{}'.format(rotation)])
+                player = OMXPlayer(filepath, args=launch_args,
+                                   dbus_name=self._dbus_name)
+                if paused:
+                    player.pause()
+                player.exitEvent = self._exit_handler
+            except Exception:
+                # However the launch failed, it's reported as an exit, or
+                # the node would go on thinking it's playing.
+                if player is not None:
+                    try:
+                        player.quit()
+                    except Exception:
+                        pass
+                self._exit_handler(None, 1)
+                raise
+            finally:
+                self._launching = False
+            self._player = player
+
+        self._launching = True
+        d = self._commands.submit(_launch, timeout=self._launch_timeout)
+        d.addErrback(self._command_failed, 'launch')
+        return d
+
+    def _command_failed(self, failure, method):
+        if failure.check(DBusException):
+            return
+        if failure.check(TimeoutError):
+            self.log.warn("{name} did not complete {method} in time",
+                          name=self._dbus_name, method=method)
+            return
+        self.log.failure("{name} failed to {method}", failure=failure,
+                         name=self._dbus_name, method=method)
+
+    def _call(self, method, *args, **kwargs):
+        def _execute():
+            # Runs in the command queue worker
+            player = self._player
+            if player is None:
+                return None
+            return getattr(player, method)(*args)
+        d = self._commands.submit(_execute, key=kwargs.pop('key', None))
+        d.addErrback(self._command_failed, method)
+        return d
+
+    def play(self):
+        return self._call('play', key='playback')
+
+    def pause(self):
+        self._call('pause', key='playback')
+
+    def show(self):
+        self._call('set_alpha', 255, key='alpha')
+
+    def hide(self):
+        self._call('set_alpha', 0, key='alpha')
+
+    def set_layer(self, layer):
+        self._call('set_layer', layer, key='layer')
+
+    def set_geometry(self, x, y, width, height):
+        self._call('set_video_pos', x, y, x + width, y + height,
+                   key='geometry')
+
+    def position(self):
+        return self._call('position')
+
+    def set_position(self, position):
+        self._call('set_position', position)
+
+    def quit(self):
+        if not self.alive:
+            return
+        self._quitting = True
+        # Nothing else which is waiting matters any more
+        self._commands.flush()
+
+        def _quit():
+            # Runs in the command queue worker
+            # The player is alive, and its name taken, until it's gone.
+            player = self._player
+            if player:
+                player.quit()
             self._player = None
-            self._exit_handler(None, 1)
-        # print("Done launching player")
+        d = self._commands.submit(_quit, key='quit')
+        d.addErrback(self._command_failed, 'quit')
+        self._commands.close()
+
+
+class _CommandPlayerProtocol(ProcessProtocol):
+    def __init__(self, backend):
+        self._backend = backend
+
+    def processEnded(self, reason):
+        self._backend._process_ended(self, reason.value.exitCode)
+
+
+class CommandPlayerBackend(ExternalPlayerBackend):
+    # Runs any command line player, such as mpv or the fakeplayer. The
+    # command is formatted with filepath, x, y, width, height and layer.
+    # Pausing is done by stopping and continuing the process, so this works
+    # with players which have no control interface at all.
+    def __init__(self, node, command):
+        super(CommandPlayerBackend, self).__init__(node)
+        self._command = command
+        self._protocol = None
+        self._transport = None
+        self._quitting = False
+        self._loop = False
+        self._args = None
+
+    @property
+    def alive(self):
+        return self._transport is not None
+
+    def _spawn(self):
+        self._protocol = _CommandPlayerProtocol(self)
+        self._transport = self._node.reactor.spawnProcess(
+            self._protocol, self._args[0], self._args, env=os.environ
+        )
+
+    def launch(self, filepath, geometry, layer=None, loop=False,
+               orientation=0, paused=False, hidden=False):
+        self._filepath = filepath
+        self._quitting = False
+        self._loop = loop
+        x, y, width, height = geometry
+        self._args = [
+            part.format(filepath=filepath, x=int(x), y=int(y),
+                        width=int(width), height=int(height),
+                        layer=layer or 0)
+            for part in shlex.split(self._command)
+        ]
+        self._spawn()
+        if paused:
+            self.pause()
+        return succeed(None)
+
+    def _process_ended(self, protocol, exit_code):
+        if protocol is not self._protocol:
+            return
+        self._transport = None
+        if self._quitting:
+            return
+        if self._loop and exit_code == 0:
+            self._spawn()
+            return
+        self._exited(exit_code)
+
+    def _signal(self, signum):
+        if not self._transport:
+            return
+        try:
+            self._transport.signalProcess(signum)
+        except ProcessExitedAlready:
+            pass
+
+    def play(self):
+        self._signal(signal.SIGCONT)
+        return succeed(None)
+
+    def pause(self):
+        self._signal(signal.SIGSTOP)
+
+    def quit(self):
+        if self._transport:
+            self._quitting = True
+            # A stopped process only acts on TERM once it is continued
+            self._signal(signal.SIGTERM)
+            self._signal(signal.SIGCONT)
+
+
+def external_player_backend(node, dbus_name=None):
+    if node.config.video_external_command:
+        return CommandPlayerBackend(node, node.config.video_external_command)
+    return OMXPlayerBackend(node, dbus_name=dbus_name)
+
+
+class ExternalPlayerUnavailable(Exception):
+    pass
+
+
+class ExternalPlayerPool(object):
+    # Keeps the player for the next item launched ahead of time, paused,
+    # hidden and a layer below where it will play, so that starting it is
+    # only a matter of moving it up and showing it. The pool cycles
+    # through dbus_names so the prepared player never collides with the
+    # one which is currently playing. A name is only handed out again once
+    # every player which had it has exited, including those still on their
+    # way out. Until then, there is no player to be had.
+    def __init__(self, node, dbus_names):
+        self._node = node
+        self._dbus_names = list(dbus_names)
+        self._backends = []
+        self._prepared = None
+        self._current = None
+
+    def _dbus_name(self):
+        self._backends = [b for b in self._backends if b.alive]
+        busy = [b.dbus_name for b in self._backends]
+        for name in self._dbus_names:
+            if name not in busy:
+                return name
+        return None
+
+    def _backend(self):
+        if self._node.config.video_external_command:
+            # Command line players don't use D-Bus
+            return external_player_backend(self._node)
+        dbus_name = self._dbus_name()
+        if dbus_name is None:
+            return None
+        backend = external_player_backend(self._node, dbus_name)
+        self._backends.append(backend)
+        return backend
+
+    def available(self, filepath):
+        # Whether take() would have a player for filepath.
+        if self._prepared and self._prepared.alive and \
+                self._prepared.filepath == filepath:
+            return True
+        if self._node.config.video_external_command:
+            return True
+        return self._dbus_name() is not None
+
+    @staticmethod
+    def _standby_layer(layer):
+        if layer:
+            return layer - 1
+        return layer
+
+    def prepare(self, filepath, geometry, layer=None, orientation=0):
+        if self._prepared and self._prepared.alive and \
+                self._prepared.filepath == filepath:
+            return
+        self.discard()
+        backend = self._backend()
+        if backend is None:
+            # Not worth waiting for, the item can still be started cold.
+            return
+        backend.launch(filepath, geometry, layer=self._standby_layer(layer),
+                       orientation=orientation, paused=True, hidden=True)
+        self._prepared = backend
+
+    def take(self, filepath):
+        # Returns the prepared player if it is for filepath, or a fresh
+        # backend which has not been launched yet. Raises
+        # ExternalPlayerUnavailable if there is neither, check available()
+        # first.
+        backend = self._prepared
+        self._prepared = None
+        if backend and backend.alive and backend.filepath == filepath:
+            self._current = backend
+            return backend, True
+        if backend:
+            backend.quit()
+        backend = self._backend()
+        if backend is None:
+            raise ExternalPlayerUnavailable(
+                "All of {0} are still in use".format(self._dbus_names))
+        self._current = backend
+        return self._current, False
+
+    def discard(self):
+        if self._prepared:
+            self._prepared.quit()
+            self._prepared = None
+
+    def clear(self):
+        self.discard()
+        if self._current:
+            self._current.quit()
+            self._current = None
+
+
+class ExternalMediaPlayer(object):
+    def __init__(self, filepath, geometry, when_done, node,
+                 layer=None, loop=False, dbus_name=None, orientation=0,
+                 pool=None):
+        self._paused = False
+        self._hidden = False
+        self._pposition = None
+        self._filepath = filepath
+        self._node = node
+        self._loop = loop
+        self._geometry = geometry
+        self._orientation = orientation
+        self._when_done = when_done
+
+        if not layer:
+            layer = self._node.config.video_dispmanx_layer
+        self._layer = layer
+
+        prepared = False
+        if pool:
+            self._player, prepared = pool.take(filepath)
+        else:
+            self._player = external_player_backend(node, dbus_name=dbus_name)
+        self._player.on_exit = self._exit_handler
+
+        # Fires once the player is running, for the media trace
+        if prepared:
+            self._player.set_geometry(*geometry)
+            self._player.set_layer(self._layer)
+            self._player.show()
+            self.ready = self._player.play()
+        else:
+            self.ready = self._launch_player()
+
+    def _exit_handler(self, exit_state):
+        if self._when_done and not self._paused:
+            self._when_done()
+
+    def _launch_player(self, paused=False):
+        return self._player.launch(self._filepath, self._geometry, layer=self._layer,
+                            loop=self._loop, orientation=self._orientation,
+                            paused=paused)
 
     def force_stop(self):
         if self._player:
-            # print("Force stopping player")
             self._player.quit()
             self._player = None
 
     def pause(self):
-        if self._player:
-            # print("Pausing player")
-            self._pposition = self._player.position()
-            self._pstate = self._player.playback_status()
-            self._player.quit()
-            self._player = None
-            # print("Done pausing")
+        # The player is kept alive, paused and hidden, so that resuming
+        # doesn't need a new process.
+        if self._player and not self._paused:
+            self._paused = True
+
+            def _store_position(position):
+                if position:
+                    self._pposition = position
+            self._player.position().addCallback(_store_position)
+            self._player.pause()
+            self._player.hide()
+
+    def hide(self):
+        # Keeps playing, out of sight
+        if self._player and not self._hidden:
+            self._hidden = True
+            self._player.hide()
 
     def resume(self):
-        if self._player or not self._pstate:
+        if not self._player or not (self._paused or self._hidden):
             return
-        # print("Resuming player")
-        self._launch_player(paused=True)
-        if self._pposition:
-            self._player.set_position(self._pposition)
-        if self._pstate == "Playing":
-            self._player.play()
-        self._pstate = None
-        # print("Done resume")
+        if not self._player.alive:
+            self._launch_player(paused=True)
+            if self._pposition:
+                self._player.set_position(self._pposition)
+        self._player.show()
+        self._player.play()
+        self._paused = False
+        self._hidden = False
 
     def set_geometry(self, x, y, width, height):
         self._geometry = (x, y, width, height)
         if self._player:
-            try:
-                self._player.set_video_pos(x, y, x + width, y + height)
-            except DBusException:
-                pass
+            self._player.set_geometry(x, y, width, height)
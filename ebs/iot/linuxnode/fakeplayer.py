@@ -0,0 +1,45 @@
+
+
+# A stand-in for an external media player, for exercising the external
+# player infrastructure on hosts without one. It 'plays' a file for a fixed
+# duration, reporting what it is doing on stdout. It is paused and resumed
+# with SIGSTOP and SIGCONT like any other process, and time spent stopped
+# does not count towards the duration. Use it with the command backend :
+#
+#   [video]
+#   external_command = python -m ebs.iot.linuxnode.fakeplayer -d 5 {filepath}
+
+import sys
+import time
+import signal
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake external media player')
+    parser.add_argument('filepath')
+    parser.add_argument('-d', '--duration', type=float, default=5)
+    parser.add_argument('--fail', action='store_true',
+                        help='Exit with an error instead of playing')
+    args = parser.parse_args()
+
+    def _terminate(signum, frame):
+        print("STOPPED {0}".format(args.filepath), flush=True)
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, _terminate)
+
+    if args.fail:
+        print("FAILED {0}".format(args.filepath), flush=True)
+        sys.exit(1)
+
+    print("PLAYING {0}".format(args.filepath), flush=True)
+    tick = 0.05
+    elapsed = 0
+    while elapsed < args.duration:
+        time.sleep(tick)
+        elapsed += tick
+    print("FINISHED {0}".format(args.filepath), flush=True)
+
+
+if __name__ == '__main__':
+    main()
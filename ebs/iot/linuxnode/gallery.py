@@ -1,14 +1,15 @@
 
 
 import os
+import time
+from collections import OrderedDict
 from six.moves.urllib.parse import urlparse
-from twisted import logger
-from twisted.internet.task import deferLater
-from twisted.internet.defer import CancelledError
+from twisted.internet.threads import deferToThread
 
 from sqlalchemy import Column
 from sqlalchemy import Integer
 from sqlalchemy import Text
+from sqlalchemy import DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -16,24 +17,30 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from kivy.uix.relativelayout import RelativeLayout
 
+from .lazylog import LazyLogger
 from .basemixin import BaseMixin
 from .basemixin import BaseGuiMixin
 from .resources import ASSET
+from .playlist import PlaylistEngine
+from .playlist import PlaylistEntry
+from .playlist import parse_dayparts
 from .widgets.gallery import ImageGallery
 from .widgets.pdfplayer import PDFPlayer
+from .widgets.image import image_size_proof
+from .widgets.image import image_pool
 
 WEBRESOURCE = 1
 
 SIDEBAR = 1
 PLAYER = 2
+FOOTER = 3
+CORNER = 4
 
 Base = declarative_base()
 metadata = Base.metadata
 
 
-class WebResourceGalleryModel(Base):
-    __tablename__ = 'gallery_1'
-
+class GalleryModelMixin(object):
     id = Column(Integer, primary_key=True)
     seq = Column(Integer, unique=True, index=True)
     rtype = Column(Integer)
@@ -46,6 +53,52 @@ class WebResourceGalleryModel(Base):
         )
 
 
+class WebResourceGalleryModel(GalleryModelMixin, Base):
+    __tablename__ = 'gallery_1'
+
+
+_gallery_models = {SIDEBAR: WebResourceGalleryModel}
+
+
+def gallery_model(gmid):
+    # Each gallery zone gets its own table, gallery_<gmid>, in the shared
+    # gallery database. The sidebar keeps the table it has always used.
+    if gmid not in _gallery_models:
+        _gallery_models[gmid] = type(
+            'WebResourceGalleryModel{0}'.format(gmid),
+            (GalleryModelMixin, Base),
+            {'__tablename__': 'gallery_{0}'.format(gmid)}
+        )
+    return _gallery_models[gmid]
+
+
+class GalleryPlaylistModel(Base):
+    __tablename__ = 'gallery_playlist'
+
+    id = Column(Integer, primary_key=True)
+    gmid = Column(Integer, index=True)
+    seq = Column(Integer)
+    weight = Column(Integer)
+    valid_from = Column(DateTime)
+    valid_until = Column(DateTime)
+    dayparts = Column(Text)
+
+    def __repr__(self):
+        return "{0} {1:3} x{2} [{3} - {4}] {5}".format(
+            self.gmid, self.seq, self.weight, self.valid_from or '',
+            self.valid_until or '', self.dayparts or ''
+        )
+
+
+class GalleryRotationModel(Base):
+    __tablename__ = 'gallery_rotation'
+
+    id = Column(Integer, primary_key=True)
+    gmid = Column(Integer, index=True)
+    daypart = Column(Text)
+    position = Column(Integer)
+
+
 class GalleryResource(object):
     def __init__(self, manager, seq=None, rtype=None,
                  resource=None, duration=None):
@@ -130,7 +183,94 @@ class GalleryResource(object):
         return self._manager.db_model
 
 
+class GalleryPreloader(object):
+    # Holds gallery content which has been built ahead of its transition,
+    # so that the transition animation does not have to wait on image
+    # decode, resize and texture upload or on PDF page generation.
+    # Entries are keyed by (gmid, resource). Each manager is responsible
+    # for discarding its own entries which fall out of its lookahead window,
+    # which bounds the memory held here to the lookahead of each gallery.
+    def __init__(self, node, lookahead=1):
+        self._node = node
+        self._lookahead = lookahead
+        self._log = None
+        self._prepared = OrderedDict()
+        self._pending = {}
+
+    @property
+    def log(self):
+        if not self._log:
+            self._log = LazyLogger(namespace="gallery.preloader",
+                                   source=self)
+        return self._log
+
+    @property
+    def lookahead(self):
+        return self._lookahead
+
+    def has(self, key):
+        return key in self._prepared or key in self._pending
+
+    def prepare(self, key, filepath, builder):
+        if self.has(key):
+            return
+        if os.path.splitext(filepath)[1] == '.pdf':
+            # PDFPlayer generates its pages in its own thread.
+            content = builder(filepath)
+            self._prepared[key] = content
+            return
+
+        self.log.debug("Preloading {filename}",
+                       filename=os.path.basename(filepath))
+        d = deferToThread(image_size_proof, filepath)
+        self._pending[key] = d
+
+        def _build(_):
+            if self._pending.get(key) is not d:
+                # Discarded while we were working on it
+                return
+            self._pending.pop(key)
+            self._prepared[key] = builder(filepath)
+
+        def _error_handler(failure):
+            if self._pending.get(key) is d:
+                self._pending.pop(key)
+            self.log.failure("Unable to preload {filename}", failure=failure,
+                             filename=os.path.basename(filepath))
+        d.addCallbacks(_build, _error_handler)
+        return d
+
+    def take(self, key):
+        return self._prepared.pop(key, None)
+
+    @staticmethod
+    def _release(content):
+        if isinstance(content, PDFPlayer):
+            content.stop()
+        else:
+            image_pool.release(content)
+
+    def discard(self, key):
+        self._pending.pop(key, None)
+        content = self._prepared.pop(key, None)
+        if content is not None:
+            self._release(content)
+
+    def retain(self, owner, keys):
+        # Discard everything belonging to owner which is not in keys.
+        for key in list(self._prepared.keys()) + list(self._pending.keys()):
+            if key[0] == owner and key not in keys:
+                self.discard(key)
+
+    def clear(self):
+        for key in list(self._prepared.keys()) + list(self._pending.keys()):
+            self.discard(key)
+
+
 class BaseGalleryManager(object):
+    _preload_delay = 3
+    _step_slack = 0.25
+
     def __init__(self, node, gmid, widget, default_duration=4):
         self._gmid = gmid
         self._log = None
@@ -138,33 +278,63 @@ class BaseGalleryManager(object):
         self._widget = widget
         self._default_duration = default_duration
         self._seq = 0
-        self._task = None
         self._items = []
+        self._playlist = PlaylistEngine(
+            dayparts=parse_dayparts(self._node.config.gallery_dayparts)
+        )
 
     @property
     def log(self):
         if not self._log:
-            self._log = logger.Logger(namespace="gallery.{0}".format(self._gmid),
-                                      source=self)
+            self._log = LazyLogger(namespace="gallery.{0}".format(self._gmid),
+                                   source=self)
         return self._log
 
     @property
     def default_duration(self):
         return self._default_duration
 
+    @property
+    def playlist(self):
+        return self._playlist
+
+    @property
+    def clock(self):
+        return self._node.scheduler
+
     def flush(self, force=False):
         self.log.debug("Flushing gallery resources")
         self._items = []
+        self._playlist.load([])
         if force:
             self._trigger_transition()
 
+    @staticmethod
+    def _parse_item(seq, item):
+        # Items are (resource, duration) tuples, or dicts with resource and
+        # duration keys which may also carry a weight, a validity window
+        # (valid_from, valid_until) and a list of daypart tags.
+        if isinstance(item, dict):
+            item = dict(item)
+            resource = item.pop('resource')
+            duration = item.pop('duration', None)
+        else:
+            resource, duration = item
+            item = {}
+        return resource, duration, PlaylistEntry(seq, **item)
+
     def _load(self, items):
-        return items
+        return [
+            GalleryResource(self, seq=idx, rtype=WEBRESOURCE,
+                            resource=resource, duration=duration)
+            for idx, (resource, duration, _) in enumerate(items)
+        ]
 
     def load(self, items):
         self.log.debug("Loading gallery resource list")
-        self.flush()
+        items = [self._parse_item(idx, item) for idx, item in enumerate(items)]
         self._items = self._load(items)
+        self._playlist.load([entry for _, _, entry in items])
 
     def add_item(self, item):
         raise NotImplementedError
@@ -178,13 +348,10 @@ class BaseGalleryManager(object):
 
     @property
     def next_seq(self):
-        seq = self._seq + 1
-        if seq < len(self._items):
-            return seq
-        elif len(self._items):
-            return 0
-        else:
-            return -1
+        seq = self._playlist.peek(1)
+        if seq:
+            return seq[0]
+        return -1
 
     def start(self):
         self.log.info("Starting Gallery Manager {gmid} of {name}",
@@ -192,16 +359,54 @@ class BaseGalleryManager(object):
         self.step()
 
     def step(self):
-        self._seq = self.next_seq
+        self._seq = self._playlist.next()
         duration = self._trigger_transition(stopped=False)
         if not duration:
             duration = self.default_duration
-        self._task = deferLater(self._node.reactor, duration, self.step)
+        self.clock.schedule(('gallery', self._gmid, 'step'), duration,
+                            self.step, slack=self._step_slack)
+        self._schedule_preload(duration)
 
-        def _cancel_handler(failure):
-            failure.trap(CancelledError)
-        self._task.addErrback(_cancel_handler)
-        return self._task
+    @property
+    def preloader(self):
+        return self._node.gallery_preloader
+
+    def _preload_key(self, target):
+        return self._gmid, target.resource
+
+    def _build_content(self, filepath):
+        # PDFs are built stopped, preloaded or not, and started by
+        # _trigger_transition when they are shown.
+        if os.path.splitext(filepath)[1] == '.pdf':
+            return PDFPlayer(source=filepath, exit_retrace=True,
+                             temp_dir=self._node.temp_dir,
+                             autostart=False,
+                             scheduler=self._node.scheduler)
+        return self._widget.build_image(filepath)
+
+    def _schedule_preload(self, duration):
+        # Wait for the transition animation to finish before starting on
+        # the next items, but make sure we're done well before they're due.
+        delay = min(self._preload_delay, duration / 2)
+        self.clock.schedule(('gallery', self._gmid, 'preload'), delay,
+                            self._preload, slack=1)
+
+    def _preload(self):
+        keys = []
+        if self.current_seq != -1:
+            for seq in self._playlist.peek(self.preloader.lookahead):
+                if seq == self.current_seq:
+                    continue
+                target = self._items[seq]
+                if target.rtype != WEBRESOURCE:
+                    continue
+                fp = self._node.resource_manager.get(target.resource).filepath
+                if not os.path.exists(fp):
+                    continue
+                key = self._preload_key(target)
+                keys.append(key)
+                self.preloader.prepare(key, fp, self._build_content)
+        self.preloader.retain(self._gmid, keys)
 
     def _trigger_transition(self, stopped=False):
         # If current_seq is -1, that means the gallery is empty. This may be
@@ -220,18 +425,22 @@ class BaseGalleryManager(object):
                 self._widget.current = None
                 return 10
 
-            if os.path.splitext(fp)[1] == '.pdf':
-                fp = PDFPlayer(source=fp, exit_retrace=True,
-                               temp_dir=self._node.temp_dir)
+            content = self.preloader.take(self._preload_key(target))
+            if content is None:
+                content = self._build_content(fp)
+
+            if isinstance(content, PDFPlayer):
+                content.start()
                 if not target.duration:
-                    duration = fp.num_pages * fp.interval
+                    duration = content.num_pages * content.interval
 
-            self._widget.current = fp
+            self._widget.current = content
         return duration
 
     def stop(self):
-        if self._task:
-            self._task.cancel()
+        self.clock.cancel(('gallery', self._gmid, 'step'))
+        self.clock.cancel(('gallery', self._gmid, 'preload'))
+        self.preloader.retain(self._gmid, [])
         self._trigger_transition(stopped=True)
 
     def render(self):
@@ -240,13 +449,13 @@ class BaseGalleryManager(object):
 
 
 class GalleryManager(BaseGalleryManager):
+    _rotation_persist_interval = 60
+
     def __init__(self, *args, **kwargs):
         super(GalleryManager, self).__init__(*args, **kwargs)
 
-        self._db_engine = None
-        self._db = None
-        self._db_dir = None
-        _ = self.db
+        self._rotation_persisted = 0
+        self._node.gallery_db_register(self.db_model)
 
         self._persistence_load()
 
@@ -259,32 +468,87 @@ class GalleryManager(BaseGalleryManager):
             session.close()
             return
         try:
+            resources = set()
             for robj in results:
                 session.delete(robj)
-                # Orphan the resource so that the cache infrastructure
-                # will clear the files as needed
-                r = self._node.resource_manager.get(robj.resource)
-                r.rtype = None
-                r.commit()
+                resources.add(robj.resource)
+            for pobj in self.db_get_playlist(session).all():
+                session.delete(pobj)
             session.commit()
         except:
             session.rollback()
             raise
         finally:
             session.close()
+        # Orphan the resources so that the cache infrastructure
+        # will clear the files as needed
+        self._node.resource_manager.commit_rtypes(
+            {r: None for r in resources}
+        )
 
     def _load(self, items):
-        _items = []
-        for idx, (resource, duration) in enumerate(items):
-            robj = GalleryResource(
-                self, seq=idx, rtype=WEBRESOURCE,
-                resource=resource, duration=duration
-            )
-            robj.commit()
-            _items.append(robj)
-            r = self._node.resource_manager.get(resource)
-            r.rtype = ASSET
-            r.commit()
+        # Apply the new list as a diff against the one in the database, in
+        # a single transaction. Resources which stay in the gallery are never
+        # orphaned, not even transiently, so a cache trim which happens to be
+        # running can't remove them.
+        _items = super(GalleryManager, self)._load(items)
+        entries = [entry for _, _, entry in items]
+        changes = 0
+        session = self.db()
+        try:
+            existing = {robj.seq: robj for robj
+                        in self.db_get_resources(session).all()}
+            old_resources = set(robj.resource for robj in existing.values())
+            for item in _items:
+                robj = existing.pop(item.seq, None)
+                if robj is None:
+                    robj = self.db_model()
+                    robj.seq = item.seq
+                    session.add(robj)
+                elif (robj.rtype, robj.resource, robj.duration) == \
+                        (item.rtype, item.resource, item.duration):
+                    continue
+                robj.rtype = item.rtype
+                robj.resource = item.resource
+                robj.duration = item.duration
+                changes += 1
+            for robj in existing.values():
+                session.delete(robj)
+                changes += 1
+
+            # Playlist scheduling information. Unchanged rows are left
+            # alone by the session.
+            pexisting = {pobj.seq: pobj for pobj
+                         in self.db_get_playlist(session).all()}
+            for entry in entries:
+                pobj = pexisting.pop(entry.seq, None)
+                if pobj is None:
+                    pobj = GalleryPlaylistModel()
+                    pobj.gmid = self._gmid
+                    pobj.seq = entry.seq
+                    session.add(pobj)
+                pobj.weight = entry.weight
+                pobj.valid_from = entry.valid_from
+                pobj.valid_until = entry.valid_until
+                pobj.dayparts = ','.join(entry.dayparts)
+            for pobj in pexisting.values():
+                session.delete(pobj)
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        new_resources = set(item.resource for item in _items)
+        # Orphan resources which have left the gallery so that the cache
+        # infrastructure will clear the files as needed
+        rtypes = {r: None for r in old_resources - new_resources}
+        rtypes.update({r: ASSET for r in new_resources})
+        self._node.resource_manager.commit_rtypes(rtypes)
+
+        self.log.debug("Gallery load changed {changes} of {total} entries",
+                       changes=changes, total=len(_items))
         self._fetch()
         return _items
 
@@ -292,18 +556,64 @@ class GalleryManager(BaseGalleryManager):
         session = self.db()
         try:
             results = self.db_get_resources(session).all()
-        except NoResultFound:
-            session.close()
-            return
-        try:
-            _items = []
-            for robj in results:
-                _items.append(GalleryResource(self, robj.seq))
+            playlist = {pobj.seq: pobj for pobj
+                        in self.db_get_playlist(session).all()}
+            positions = {r.daypart: r.position for r
+                         in self.db_get_rotation(session).all()}
         finally:
             session.close()
+        _items = []
+        _entries = []
+        for robj in results:
+            _items.append(GalleryResource(
+                self, seq=robj.seq, rtype=robj.rtype,
+                resource=robj.resource, duration=robj.duration
+            ))
+            pobj = playlist.get(robj.seq, None)
+            if pobj:
+                _entries.append(PlaylistEntry(
+                    robj.seq, weight=pobj.weight,
+                    valid_from=pobj.valid_from, valid_until=pobj.valid_until,
+                    dayparts=pobj.dayparts
+                ))
+            else:
+                _entries.append(PlaylistEntry(robj.seq))
         self._items = _items
+        self._playlist.load(_entries)
+        self._playlist.restore(positions)
         self._fetch()
 
+    def _persist_rotation(self):
+        self._rotation_persisted = time.time()
+        session = self.db()
+        try:
+            existing = {r.daypart: r for r
+                        in self.db_get_rotation(session).all()}
+            for daypart, position in self._playlist.positions.items():
+                robj = existing.get(daypart, None)
+                if robj is None:
+                    robj = GalleryRotationModel()
+                    robj.gmid = self._gmid
+                    robj.daypart = daypart
+                    session.add(robj)
+                robj.position = position
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def step(self):
+        super(GalleryManager, self).step()
+        if time.time() - self._rotation_persisted > \
+                self._rotation_persist_interval:
+            self._persist_rotation()
+
+    def stop(self):
+        super(GalleryManager, self).stop()
+        self._persist_rotation()
+
     def db_get_resources(self, session, seq=None):
         q = session.query(self.db_model)
         if seq is not None:
@@ -314,27 +624,22 @@ class GalleryManager(BaseGalleryManager):
             q = q.order_by(self.db_model.seq)
         return q
 
-    @property
-    def db_model(self):
-        if self._gmid == SIDEBAR:
-            return WebResourceGalleryModel
+    def db_get_playlist(self, session):
+        q = session.query(GalleryPlaylistModel)
+        q = q.filter(GalleryPlaylistModel.gmid == self._gmid)
+        return q.order_by(GalleryPlaylistModel.seq)
 
-    @property
-    def db(self):
-        if self._db is None:
-            self._db_engine = create_engine(self.db_url)
-            metadata.create_all(self._db_engine)
-            self._db = sessionmaker(expire_on_commit=False)
-            self._db.configure(bind=self._db_engine)
-        return self._db
+    def db_get_rotation(self, session):
+        q = session.query(GalleryRotationModel)
+        return q.filter(GalleryRotationModel.gmid == self._gmid)
 
     @property
-    def db_url(self):
-        return 'sqlite:///{0}'.format(os.path.join(self.db_dir, 'gallery.db'))
+    def db_model(self):
+        return gallery_model(self._gmid)
 
     @property
-    def db_dir(self):
-        return self._node.db_dir
+    def db(self):
+        return self._node.gallery_db
 
     def _fetch(self):
         self.log.debug("Triggering Gallery Fetch")
@@ -369,22 +674,72 @@ class GalleryManager(BaseGalleryManager):
 class GalleryMixin(BaseMixin):
     def __init__(self, *args, **kwargs):
         self._gallery_managers = {}
+        self._gallery_zones = {}
+        self._gallery_preloader = None
+        self._gallery_db_engine = None
+        self._gallery_db = None
         super(GalleryMixin, self).__init__(*args, **kwargs)
 
+    @property
+    def gallery_preloader(self):
+        if not self._gallery_preloader:
+            self._gallery_preloader = GalleryPreloader(
+                self, lookahead=self.config.gallery_preload_lookahead
+            )
+        return self._gallery_preloader
+
+    @property
+    def gallery_db(self):
+        if self._gallery_db is None:
+            self._gallery_db_engine = create_engine(self.gallery_db_url)
+            metadata.create_all(self._gallery_db_engine)
+            self._gallery_db = sessionmaker(expire_on_commit=False)
+            self._gallery_db.configure(bind=self._gallery_db_engine)
+        return self._gallery_db
+
+    @property
+    def gallery_db_url(self):
+        return 'sqlite:///{0}'.format(os.path.join(self.db_dir, 'gallery.db'))
+
+    def gallery_db_register(self, model):
+        # Zone tables may be declared after the database was first opened.
+        _ = self.gallery_db
+        model.__table__.create(self._gallery_db_engine, checkfirst=True)
+
+    def gallery_zone_install(self, gmid, widget):
+        # Provide the ImageGallery widget for a zone. This has to be done
+        # before the zone's manager is first used.
+        if gmid in self._gallery_managers.keys():
+            raise ValueError("Gallery zone {0} is already running".format(gmid))
+        self._gallery_zones[gmid] = widget
+
+    def gallery_zone_widget(self, gmid):
+        if gmid in self._gallery_zones.keys():
+            return self._gallery_zones[gmid]
+        if gmid == SIDEBAR:
+            return self.gui_gallery
+        raise KeyError("No widget installed for gallery zone {0}".format(gmid))
+
+    @property
+    def gallery_zones(self):
+        return list(self._gallery_managers.keys())
+
     def gallery_manager(self, gmid):
         if gmid not in self._gallery_managers.keys():
             self.log.info("Initializing gallery manager {gmid}", gmid=gmid)
-            self._gallery_managers[gmid] = GalleryManager(self, gmid, self.gui_gallery)
+            self._gallery_managers[gmid] = GalleryManager(
+                self, gmid, self.gallery_zone_widget(gmid)
+            )
         return self._gallery_managers[gmid]
 
-    def gallery_load(self, items):
-        self.gallery_manager(SIDEBAR).load(items)
+    def gallery_load(self, items, gmid=SIDEBAR):
+        self.gallery_manager(gmid).load(items)
 
-    def gallery_start(self):
-        self.gallery_manager(SIDEBAR).start()
+    def gallery_start(self, gmid=SIDEBAR):
+        self.gallery_manager(gmid).start()
 
-    def gallery_stop(self):
-        self.gallery_manager(SIDEBAR).stop()
+    def gallery_stop(self, gmid=SIDEBAR):
+        self.gallery_manager(gmid).stop()
 
     @property
     def gui_gallery(self):
@@ -0,0 +1,49 @@
+
+
+from twisted.logger import Logger
+from twisted.logger import LogLevel
+
+
+_priorities = {
+    LogLevel.debug: 0,
+    LogLevel.info: 1,
+    LogLevel.warn: 2,
+    LogLevel.error: 3,
+    LogLevel.critical: 4,
+}
+
+# The lowest level any observer accepts. Until logging is set up, nothing
+# is held back.
+_gate = [0]
+
+
+def set_log_level_gate(level):
+    _gate[0] = _priorities[level]
+
+
+def log_level_gate():
+    for level, priority in _priorities.items():
+        if priority == _gate[0]:
+            return level
+
+
+def log_level_enabled(level):
+    return _priorities[level] >= _gate[0]
+
+
+class LazyLogger(Logger):
+    # A twisted Logger which drops events below the level gate as soon as
+    # they are emitted. A twisted Logger otherwise builds the event and
+    # hands it to every observer, each of which then checks the level for
+    # itself. Messages should be given as format strings with the values as
+    # keyword arguments, which are only formatted by observers which accept
+    # the event, never with str.format at the call site. Anything costly to
+    # compute just for a message can be guarded with enabled().
+    def emit(self, level, format=None, **kwargs):
+        if _priorities.get(level, 4) < _gate[0]:
+            return
+        super(LazyLogger, self).emit(level, format, **kwargs)
+
+    @staticmethod
+    def enabled(level):
+        return log_level_enabled(level)
@@ -1,7 +1,6 @@
 
 
 import os
-import io
 import sys
 import time
 from twisted import logger
@@ -11,17 +10,16 @@ from twisted.logger import LogLevelFilterPredicate
 from twisted.logger import FilteringLogObserver
 from twisted.logger import textFileLogObserver
 from twisted.logger import STDLibLogObserver
+from .logsink import AsyncFileLogObserver
+from .logsink import formatEventAsJSONLine
+from .logsink import index_log_segment
+from .lazylog import LazyLogger
+from .lazylog import set_log_level_gate
 
 from appdirs import user_log_dir
 from datetime import datetime
-from collections import deque
-from kivy.core.window import Window
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.label import Label
-from kivy.uix.scrollview import ScrollView
-from kivy.effects.scroll import ScrollEffect
 from kivy.utils import get_hex_from_color
-from .widgets.labels import ColorLabel
+from .widgets.logview import LogView
 
 from .config import ConfigMixin
 from .basemixin import BaseMixin
@@ -37,29 +35,49 @@ class NodeLoggingMixin(ConfigMixin, BaseMixin):
     def __init__(self, *args, **kwargs):
         super(NodeLoggingMixin, self).__init__(*args, **kwargs)
         self._log_file = None
+        self._log_sink = None
+        self._log_structured_sink = None
         self.log_prune()
-        self._log = logger.Logger(namespace=self._appname,
-                                  source=self)
+        self._log = LazyLogger(namespace=self._appname,
+                               source=self)
         self.reactor.callWhenRunning(self._start_logging)
+        # Not in stop(), so that the node can still log while it shuts down.
+        self.reactor.addSystemEventTrigger('after', 'shutdown',
+                                           self._stop_logging)
 
-    def _observers(self):
+    @property
+    def _log_level(self):
         if self.config.debug:
-            level = LogLevel.debug
+            return LogLevel.debug
         else:
-            level = LogLevel.info
+            return LogLevel.info
+
+    @property
+    def _log_level_gate(self):
+        # The lowest level any of the observers accept.
+        return self._log_level
+
+    def _observers(self):
+        level = self._log_level
 
-        return [
+        rv = [
             # STDLibLogObserver(),
             FilteringLogObserver(
                 textFileLogObserver(sys.stdout),
                 predicates=[LogLevelFilterPredicate(LogLevel.warn)]
             ),
             FilteringLogObserver(
-                textFileLogObserver(io.open(self.log_file, 'a')),
+                self.log_sink,
                 predicates=[LogLevelFilterPredicate(level)]
             ),
 
         ]
+        if self.config.log_structured:
+            rv.append(FilteringLogObserver(
+                self.log_structured_sink,
+                predicates=[LogLevelFilterPredicate(level)]
+            ))
+        return rv
 
     def _start_logging(self):
         # TODO Mention that docs don't say reactor should be running
@@ -67,6 +85,7 @@ class NodeLoggingMixin(ConfigMixin, BaseMixin):
         # TODO Find out about a functional print to console observer
         # TODO Mention problem with IOBase vs TextIOWrapper
         # TODO log_source is not set when logger instantiated in __init__
+        set_log_level_gate(self._log_level_gate)
         logger.globalLogBeginner.beginLoggingTo(self._observers())
         self.log.info("Logging to {logfile}", logfile=self.log_file)
 
@@ -74,13 +93,44 @@ class NodeLoggingMixin(ConfigMixin, BaseMixin):
     def log(self):
         return self._log
 
+    @property
+    def log_sink(self):
+        if not self._log_sink:
+            self._log_sink = AsyncFileLogObserver(
+                self.log_file,
+                max_bytes=self.config.log_max_size,
+                backups=self.config.log_backups,
+                compress=self.config.log_compress,
+                queue_size=self.config.log_queue_size,
+            )
+        return self._log_sink
+
+    @property
+    def log_structured_sink(self):
+        # JSON lines, for querying with python -m ebs.iot.linuxnode.logquery
+        if not self._log_structured_sink:
+            self._log_structured_sink = AsyncFileLogObserver(
+                os.path.join(self.log_dir, 'eventlog.jsonl'),
+                max_bytes=self.config.log_max_size,
+                backups=self.config.log_backups,
+                compress=self.config.log_compress,
+                queue_size=self.config.log_queue_size,
+                formatter=formatEventAsJSONLine,
+                indexer=index_log_segment,
+            )
+        return self._log_structured_sink
+
+    def _stop_logging(self):
+        if self._log_sink:
+            self._log_sink.close()
+        if self._log_structured_sink:
+            self._log_structured_sink.close()
+
     @property
     def log_file(self):
+        # Rotated by size into runlog.<timestamp>.gz segments.
         if not self._log_file:
-            self._log_file = os.path.join(
-                self.log_dir, 
-                'runlog_{0}'.format(datetime.today().strftime('%d%m%y'))
-            )
+            self._log_file = os.path.join(self.log_dir, 'runlog')
         return self._log_file
 
     def log_prune(self):
@@ -108,10 +158,6 @@ class NodeLoggingMixin(ConfigMixin, BaseMixin):
 class LoggingGuiMixin(ConfigMixin, BaseGuiMixin):
     def __init__(self, *args, **kwargs):
         self._gui_log = None
-        self._gui_log_end = None
-        self._gui_log_layout = None
-        self._gui_log_scroll = None
-        self._gui_log_lines = deque([], maxlen=100)
         super(LoggingGuiMixin, self).__init__(*args, **kwargs)
 
     def _observers(self):
@@ -120,6 +166,13 @@ class LoggingGuiMixin(ConfigMixin, BaseGuiMixin):
             rv.extend([self.gui_log_observer])
         return rv
 
+    @property
+    def _log_level_gate(self):
+        if self.config.gui_log_display and \
+                'debug' not in self._level_ignore_map[self.config.gui_log_level]:
+            return LogLevel.debug
+        return NodeLoggingMixin._log_level_gate.fget(self)
+
     _level_ignore_map = {
         'trace': [],
         'debug': ['trace'],
@@ -148,56 +201,23 @@ class LoggingGuiMixin(ConfigMixin, BaseGuiMixin):
             color = get_hex_from_color(color)
             msg = '[color={0}]{1}[/color]'.format(color, msg)
 
-        self._gui_log_lines.append(msg)
-        self._gui_log.text = '\n'.join(self._gui_log_lines)
+        self._gui_log.append(msg)
 
     @property
     def gui_log(self):
         if not self._gui_log:
-            self._gui_log_scroll = ScrollView(
-                size_hint=(None, None), bar_pos_y='right',
-                bar_color=[1, 1, 1, 1], effect_cls=ScrollEffect,
-                do_scroll_x=False, do_scroll_y=True)
+            self._gui_log = LogView(
+                maxlen=100, size_hint=(None, None), padding=8,
+                bgcolor=[0, 0, 0, 0.2], font_size='12sp',
+            )
 
             def _set_log_size(_, size):
                 width = min(max(700, size[0] * 0.3), size[0])
                 height = size[1] * 0.6
-                self._gui_log_scroll.size = width, height
+                self._gui_log.size = width, height
             self.gui_root.bind(size=_set_log_size)
 
-            self._gui_log_layout = BoxLayout(orientation='vertical',
-                                             size_hint=(1, None))
-
-            self._gui_log = ColorLabel(
-                size_hint=(1, 1), padding=(8, 8), bgcolor=[0, 0, 0, 0.2],
-                halign='left', valign='top', markup=True, font_size='12sp',
-            )
-
-            self._gui_log_end = Label(size_hint=(1, None), height=1)
-
-            def _set_label_height(_, size):
-                if size[1] > Window.height * 0.3:
-                    self._gui_log.height = size[1]
-                else:
-                    self._gui_log.height = Window.height * 0.3
-            self._gui_log.bind(texture_size=_set_label_height)
-
-            def _set_layout_height(_, size):
-                if size[1] > Window.height * 0.3:
-                    self._gui_log_layout.height = size[1]
-                else:
-                    self._gui_log_layout.height = Window.height * 0.3
-                self._gui_log_scroll.scroll_to(self._gui_log_end)
-            self._gui_log.bind(texture_size=_set_layout_height)
-
-            def _set_text_width(_, size):
-                self._gui_log.text_size = size[0], None
-            self._gui_log.bind(size=_set_text_width)
-
-            self._gui_log_layout.add_widget(self._gui_log)
-            self._gui_log_layout.add_widget(self._gui_log_end)
-            self._gui_log_scroll.add_widget(self._gui_log_layout)
-            self.gui_debug_stack.add_widget(self._gui_log_scroll)
+            self.gui_debug_stack.add_widget(self._gui_log)
         return self._gui_log
 
     def gui_setup(self):
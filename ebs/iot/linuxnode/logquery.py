@@ -0,0 +1,235 @@
+
+
+# Queries the structured event log written when [log] structured is set.
+# Rotated segments are skipped using their index if they cannot contain a
+# match, and lines are only parsed once they pass a cheap text match on the
+# namespace. For example :
+#
+#   Downloads which took over 10 seconds today :
+#     python -m ebs.iot.linuxnode.logquery --ns rm --since today -w 'duration>10'
+#
+#   Media player collisions of event manager 1 in the last hour :
+#     python -m ebs.iot.linuxnode.logquery --ns em.1 --since 1h -w collision_count
+#
+# Without a filename, the eventlog.jsonl of the default node log directory
+# is used.
+
+import os
+import re
+import sys
+import json
+import gzip
+import time
+import argparse
+from datetime import datetime
+from datetime import timedelta
+from appdirs import user_log_dir
+
+
+_levels = ['debug', 'info', 'warn', 'error', 'critical']
+_operators = ['>=', '<=', '!=', '==', '>', '<', '=', '~']
+
+
+def parse_time(value):
+    now = datetime.now()
+    if value == 'now':
+        return time.time()
+    if value == 'today':
+        return now.replace(hour=0, minute=0, second=0,
+                           microsecond=0).timestamp()
+    if value == 'yesterday':
+        return (now.replace(hour=0, minute=0, second=0, microsecond=0) -
+                timedelta(days=1)).timestamp()
+    m = re.match(r'^-?(\d+)([smhd])$', value)
+    if m:
+        unit = {'s': 'seconds', 'm': 'minutes',
+                'h': 'hours', 'd': 'days'}[m.group(2)]
+        return (now - timedelta(**{unit: int(m.group(1))})).timestamp()
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M',
+                '%Y-%m-%d %H:%M', '%Y-%m-%d', '%H:%M'):
+        try:
+            t = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == '%H:%M':
+            t = now.replace(hour=t.hour, minute=t.minute,
+                            second=0, microsecond=0)
+        return t.timestamp()
+    raise ValueError("Unrecognized time {0}".format(value))
+
+
+class FieldCondition(object):
+    # key, or key<op>value with op one of >=, <=, !=, ==, >, <, = or ~.
+    # A bare key matches records which have the field at all, ~ matches
+    # a substring, and comparisons are numeric where both sides are.
+    def __init__(self, spec):
+        self.key, self.op, self.value = spec, None, None
+        for op in _operators:
+            idx = spec.find(op)
+            if idx > 0:
+                self.key = spec[:idx]
+                self.op = op
+                self.value = spec[idx + len(op):]
+                break
+
+    def __call__(self, fields):
+        if self.key not in fields.keys():
+            return False
+        if self.op is None:
+            return True
+        actual = fields[self.key]
+        if self.op == '~':
+            return self.value in str(actual)
+        try:
+            a, b = float(actual), float(self.value)
+        except (TypeError, ValueError):
+            a, b = str(actual), self.value
+        if self.op in ('=', '=='):
+            return a == b
+        if self.op == '!=':
+            return a != b
+        if self.op == '>':
+            return a > b
+        if self.op == '<':
+            return a < b
+        if self.op == '>=':
+            return a >= b
+        if self.op == '<=':
+            return a <= b
+
+
+class LogQuery(object):
+    def __init__(self, ns=None, level=None, since=None, until=None,
+                 conditions=None, text=None):
+        self.ns = ns
+        self.level = _levels.index(level) if level else 0
+        self.since = since
+        self.until = until
+        self.conditions = conditions or []
+        self.text = text
+        # Text which any matching line has to contain, checked before
+        # spending any time on parsing it.
+        self._tokens = ['"{0}":'.format(c.key).encode('utf-8')
+                        for c in self.conditions]
+        if ns:
+            self._tokens.append('"ns":"{0}'.format(ns).encode('utf-8'))
+
+    def _ns_match(self, ns):
+        return not self.ns or ns == self.ns or \
+            (ns or '').startswith(self.ns + '.')
+
+    def _level_match(self, lv):
+        return lv in _levels and _levels.index(lv) >= self.level
+
+    def wants_segment(self, index):
+        if self.since and index['t1'] is not None and \
+                index['t1'] < self.since:
+            return False
+        if self.until and index['t0'] is not None and \
+                index['t0'] > self.until:
+            return False
+        if not any(self._ns_match(x) for x in index['namespaces'].keys()):
+            return False
+        if not any(self._level_match(x) for x in index['levels'].keys()):
+            return False
+        fields = set(index['fields'])
+        return all(c.key in fields for c in self.conditions)
+
+    def matches(self, record):
+        t = record.get('t', None) or 0
+        if self.since and t < self.since:
+            return False
+        if self.until and t > self.until:
+            return False
+        if not self._ns_match(record.get('ns', None)):
+            return False
+        if not self._level_match(record.get('lv', None)):
+            return False
+        if self.text and self.text not in (record.get('msg', None) or ''):
+            return False
+        fields = record.get('f', {})
+        return all(c(fields) for c in self.conditions)
+
+    def files(self, path):
+        directory, base = os.path.split(path)
+        prefix = base + '.'
+        segments = sorted(os.path.join(directory, x)
+                          for x in os.listdir(directory or '.')
+                          if x.startswith(prefix) and not x.endswith('.idx'))
+        if os.path.exists(path):
+            segments.append(path)
+        return segments
+
+    def _lines(self, filepath):
+        if filepath.endswith('.gz'):
+            f = gzip.open(filepath, 'rb')
+        else:
+            f = open(filepath, 'rb')
+        with f:
+            for line in f:
+                yield line
+
+    def run(self, path):
+        for filepath in self.files(path):
+            index_path = filepath + '.idx'
+            if os.path.exists(index_path):
+                with open(index_path, 'r') as f:
+                    if not self.wants_segment(json.load(f)):
+                        continue
+            for line in self._lines(filepath):
+                if not all(x in line for x in self._tokens):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if self.matches(record):
+                    yield record
+
+
+def format_record(record):
+    t = datetime.fromtimestamp(record.get('t', None) or 0)
+    return "{0} [{1}#{2}] {3}".format(
+        t.strftime('%Y-%m-%d %H:%M:%S'), record.get('ns', None),
+        record.get('lv', None), record.get('msg', None)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the structured node log')
+    parser.add_argument('path', nargs='?',
+                        default=os.path.join(user_log_dir('iotnode'),
+                                             'eventlog.jsonl'))
+    parser.add_argument('--ns', help='Namespace, including its children')
+    parser.add_argument('--level', choices=_levels, help='Minimum level')
+    parser.add_argument('--since', type=parse_time,
+                        help='today, yesterday, 30m or 2h ago, 2020-01-31 10:00, ...')
+    parser.add_argument('--until', type=parse_time)
+    parser.add_argument('-w', '--where', action='append', default=[],
+                        help='Field condition, eg. duration>10 or eid=123')
+    parser.add_argument('-t', '--text', help='Substring of the message')
+    parser.add_argument('-n', '--limit', type=int, default=0)
+    parser.add_argument('-c', '--count', action='store_true')
+    parser.add_argument('--json', action='store_true', help='Print records as JSON')
+    args = parser.parse_args()
+
+    query = LogQuery(ns=args.ns, level=args.level,
+                     since=args.since, until=args.until,
+                     conditions=[FieldCondition(x) for x in args.where],
+                     text=args.text)
+    count = 0
+    for record in query.run(args.path):
+        count += 1
+        if not args.count:
+            if args.json:
+                print(json.dumps(record))
+            else:
+                print(format_record(record))
+        if args.limit and count >= args.limit:
+            break
+    if args.count:
+        print(count)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+
+
+import os
+import sys
+import gzip
+import json
+import time
+import queue
+import shutil
+import threading
+from datetime import datetime
+from twisted.logger import LogLevel
+from twisted.logger import formatEvent
+from twisted.logger import formatEventAsClassicLogText
+
+
+_STOP = object()
+
+# Keys which twisted and its legacy log bridge put into events, and which
+# are not fields of the event as far as a structured log is concerned.
+_event_internal_keys = ('format', 'message', 'isError', 'system', 'time',
+                        'why', 'failure')
+
+
+def structured_log_record(event):
+    # The event as a flat record : time, level, namespace, the formatted
+    # message and the fields it was logged with. Fields which are not
+    # plain values are stored as their string representation.
+    fields = {}
+    for key, value in event.items():
+        if key.startswith('log_') or key in _event_internal_keys:
+            continue
+        if value is not None and \
+                not isinstance(value, (str, int, float, bool)):
+            value = str(value)[:500]
+        fields[key] = value
+    level = event.get('log_level', None)
+    record = {
+        't': event.get('log_time', None),
+        'lv': level.name if level else None,
+        'ns': event.get('log_namespace', None),
+        'msg': formatEvent(event),
+        'f': fields,
+    }
+    failure = event.get('log_failure', None)
+    if failure is not None:
+        record['tb'] = failure.getTraceback()
+    return record
+
+
+def formatEventAsJSONLine(event):
+    return json.dumps(structured_log_record(event), default=str,
+                      separators=(',', ':')) + '\n'
+
+
+def index_log_segment(path, index_path):
+    # Summarizes a JSON lines log segment so that queries can tell whether
+    # they need to read it at all : its time span, and the namespaces,
+    # levels and field names which occur in it.
+    index = {'t0': None, 't1': None, 'lines': 0,
+             'namespaces': {}, 'levels': {}, 'fields': []}
+    fields = set()
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            index['lines'] += 1
+            t = record.get('t', None)
+            if t is not None:
+                if index['t0'] is None or t < index['t0']:
+                    index['t0'] = t
+                if index['t1'] is None or t > index['t1']:
+                    index['t1'] = t
+            ns = record.get('ns', None)
+            index['namespaces'][ns] = index['namespaces'].get(ns, 0) + 1
+            lv = record.get('lv', None)
+            index['levels'][lv] = index['levels'].get(lv, 0) + 1
+            fields.update(record.get('f', {}).keys())
+    index['fields'] = sorted(fields)
+    with open(index_path, 'w') as f:
+        json.dump(index, f)
+    return index
+
+
+class AsyncFileLogObserver(object):
+    # A log observer which writes to a file from a thread of its own. The
+    # observer itself only formats the event and queues the text, which is
+    # all the reactor thread pays for. The writer thread takes whatever has
+    # accumulated in one batch, writes it, and flushes and fsyncs the file
+    # at most once every sync_interval seconds.
+    #
+    # Once the file would grow past max_bytes it is closed and renamed with
+    # a timestamp, then compressed, and a fresh file started. Only the
+    # newest backups segments are kept.
+    #
+    # If the writer falls behind, debug events are shed once the queue is
+    # half full, and everything is dropped once it is full, rather than
+    # blocking the caller. The number of events lost is noted in the file
+    # when the writer catches up.
+    #
+    # If an indexer is provided, it is called with each segment just
+    # before it is compressed, and the path to write its index to.
+    #
+    # Once closed, whatever is still queued is written out, and anything
+    # logged after that is written to the file directly by the caller.
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backups=10,
+                 compress=True, queue_size=10000, sync_interval=5,
+                 batch_size=500, formatter=formatEventAsClassicLogText,
+                 indexer=None):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._compress = compress
+        self._sync_interval = sync_interval
+        self._batch_size = batch_size
+        self._formatter = formatter
+        self._indexer = indexer
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._shed_threshold = queue_size // 2
+        self._file = None
+        self._size = 0
+        self._shed = 0
+        self._dropped = 0
+        self._lost = 0
+        self._written = 0
+        self._rotations = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run,
+                                        name='logsink', daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self):
+        return self._path
+
+    def __call__(self, event):
+        if self._closed:
+            text = self._formatter(event)
+            if text:
+                self._write_now([text])
+            return
+        if self._queue.qsize() >= self._shed_threshold and \
+                event.get('log_level', None) is LogLevel.debug:
+            self._shed += 1
+            self._lost += 1
+            return
+        text = self._formatter(event)
+        if not text:
+            return
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            self._dropped += 1
+            self._lost += 1
+
+    def close(self, timeout=5):
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return
+        self._closed = True
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining.append(item)
+        self._write_now(remaining)
+
+    def _write_now(self, batch):
+        if not batch:
+            return
+        with self._lock:
+            try:
+                self._write(batch)
+                self._written += len(batch)
+                self._file.flush()
+            except (OSError, IOError) as e:
+                print("logsink : Unable to write to {0} : {1}"
+                      "".format(self._path, e), file=sys.stderr)
+                self._close()
+
+    @property
+    def statistics(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self._written,
+            'shed': self._shed,
+            'dropped': self._dropped,
+            'rotations': self._rotations,
+            'size': self._size,
+        }
+
+    def _run(self):
+        last_sync = time.monotonic()
+        stop = False
+        while not stop:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self._sync_interval)
+            except queue.Empty:
+                item = None
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            lost, self._lost = self._lost, 0
+            if lost:
+                batch.append(self._formatter({
+                    'log_time': time.time(), 'log_level': LogLevel.warn,
+                    'log_namespace': 'logsink', 'lost': lost,
+                    'log_format': "{lost} events were lost to backpressure",
+                }))
+            try:
+                if batch:
+                    self._write(batch)
+                    self._written += len(batch)
+                now = time.monotonic()
+                if stop or now - last_sync >= self._sync_interval:
+                    self._sync()
+                    last_sync = now
+            except (OSError, IOError) as e:
+                # There is nowhere else to log this to.
+                print("logsink : Unable to write to {0} : {1}"
+                      "".format(self._path, e), file=sys.stderr)
+                self._close()
+        self._close()
+
+    def _open(self):
+        if not self._file:
+            self._file = open(self._path, 'ab')
+            self._size = self._file.tell()
+        return self._file
+
+    def _sync(self):
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _close(self):
+        if self._file:
+            try:
+                self._sync()
+                self._file.close()
+            except (OSError, IOError):
+                pass
+            self._file = None
+
+    def _write(self, batch):
+        # Line by line, so that no segment goes past max_bytes by more than
+        # a single line which is bigger than that by itself. The file is
+        # buffered, so this doesn't cost a write for each.
+        f = self._open()
+        for text in batch:
+            data = text.encode('utf-8')
+            if self._size and self._size + len(data) > self._max_bytes:
+                self._rotate()
+                f = self._open()
+            f.write(data)
+            self._size += len(data)
+
+    def _segment_name(self):
+        # Fixed width, so that segments sort in the order they were written.
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        name = "{0}.{1}".format(self._path, stamp)
+        idx = 1
+        while os.path.exists(name) or os.path.exists(name + '.gz'):
+            name = "{0}.{1}-{2}".format(self._path, stamp, idx)
+            idx += 1
+        return name
+
+    def _rotate(self):
+        self._close()
+        segment = self._segment_name()
+        os.rename(self._path, segment)
+        self._size = 0
+        self._rotations += 1
+        final = segment + '.gz' if self._compress else segment
+        if self._indexer:
+            try:
+                self._indexer(segment, final + '.idx')
+            except Exception as e:
+                print("logsink : Unable to index {0} : {1}"
+                      "".format(segment, e), file=sys.stderr)
+        if self._compress:
+            with open(segment, 'rb') as src, \
+                    gzip.open(segment + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(segment)
+        self._prune()
+
+    def segments(self):
+        directory, base = os.path.split(self._path)
+        prefix = base + '.'
+        return sorted(os.path.join(directory, x)
+                      for x in os.listdir(directory or '.')
+                      if x.startswith(prefix) and not x.endswith('.idx'))
+
+    def _prune(self):
+        segments = self.segments()
+        for segment in segments[:max(len(segments) - self._backups, 0)]:
+            os.remove(segment)
+            if os.path.exists(segment + '.idx'):
+                os.remove(segment + '.idx')
@@ -1,4 +1,8 @@
 
+
+import heapq
+from datetime import datetime
+from kivy.clock import Clock
 from twisted.internet.defer import Deferred
 
 from .widgets.colors import color_set_alpha
@@ -13,6 +17,8 @@ class MarqueeInterrupted(Exception):
 
 
 class MarqueeBusy(Exception):
+    # No longer raised, marquee_play queues messages instead. Kept for
+    # those which still import it.
     def __init__(self, now_playing, collision_count):
         self.now_playing = now_playing
         self.collision_count = collision_count
@@ -22,17 +28,51 @@ class MarqueeBusy(Exception):
                "".format(self.now_playing)
 
 
+class MarqueeExpired(Exception):
+    def __init__(self, message):
+        self.message = message
+
+    def __repr__(self):
+        return "<MarqueeExpired {0}>".format(self.message)
+
+
+class MarqueeMessage(object):
+    def __init__(self, text, duration=None, loop=True,
+                 priority=0, deadline=None, tag=None):
+        self.text = text
+        self.duration = duration
+        self.loop = loop
+        self.priority = priority
+        self.deadline = deadline
+        self.tag = tag
+        self.strip = None
+        self.deferred = Deferred()
+
+    @property
+    def expired(self):
+        return self.deadline is not None and datetime.now() > self.deadline
+
+    def __repr__(self):
+        return "<MarqueeMessage {0} P{1}>".format(self.text, self.priority)
+
+
 class MarqueeGuiMixin(ConfigMixin, BaseGuiMixin):
+    # Messages for the marquee are queued, and played one after the other
+    # in order of priority and then of arrival. Each plays for its duration,
+    # scrolling through as many times as fits, or scrolls through just once
+    # if it has no duration or does not loop. A message which has not
+    # started by its deadline is dropped. The next message is rendered
+    # while the current one scrolls, and starts as soon as it is done.
     _gui_marquee_bgcolor = None
     _gui_marquee_color = None
 
     def __init__(self, *args, **kwargs):
         super(MarqueeGuiMixin, self).__init__(*args, **kwargs)
         self._gui_marquee = None
-        self._marquee_text = None
-        self._marquee_deferred = None
-        self._marquee_end_call = None
-        self._marquee_collision_count = 0
+        self._marquee_queue = []
+        self._marquee_sequence = 0
+        self._marquee_current = None
+        self._marquee_prerender_trigger = None
 
     def marquee_show(self):
         self.gui_footer_show()
@@ -40,38 +80,109 @@ class MarqueeGuiMixin(ConfigMixin, BaseGuiMixin):
     def marquee_hide(self):
         self.gui_footer_hide()
 
-    def marquee_play(self, text, duration=None, loop=True):
-        if self._marquee_deferred:
-            self._marquee_collision_count += 1
-            if self._marquee_collision_count > 30:
-                self.marquee_stop(forced=True)
-            raise MarqueeBusy(self._marquee_text,
-                              self._marquee_collision_count)
-        self._marquee_collision_count = 0
-        self.gui_marquee.text = text
-        self.marquee_show()
+    @property
+    def marquee_now_playing(self):
+        return self._marquee_current
 
-        if duration:
-            self._gui_marquee.start(loop=loop)
-            self._marquee_end_call = self.reactor.callLater(duration, self.marquee_stop)
+    @property
+    def marquee_queue(self):
+        return [x[2] for x in sorted(self._marquee_queue)]
+
+    def marquee_play(self, text, duration=None, loop=True,
+                     priority=0, deadline=None, tag=None):
+        # Returns a deferred which fires with True if the message was cut
+        # short by a forced marquee_stop or marquee_skip, or dropped from
+        # the queue by marquee_stop, and False otherwise. It errs back with
+        # MarqueeExpired if it never got to play.
+        message = MarqueeMessage(text, duration=duration, loop=loop,
+                                 priority=priority, deadline=deadline, tag=tag)
+        self._marquee_sequence += 1
+        heapq.heappush(self._marquee_queue,
+                       (-priority, self._marquee_sequence, message))
+        if not self._marquee_current:
+            self._marquee_next()
+        else:
+            self._marquee_prerender()
+        return message.deferred
+
+    def _marquee_pop(self):
+        while self._marquee_queue:
+            _, _, message = heapq.heappop(self._marquee_queue)
+            if not message.expired:
+                return message
+            self.log.info("Dropping expired marquee message {message}",
+                          message=message)
+            message.deferred.errback(MarqueeExpired(message))
+        return None
+
+    def _marquee_next(self):
+        message = self._marquee_pop()
+        self._marquee_current = message
+        if not message:
+            self.gui_marquee.stop()
+            self.marquee_hide()
+            return
+        if message.strip is None:
+            message.strip = self.gui_marquee.render(message.text)
+        self.gui_marquee.strip = message.strip
+        self.marquee_show()
+        self.gui_marquee.start(loop=False, callback=self._marquee_pass_done)
+        if message.duration:
+            self.scheduler.schedule('marquee.end', message.duration,
+                                    self._marquee_finish)
         else:
-            self._gui_marquee.start(callback=self.marquee_stop)
-        self._marquee_deferred = Deferred()
-        return self._marquee_deferred
+            self.scheduler.cancel('marquee.end')
+        self._marquee_prerender()
+
+    def _marquee_preempted(self):
+        if not self._marquee_queue:
+            return False
+        return self._marquee_queue[0][2].priority > \
+            self._marquee_current.priority
+
+    def _marquee_pass_done(self):
+        # A looping message scrolls through again until its duration is
+        # up, unless a message of higher priority is waiting.
+        message = self._marquee_current
+        if message.loop and message.duration and \
+                not self._marquee_preempted():
+            self.gui_marquee.start(loop=False,
+                                   callback=self._marquee_pass_done)
+            return
+        self._marquee_finish()
+
+    def _marquee_finish(self, forced=False):
+        self.scheduler.cancel('marquee.end')
+        message = self._marquee_current
+        self._marquee_next()
+        if message:
+            message.deferred.callback(forced)
+
+    def _marquee_prerender(self):
+        if not self._marquee_prerender_trigger:
+            self._marquee_prerender_trigger = \
+                Clock.create_trigger(self._marquee_prerender_next)
+        self._marquee_prerender_trigger()
+
+    def _marquee_prerender_next(self, *_):
+        if not self._marquee_queue:
+            return
+        message = self._marquee_queue[0][2]
+        if message.strip is None:
+            message.strip = self.gui_marquee.render(message.text)
+
+    def marquee_skip(self, forced=True):
+        # Ends the current message and moves on to the next one, if any.
+        self._marquee_finish(forced=forced)
 
     def marquee_stop(self, forced=False):
-        self._gui_marquee.stop()
-        self.log.info("End Offset by {0} collisions."
-                      "".format(self._marquee_collision_count))
-        self._marquee_collision_count = 0
-        self.marquee_hide()
-
-        if self._marquee_end_call and self._marquee_end_call.active():
-            self._marquee_end_call.cancel()
-
-        if self._marquee_deferred:
-            self._marquee_deferred.callback(forced)
-            self._marquee_deferred = None
+        # Ends the current message and drops all those waiting, and hides
+        # the marquee. Every one of them is taken to have been cut short.
+        queued = [x[2] for x in self._marquee_queue]
+        self._marquee_queue = []
+        self._marquee_finish(forced=forced)
+        for message in queued:
+            message.deferred.callback(True)
 
     @property
     def gui_marquee(self):
@@ -0,0 +1,235 @@
+
+
+import os
+from twisted.internet.defer import succeed
+from twisted.internet.threads import deferToThread
+
+from sqlalchemy import Column
+from sqlalchemy import Integer
+from sqlalchemy import Float
+from sqlalchemy import Text
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import NoResultFound
+
+from pymediainfo import MediaInfo
+
+from .lazylog import LazyLogger
+from .basemixin import BaseMixin
+
+_mediainfo_available = MediaInfo.can_parse()
+
+Base = declarative_base()
+metadata = Base.metadata
+
+
+class MediaMetadataModel(Base):
+    __tablename__ = 'mediainfo'
+
+    id = Column(Integer, primary_key=True)
+    filename = Column(Text, unique=True, index=True)
+    size = Column(Integer)
+    inode = Column(Integer)
+    rotation = Column(Integer)
+    duration = Column(Float)
+    codec = Column(Text)
+    width = Column(Integer)
+    height = Column(Integer)
+    bitrate = Column(Integer)
+
+    def __repr__(self):
+        return "{0} {1}x{2} {3} {4}s {5}deg {6}bps".format(
+            self.filename, self.width, self.height, self.codec,
+            self.duration, self.rotation, self.bitrate
+        )
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_media_metadata(filepath):
+    # Blocking. Run this in a thread.
+    stat = os.stat(filepath)
+    rv = {
+        'size': stat.st_size,
+        'inode': stat.st_ino,
+        'rotation': 0,
+    }
+    if not _mediainfo_available:
+        return rv
+    mi = MediaInfo.parse(filepath)
+    general = mi.general_tracks[0] if mi.general_tracks else None
+    if general is not None:
+        if general.duration:
+            rv['duration'] = float(general.duration) / 1000
+        rv['bitrate'] = _int(general.overall_bit_rate)
+    track = None
+    if mi.video_tracks:
+        track = mi.video_tracks[0]
+    elif mi.image_tracks:
+        track = mi.image_tracks[0]
+    if track is not None:
+        rv['rotation'] = _int(getattr(track, 'rotation', None)) or 0
+        rv['codec'] = track.format
+        rv['width'] = _int(track.width)
+        rv['height'] = _int(track.height)
+        if track.duration and 'duration' not in rv:
+            rv['duration'] = float(track.duration) / 1000
+    return rv
+
+
+class MediaMetadataStore(object):
+    # Metadata of media files in the cache, parsed once per file with
+    # libmediainfo in a worker thread and kept in a database, so nothing
+    # which needs it at play time has to parse the file again. Entries are
+    # keyed by filename and are stale once the file's size or inode no
+    # longer match. Not the mtime, which the resource cache touches every
+    # time a file is used. Downloads are renamed into place, so a file
+    # downloaded again has a new inode.
+    def __init__(self, node):
+        self._node = node
+        self._log = None
+        self._db = None
+        self._db_engine = None
+        self._cache = {}
+        self._pending = {}
+
+    @property
+    def log(self):
+        if not self._log:
+            self._log = LazyLogger(namespace="mediainfo", source=self)
+        return self._log
+
+    @staticmethod
+    def _current(robj, filepath):
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return False
+        return robj.size == stat.st_size and robj.inode == stat.st_ino
+
+    def get(self, filepath):
+        # Returns the metadata for filepath if it is known and current,
+        # otherwise None. Does not parse anything.
+        filename = os.path.basename(filepath)
+        robj = self._cache.get(filename, None)
+        if robj is None:
+            session = self.db()
+            try:
+                robj = session.query(MediaMetadataModel).filter_by(
+                    filename=filename).one()
+            except NoResultFound:
+                return None
+            finally:
+                session.close()
+            self._cache[filename] = robj
+        if not self._current(robj, filepath):
+            return None
+        return robj
+
+    def get_now(self, filepath):
+        # For when the metadata is needed right away. Falls back to parsing
+        # the file in the calling thread, which should be a rare occurrence.
+        robj = self.get(filepath)
+        if robj is None:
+            self.log.warn("Parsing media metadata for {filename} synchronously",
+                          filename=os.path.basename(filepath))
+            robj = self._commit(filepath, parse_media_metadata(filepath))
+        return robj
+
+    def update(self, filepath):
+        # Ensure the metadata for filepath is current, parsing it in a
+        # worker thread if needed. Returns a deferred which fires with the
+        # metadata.
+        robj = self.get(filepath)
+        if robj is not None:
+            return succeed(robj)
+        if filepath in self._pending.keys():
+            return self._pending[filepath]
+        d = deferToThread(parse_media_metadata, filepath)
+        d.addCallback(lambda info: self._commit(filepath, info))
+
+        def _failed(failure):
+            self.log.failure("Unable to parse media metadata for {filename}",
+                             failure=failure,
+                             filename=os.path.basename(filepath))
+
+        def _done(result):
+            self._pending.pop(filepath, None)
+            return result
+        d.addErrback(_failed)
+        d.addBoth(_done)
+        self._pending[filepath] = d
+        return d
+
+    def _commit(self, filepath, info):
+        filename = os.path.basename(filepath)
+        session = self.db()
+        try:
+            try:
+                robj = session.query(MediaMetadataModel).filter_by(
+                    filename=filename).one()
+            except NoResultFound:
+                robj = MediaMetadataModel()
+                robj.filename = filename
+                session.add(robj)
+            for key in ('rotation', 'duration', 'codec',
+                        'width', 'height', 'bitrate'):
+                setattr(robj, key, info.get(key, None))
+            robj.size = info['size']
+            robj.inode = info['inode']
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        self._cache[filename] = robj
+        return robj
+
+    def remove(self, filename):
+        self._cache.pop(filename, None)
+        session = self.db()
+        try:
+            session.query(MediaMetadataModel).filter_by(
+                filename=filename).delete()
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db_engine = create_engine(self.db_url)
+            metadata.create_all(self._db_engine)
+            self._db = sessionmaker(expire_on_commit=False)
+            self._db.configure(bind=self._db_engine)
+        return self._db
+
+    @property
+    def db_url(self):
+        return 'sqlite:///{0}'.format(os.path.join(self.db_dir, 'mediainfo.db'))
+
+    @property
+    def db_dir(self):
+        return self._node.db_dir
+
+
+class MediaMetadataMixin(BaseMixin):
+    def __init__(self, *args, **kwargs):
+        self._media_metadata = None
+        super(MediaMetadataMixin, self).__init__(*args, **kwargs)
+
+    @property
+    def media_metadata(self):
+        if not self._media_metadata:
+            self._media_metadata = MediaMetadataStore(self)
+        return self._media_metadata
@@ -1,16 +1,20 @@
 
 
 import os
+from kivy.clock import Clock
 from kivy.uix.video import Video
 from twisted.internet.defer import Deferred
 
 from .widgets.image import StandardImage
+from .widgets.image import image_pool
 from .widgets.colors import ColorBoxLayout
 from .widgets.pdfplayer import PDFPlayer
+from .widgets.video import VideoPlaylist
 
 from .log import NodeLoggingMixin
 from .background import OverlayWindowGuiMixin
 from .externalplayer import ExternalMediaPlayer
+from .externalplayer import ExternalPlayerPool
 from .externalplayer import BackdropManager
 
 
@@ -34,43 +38,90 @@ class MediaPlayerMixin(NodeLoggingMixin):
         self._mediaplayer_now_playing = None
         self._end_call = None
         self._mediaplayer_collision_count = 0
+        self._media_trace = None
 
-    def media_play(self, content, duration=None, loop=False, interval=None):
+    def media_play(self, content, duration=None, loop=False, interval=None,
+                   trace=None):
         # Play the media file at filepath. If loop is true, restart the media
         # when it's done. You probably would want to provide a duration with
-        # an image or with a looping video, not otherwise.
-        if self._mediaplayer_now_playing:
+        # an image or with a looping video, not otherwise. If a trace is
+        # given, it's marked when the media is ready and on its first frame.
+        if hasattr(content, 'filepath'):
+            content = content.filepath
+        if self._mediaplayer_now_playing or \
+                not self._media_player_available(content):
+            self.metrics.counter(
+                'node_media_collisions_total',
+                'Media play requests made while the player was busy'
+            ).inc()
             self._mediaplayer_collision_count += 1
             if self._mediaplayer_collision_count > 30:
                 self.media_stop(forced=True)
             raise MediaPlayerBusy(self._mediaplayer_now_playing,
                                   self._mediaplayer_collision_count)
         self._mediaplayer_collision_count = 0
-        if hasattr(content, 'filepath'):
-            content = content.filepath
         if not os.path.exists(content):
             self.log.warn("Could not find media to play at {filepath}",
                           filepath=content)
+            if trace:
+                trace.finish()
             return
         if duration:
             self._end_call = self.reactor.callLater(duration, self.media_stop)
         self._mediaplayer_now_playing = os.path.basename(content)
-        self.gui_bg_pause()
+        self._media_trace = trace
+        self.gui_bg_pause(duration=self._media_duration(content, duration))
         if os.path.splitext(content)[1] in self._media_extentions_image:
             self.log.debug("Showing image {filename}",
                            filename=os.path.basename(content))
-            self._media_play_image(content)
+            ready = self._media_play_image(content)
         elif os.path.splitext(content)[1] in ['.pdf']:
             self.log.debug("Showing pdf {filename}",
                            filename=os.path.basename(content))
-            self._media_play_pdf(content, interval=interval)
+            ready = self._media_play_pdf(content, interval=interval)
         else:
             self.log.debug("Starting video {filename}",
                            filename=os.path.basename(content))
-            self._media_play_video(content, loop)
+            ready = self._media_play_video(content, loop)
+        self._media_trace_ready(ready)
         self._media_player_deferred = Deferred()
         return self._media_player_deferred
 
+    def media_prepare(self, content):
+        # Get ready to play content shortly. Players which have nothing to
+        # prepare ignore this.
+        pass
+
+    def _media_trace_mark(self, stage):
+        if self._media_trace:
+            self._media_trace.mark(stage)
+
+    def _media_trace_ready(self, ready=None):
+        # Players which only start on their own time, such as external
+        # players, return a deferred from _media_play_* which fires once
+        # they are running. The others are ready once they return.
+        if ready is None:
+            self._media_trace_mark('ready')
+            return
+        trace = self._media_trace
+
+        def _ready(_):
+            if trace and trace is self._media_trace:
+                trace.mark('ready')
+        ready.addCallback(_ready)
+
+    def _media_duration(self, filepath, duration=None):
+        # How long the media is expected to play for, if it's known.
+        if duration:
+            return duration
+        info = self.media_metadata.get(filepath)
+        if info is None:
+            # Cached before its metadata was, or replaced since. Have it
+            # parsed in the background for the next time.
+            self.media_metadata.update(filepath)
+            return None
+        return info.duration or None
+
     def _media_play_image(self, filepath):
         raise NotImplementedError
 
@@ -80,13 +131,23 @@ class MediaPlayerMixin(NodeLoggingMixin):
     def _media_play_video(self, filepath, loop=False):
         raise NotImplementedError
 
+    def _media_player_available(self, filepath):
+        # Whether the player filepath needs is free to take it.
+        return True
+
+    def _media_release(self):
+        # Called once nothing has been playing for a while. Release
+        # whatever is being held on to for back to back playback.
+        pass
+
     def media_stop(self, forced=False):
-        self.log.info("End Offset by {0} collisions."
-                      "".format(self._mediaplayer_collision_count))
+        self.log.info("End Offset by {collision_count} collisions.",
+                      collision_count=self._mediaplayer_collision_count)
         self._mediaplayer_collision_count = 0
 
         def _resume_bg():
             if not self._mediaplayer_now_playing:
+                self._media_release()
                 self.gui_bg_resume()
                 self.gui_mediaview.make_transparent()
         self.reactor.callLater(1.5, _resume_bg)
@@ -97,6 +158,10 @@ class MediaPlayerMixin(NodeLoggingMixin):
         if self._mediaplayer_now_playing:
             self._mediaplayer_now_playing = None
 
+        if self._media_trace:
+            self._media_trace.finish()
+            self._media_trace = None
+
         if self._media_player_deferred:
             self._media_player_deferred.callback(forced)
             self._media_player_deferred = None
@@ -110,29 +175,130 @@ class MediaPlayerGuiMixin(OverlayWindowGuiMixin):
     def __init__(self, *args, **kwargs):
         super(MediaPlayerGuiMixin, self).__init__(*args, **kwargs)
         self._media_player_external = None
-        self._media_player_backdrop = BackdropManager()
+        self._media_player_pool = None
+        self._media_player_backdrop = BackdropManager(self)
         self._media_playing = None
+        self._media_video_playlist = None
         self._gui_mediaview = None
 
+    @property
+    def media_player_pool(self):
+        if not self._media_player_pool:
+            self._media_player_pool = ExternalPlayerPool(self, dbus_names=[
+                'org.mpris.MediaPlayer2.omxplayer2',
+                'org.mpris.MediaPlayer2.omxplayer3',
+            ])
+        return self._media_player_pool
+
+    @property
+    def media_video_playlist(self):
+        if not self._media_video_playlist:
+            self._media_video_playlist = VideoPlaylist()
+        return self._media_video_playlist
+
+    def media_prepare(self, content):
+        if not self.config.video_prewarm:
+            return
+        if hasattr(content, 'filepath'):
+            content = content.filepath
+        if not os.path.exists(content):
+            return
+        if os.path.splitext(content)[1] in \
+                self._media_extentions_image + ['.pdf']:
+            return
+        self.log.debug("Preparing video {filename}",
+                       filename=os.path.basename(content))
+        if not self.config.video_external_player:
+            if self.config.video_native_playlist:
+                self.media_video_playlist.prepare(content)
+            return
+        geometry = self.geometry_transform(
+            self.gui_mediaview.x, self.gui_mediaview.y,
+            self.gui_mediaview.width, self.gui_mediaview.height
+        )
+        self.media_player_pool.prepare(
+            content, geometry, layer=self.config.video_dispmanx_layer,
+            orientation=self.config.orientation
+        )
+
+    def _media_trace_frame(self, widget=None):
+        # Mark the first frame of the traced media on the frame after
+        # widget has a texture to draw.
+        trace = self._media_trace
+        if not trace:
+            return
+
+        def _drawn(*_):
+            if widget is not None:
+                widget.unbind(texture=_drawn)
+            Clock.schedule_once(lambda _: trace.mark('frame'), 0)
+
+        if widget is None or widget.texture:
+            _drawn()
+        else:
+            widget.bind(texture=_drawn)
+
+    def _media_release(self):
+        if self._media_video_playlist:
+            self._media_video_playlist.stop()
+            if self._media_video_playlist.parent:
+                self._media_video_playlist.parent.remove_widget(
+                    self._media_video_playlist
+                )
+
     def _media_play_image(self, filepath):
-        self._media_playing = StandardImage(source=filepath,
-                                            allow_stretch=True,
-                                            keep_ratio=True)
+        self._media_release()
+        self._media_playing = image_pool.acquire(source=filepath,
+                                                 allow_stretch=True,
+                                                 keep_ratio=True)
         self.gui_mediaview.add_widget(self._media_playing)
+        self._media_trace_frame(self._media_playing)
 
     def _media_play_pdf(self, filepath, interval=None):
+        self._media_release()
         self._media_playing = PDFPlayer(source=filepath,
-                                        temp_dir=self.temp_dir)
+                                        temp_dir=self.temp_dir,
+                                        scheduler=self.scheduler)
         if interval:
             self._media_playing.interval = interval
         self.gui_mediaview.add_widget(self._media_playing)
+        self._media_trace_frame()
+
+    def _media_player_available(self, filepath):
+        # The external player the last item played in may still be on its
+        # way out, holding the D-Bus name the next one would need.
+        if not self.config.video_external_player or \
+                os.path.splitext(filepath)[1] in \
+                self._media_extentions_image + ['.pdf']:
+            return True
+        return self.media_player_pool.available(filepath)
 
     def _media_play_video(self, *args, **kwargs):
         if self.config.video_external_player:
-            self._media_play_video_omxplayer(*args, **kwargs)
+            return self._media_play_video_omxplayer(*args, **kwargs)
+        elif self.config.video_native_playlist:
+            self._media_play_video_playlist(*args, **kwargs)
         else:
             self._media_play_video_native(*args, **kwargs)
 
+    def _media_play_video_playlist(self, filepath, loop=False):
+        playlist = self.media_video_playlist
+        self._media_playing = playlist
+        self.gui_mediaview.make_opaque()
+        if not playlist.parent:
+            self.gui_mediaview.add_widget(playlist)
+
+        def _when_done():
+            if self._media_playing is playlist:
+                self.media_stop()
+        trace = self._media_trace
+
+        def _when_showing():
+            if trace:
+                Clock.schedule_once(lambda _: trace.mark('frame'), 0)
+        playlist.play(filepath, loop=loop, when_done=_when_done,
+                      when_showing=_when_showing)
+
     def _media_play_video_native(self, filepath, loop=False):
         if loop:
             eos = 'loop'
@@ -146,6 +312,7 @@ class MediaPlayerGuiMixin(OverlayWindowGuiMixin):
         def _while_playing(*_):
             self._media_playing.opacity = 1
         self._media_playing.bind(texture=_while_playing)
+        self._media_trace_frame(self._media_playing)
 
         def _when_done(*_):
             self.media_stop()
@@ -161,27 +328,38 @@ class MediaPlayerGuiMixin(OverlayWindowGuiMixin):
         self._media_playing = ExternalMediaPlayer(
             filepath, geometry,
             self.media_stop, self, layer=None, loop=False,
-            dbus_name='org.mpris.MediaPlayer2.omxplayer2',
-            orientation=self.config.orientation
+            orientation=self.config.orientation,
+            pool=self.media_player_pool
         )
+        return self._media_playing.ready
 
     def media_stop(self, forced=False):
-        print("Stopping Media : {0}".format(self._media_playing))
+        self.log.debug("Stopping Media : {media}", media=self._media_playing)
         if isinstance(self._media_playing, Video):
             self._media_playing.unload()
         elif isinstance(self._media_playing, ExternalMediaPlayer):
             self._media_playing.force_stop()
             self._media_playing = None
         elif isinstance(self._media_playing, StandardImage):
-            pass
+            image_pool.release(self._media_playing)
+            self._media_playing = None
         elif isinstance(self._media_playing, PDFPlayer):
             self._media_playing.stop()
-        self.gui_mediaview.clear_widgets()
+        elif isinstance(self._media_playing, VideoPlaylist):
+            # Left as it is, showing the last frame, in case another video
+            # follows. It's released along with the background resume.
+            self._media_playing.hold()
+            self._media_playing = None
+        for child in list(self.gui_mediaview.children):
+            if child is not self._media_video_playlist:
+                self.gui_mediaview.remove_widget(child)
         MediaPlayerMixin.media_stop(self, forced=forced)
 
     def stop(self):
         if self._media_player_backdrop:
             self._media_player_backdrop.close()
+        if self._media_player_pool:
+            self._media_player_pool.clear()
         super(MediaPlayerGuiMixin, self).stop()
 
     @property
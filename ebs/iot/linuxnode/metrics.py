@@ -0,0 +1,246 @@
+
+
+import math
+from bisect import bisect_left
+from collections import OrderedDict
+from kivy.clock import Clock
+from twisted.web.server import Site
+from twisted.web.resource import Resource
+from twisted.internet.error import CannotListenError
+
+from .log import NodeLoggingMixin
+from .basemixin import BaseGuiMixin
+
+
+class Counter(object):
+    __slots__ = ('value',)
+    kind = 'counter'
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self, name):
+        yield name, None, self.value
+
+
+class Gauge(object):
+    __slots__ = ('value', 'function')
+    kind = 'gauge'
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set_function(self, function):
+        # Read the value from function when the metrics are collected,
+        # for things which are cheap to ask for but not to keep updated.
+        self.function = function
+
+    def samples(self, name):
+        if self.function:
+            yield name, None, self.function()
+        else:
+            yield name, None, self.value
+
+
+class Histogram(object):
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+    kind = 'histogram'
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                       1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(sorted(buckets or self.default_buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield name + '_bucket', ('le', _format_value(bound)), cumulative
+        yield name + '_bucket', ('le', '+Inf'), self.count
+        yield name + '_sum', None, self.sum
+        yield name + '_count', None, self.count
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if value == int(value):
+            return str(int(value))
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricFamily(object):
+    # A metric and its children, one per combination of label values.
+    # Without labels, the family can be used as the metric itself.
+    # Otherwise, hot paths should hold on to the child returned by
+    # labels() rather than look it up each time.
+    def __init__(self, metric_class, name, description,
+                 labelnames=(), **kwargs):
+        self.metric_class = metric_class
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._kwargs = kwargs
+        self._children = OrderedDict()
+        if not self.labelnames:
+            self._metric = self.labels()
+
+    @property
+    def kind(self):
+        return self.metric_class.kind
+
+    def labels(self, *values):
+        key = tuple(str(x) for x in values)
+        child = self._children.get(key, None)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError("{0} takes labels {1}"
+                                 "".format(self.name, self.labelnames))
+            child = self.metric_class(**self._kwargs)
+            self._children[key] = child
+        return child
+
+    def __getattr__(self, item):
+        if item.startswith('_') or '_metric' not in self.__dict__:
+            raise AttributeError(item)
+        return getattr(self._metric, item)
+
+    def render(self):
+        lines = ["# HELP {0} {1}".format(self.name, _escape(self.description)),
+                 "# TYPE {0} {1}".format(self.name, self.kind)]
+        for key, child in self._children.items():
+            labels = list(zip(self.labelnames, key))
+            for name, extra, value in child.samples(self.name):
+                pairs = labels + [extra] if extra else labels
+                if pairs:
+                    name = "{0}{{{1}}}".format(name, ','.join(
+                        '{0}="{1}"'.format(k, _escape(v)) for k, v in pairs))
+                lines.append("{0} {1}".format(name, _format_value(value)))
+        return '\n'.join(lines)
+
+
+class MetricsRegistry(object):
+    # Counters, gauges and histograms kept in process, rendered in the
+    # Prometheus text format on request. Updating a metric is a single
+    # attribute update, with no locking : everything which updates them
+    # runs in the reactor thread.
+    def __init__(self):
+        self._families = OrderedDict()
+
+    def _register(self, metric_class, name, description, labels, **kwargs):
+        family = self._families.get(name, None)
+        if family is None:
+            family = MetricFamily(metric_class, name, description,
+                                  labels, **kwargs)
+            self._families[name] = family
+        elif family.metric_class is not metric_class:
+            raise ValueError("{0} is already registered as a {1}"
+                             "".format(name, family.kind))
+        return family
+
+    def counter(self, name, description, labels=()):
+        return self._register(Counter, name, description, labels)
+
+    def gauge(self, name, description, labels=()):
+        return self._register(Gauge, name, description, labels)
+
+    def histogram(self, name, description, labels=(), buckets=None):
+        return self._register(Histogram, name, description, labels,
+                              buckets=buckets)
+
+    def get(self, name):
+        return self._families[name]
+
+    def render(self):
+        return '\n'.join(x.render() for x in self._families.values()) + '\n'
+
+
+class MetricsResource(Resource):
+    isLeaf = True
+
+    def __init__(self, registry):
+        Resource.__init__(self)
+        self._registry = registry
+
+    def render_GET(self, request):
+        request.setHeader(b'Content-Type',
+                          b'text/plain; version=0.0.4; charset=utf-8')
+        return self._registry.render().encode('utf-8')
+
+
+class MetricsMixin(NodeLoggingMixin):
+    def __init__(self, *args, **kwargs):
+        self._metrics = None
+        self._metrics_port = None
+        super(MetricsMixin, self).__init__(*args, **kwargs)
+
+    @property
+    def metrics(self):
+        if not self._metrics:
+            self._metrics = MetricsRegistry()
+        return self._metrics
+
+    def metrics_listen(self):
+        port = self.config.metrics_port
+        if not port:
+            return
+        try:
+            self._metrics_port = self.reactor.listenTCP(
+                port, Site(MetricsResource(self.metrics)),
+                interface=self.config.metrics_interface
+            )
+        except CannotListenError as e:
+            self.log.warn("Unable to serve metrics on port {port} : {e}",
+                          port=port, e=e)
+            return
+        self.log.info("Serving metrics at http://{interface}:{port}/metrics",
+                      interface=self.config.metrics_interface, port=port)
+
+    def start(self):
+        super(MetricsMixin, self).start()
+        self.metrics_listen()
+
+    def stop(self):
+        if self._metrics_port:
+            self._metrics_port.stopListening()
+            self._metrics_port = None
+        super(MetricsMixin, self).stop()
+
+
+class MetricsGuiMixin(MetricsMixin, BaseGuiMixin):
+    _frame_buckets = (1 / 120, 1 / 60, 1 / 40, 1 / 30, 1 / 20,
+                      0.1, 0.25, 0.5, 1)
+
+    def gui_setup(self):
+        super(MetricsGuiMixin, self).gui_setup()
+        frames = self.metrics.histogram(
+            'node_frame_seconds', 'Time between rendered frames',
+            buckets=self._frame_buckets
+        )
+        Clock.schedule_interval(lambda dt: frames.observe(dt), 0)
@@ -1,9 +1,10 @@
 
 import os
-from twisted import logger
+import time
 from twisted.internet.defer import succeed
 from twisted.internet.task import LoopingCall
 
+from ..lazylog import LazyLogger
 from ..common import HTTPError
 from .primitives import ApiPersistentActionQueue
 
@@ -35,7 +36,7 @@ class ModularApiEngineBase(object):
     @property
     def log(self):
         if not self._log:
-            self._log = logger.Logger(namespace="modapi.{0}".format(self._prefix), source=self)
+            self._log = LazyLogger(namespace="modapi.{0}".format(self._prefix), source=self)
         return self._log
 
     """ API Connection Status Primitives """
@@ -81,7 +82,8 @@ class ModularApiEngineBase(object):
         return self._api_reconnect_task
 
     def api_engine_activate(self):
-        self.log.debug("Attempting to activate {0} API engine.".format(self._prefix))
+        self.log.debug("Attempting to activate {prefix} API engine.",
+                       prefix=self._prefix)
 
         d = getattr(self, self._api_probe)()
 
@@ -91,12 +93,14 @@ class ModularApiEngineBase(object):
             self._api_engine_active = True
             if self.api_reconnect_task.running:
                 self.api_reconnect_task.stop()
-            self.log.info("Triggering process of {0} API persistent queue".format(self._prefix))
+            self.log.info("Triggering process of {prefix} API persistent queue",
+                          prefix=self._prefix)
             self._api_queue.process()
             return
 
         def _enter_reconnection_cycle(failure):
-            self.log.error("Can't connect to {0} API endpoint".format(self._prefix))
+            self.log.error("Can't connect to {prefix} API endpoint",
+                           prefix=self._prefix)
             self.log.failure("Connection Failure : ", failure=failure)
             self.api_endpoint_connected = False
             if not self.api_reconnect_task.running:
@@ -124,8 +128,8 @@ class ModularApiEngineBase(object):
     def api_engine_reconnect(self):
         if self._api_engine_active:
             self.api_endpoint_connected = False
-            self.log.info("Lost connection to {0} API server. Attempting to reconnect."
-                          "".format(self._prefix))
+            self.log.info("Lost connection to {prefix} API server. "
+                          "Attempting to reconnect.", prefix=self._prefix)
         self._api_engine_active = False
         if not self.api_reconnect_task.running:
             self._api_stop_all_tasks(True)
@@ -279,6 +283,7 @@ class ModularHttpApiEngine(ModularApiEngineBase):
                 'params': params,
             }
             request_structure = {k: v for k, v in request_structure.items() if v}
+            started = time.time()
             if method == 'POST':
                 r = self.http_post(url, timeout=120,
                                    headers=self._api_headers,
@@ -293,6 +298,15 @@ class ModularHttpApiEngine(ModularApiEngineBase):
                     )
             else:
                 raise ValueError("Method {} not recognized".format(method))
+
+            def _observe_latency(maybe_failure):
+                self._actual.metrics.histogram(
+                    'node_api_request_seconds',
+                    'Latency of API requests by engine',
+                    labels=('engine',)
+                ).labels(self._prefix).observe(time.time() - started)
+                return maybe_failure
+            r.addBoth(_observe_latency)
             return r
         d.addCallback(_get_response)
 
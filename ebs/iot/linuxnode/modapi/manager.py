@@ -21,14 +21,14 @@ class ModularApiEngineManagerMixin(HttpClientMixin, NodeLoggingMixin):
         self._api_primary = None
 
     def modapi_install(self, engine, primary=False):
-        self.log.info("Installing Modular API Engine {0}".format(engine))
+        self.log.info("Installing Modular API Engine {engine}", engine=engine)
         self._api_engines.append(engine)
         if primary:
             self._api_primary = engine
 
     def modapi_activate(self):
         for engine in self._api_engines:
-            self.log.info("Starting Modular API Engine {0}".format(engine))
+            self.log.info("Starting Modular API Engine {engine}", engine=engine)
             engine.start()
 
     def modapi_engine(self, name):
@@ -38,7 +38,7 @@ class ModularApiEngineManagerMixin(HttpClientMixin, NodeLoggingMixin):
 
     def modapi_stop(self):
         for engine in self._api_engines:
-            self.log.info("Stopping Modular API Engine {0}".format(engine))
+            self.log.info("Stopping Modular API Engine {engine}", engine=engine)
             engine.stop()
 
     def start(self):
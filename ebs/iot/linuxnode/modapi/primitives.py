@@ -33,7 +33,8 @@ class ApiPersistentActionQueue(object):
                 # TODO Remove this broad exception
                 self._api_queue = None
                 shutil.rmtree(self._api_queue_dir, ignore_errors=True)
-                self._api_engine.log.warn("Unhandled error in api queue get. \n {} ".format(e))
+                self._api_engine.log.warn("Unhandled error in api queue get. "
+                                          "\n {error} ", error=e)
                 break
         return succeed(True)
 
@@ -3,8 +3,6 @@
 import netifaces
 import uuid
 
-from twisted.internet import task
-
 from .widgets.labels import ColorLabel
 from .widgets.colors import color_set_alpha
 
@@ -65,7 +63,6 @@ class NodeIDGuiMixin(NodeIDMixin, BaseGuiMixin):
     def __init__(self, *args, **kwargs):
         super(NodeIDGuiMixin, self).__init__(*args, **kwargs)
         self._gui_id_tag = None
-        self._gui_id_task = None
 
     @property
     def gui_id_tag(self):
@@ -84,7 +81,8 @@ class NodeIDGuiMixin(NodeIDMixin, BaseGuiMixin):
         if not self.gui_id_tag.parent:
             self.gui_status_stack.add_widget(self.gui_id_tag)
         if duration:
-            self.reactor.callLater(duration, self.gui_id_hide)
+            self.scheduler.schedule('nodeid.hide', duration,
+                                    self.gui_id_hide, slack=1)
 
     def gui_id_hide(self):
         if self.gui_id_tag.parent:
@@ -95,10 +93,10 @@ class NodeIDGuiMixin(NodeIDMixin, BaseGuiMixin):
         if not self.config.node_id_display:
             return
         if self.config.node_id_display_frequency:
-            self._gui_id_task = task.LoopingCall(
-                self.gui_id_show,
-                duration=self.config.node_id_display_duration
-            )
-            self._gui_id_task.start(self.config.node_id_display_frequency)
+            def _show():
+                self.gui_id_show(duration=self.config.node_id_display_duration)
+            _show()
+            self.scheduler.every('nodeid', self.config.node_id_display_frequency,
+                                 _show, slack=1)
         else:
             self.gui_id_show(duration=self.config.node_id_display_duration)
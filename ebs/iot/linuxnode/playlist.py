@@ -0,0 +1,236 @@
+
+
+from math import gcd
+from functools import reduce
+from datetime import datetime
+from datetime import timedelta
+
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+
+class Daypart(object):
+    def __init__(self, name, start, end):
+        self._name = name
+        self._start = start
+        self._end = end
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def end(self):
+        return self._end
+
+    def contains(self, t):
+        if self._start <= self._end:
+            return self._start <= t < self._end
+        # Dayparts spanning midnight
+        return t >= self._start or t < self._end
+
+    def __repr__(self):
+        return "<Daypart {0} {1:%H:%M}-{2:%H:%M}>".format(
+            self._name, self._start, self._end
+        )
+
+
+def parse_dayparts(spec):
+    # Parse daypart definitions of the form
+    #   morning=06:00-12:00, evening=17:00-23:00
+    rv = []
+    if not spec:
+        return rv
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, times = part.split('=')
+        start, end = times.split('-')
+        rv.append(Daypart(
+            name.strip(),
+            datetime.strptime(start.strip(), '%H:%M').time(),
+            datetime.strptime(end.strip(), '%H:%M').time(),
+        ))
+    return rv
+
+
+class PlaylistEntry(object):
+    def __init__(self, seq, weight=1, valid_from=None, valid_until=None,
+                 dayparts=None):
+        self._seq = seq
+        self._weight = int(weight) if weight is not None else 1
+        self._valid_from = _parse_datetime(valid_from)
+        self._valid_until = _parse_datetime(valid_until)
+        if isinstance(dayparts, str):
+            dayparts = [x.strip() for x in dayparts.split(',') if x.strip()]
+        self._dayparts = tuple(dayparts or ())
+
+    @property
+    def seq(self):
+        return self._seq
+
+    @property
+    def weight(self):
+        return self._weight
+
+    @property
+    def valid_from(self):
+        return self._valid_from
+
+    @property
+    def valid_until(self):
+        return self._valid_until
+
+    @property
+    def dayparts(self):
+        return self._dayparts
+
+    def valid(self, now):
+        if self._valid_from and now < self._valid_from:
+            return False
+        if self._valid_until and now >= self._valid_until:
+            return False
+        return True
+
+    def plays_in(self, dayparts):
+        # Entries without daypart tags play in every daypart.
+        if not self._dayparts:
+            return True
+        return any(x in dayparts for x in self._dayparts)
+
+    def __repr__(self):
+        return "{0:3} x{1} [{2} - {3}] {4}".format(
+            self._seq, self._weight, self._valid_from or '',
+            self._valid_until or '', ','.join(self._dayparts)
+        )
+
+
+def weighted_rotation(entries):
+    # Smooth weighted round robin. Each entry appears weight times in the
+    # rotation, spread out as evenly as possible. Entries of equal weight
+    # come out in seq order, so unweighted playlists retain their order.
+    weights = [(e.seq, e.weight) for e in entries if e.weight > 0]
+    if not weights:
+        return []
+    divisor = reduce(gcd, [w for _, w in weights])
+    weights = [(seq, w // divisor) for seq, w in weights]
+    total = sum(w for _, w in weights)
+    current = {seq: 0 for seq, _ in weights}
+    rotation = []
+    for _ in range(total):
+        for seq, w in weights:
+            current[seq] += w
+        best = max(current.keys(), key=lambda s: current[s])
+        current[best] -= total
+        rotation.append(best)
+    return rotation
+
+
+class PlaylistEngine(object):
+    # Selects the next item of a playlist whose entries carry weights,
+    # validity windows and daypart tags. The rotation for the current set of
+    # dayparts and valid entries is computed once, when that set changes, and
+    # next() is then a lookup into it. The position in each daypart's
+    # rotation is kept separately, so returning to a daypart resumes its
+    # rotation where it was left.
+    _rotation_cache_size = 16
+
+    def __init__(self, dayparts=None):
+        self._dayparts = dayparts or []
+        self._entries = []
+        self._rotations = {}
+        self._positions = {}
+        self._key = None
+        self._rotation = []
+        self._built = None
+        self._expires = None
+
+    @property
+    def dayparts(self):
+        return self._dayparts
+
+    @property
+    def entries(self):
+        return self._entries
+
+    def load(self, entries):
+        self._entries = sorted(entries, key=lambda x: x.seq)
+        self._rotations = {}
+        self._key = None
+
+    @property
+    def positions(self):
+        return dict(self._positions)
+
+    def restore(self, positions):
+        self._positions.update(positions)
+
+    def current_dayparts(self, now):
+        t = now.time()
+        return tuple(sorted(set(d.name for d in self._dayparts
+                                if d.contains(t))))
+
+    def _next_boundary(self, now):
+        candidates = []
+        for daypart in self._dayparts:
+            for t in (daypart.start, daypart.end):
+                candidate = datetime.combine(now.date(), t)
+                if candidate <= now:
+                    candidate += timedelta(days=1)
+                candidates.append(candidate)
+        for entry in self._entries:
+            for candidate in (entry.valid_from, entry.valid_until):
+                if candidate and candidate > now:
+                    candidates.append(candidate)
+        if not candidates:
+            return None
+        return min(candidates)
+
+    def _refresh(self, now):
+        if self._key is not None and self._built <= now and \
+                (self._expires is None or now < self._expires):
+            return
+        dayparts = self.current_dayparts(now)
+        active = [e for e in self._entries
+                  if e.valid(now) and e.plays_in(dayparts)]
+        key = (dayparts, tuple(e.seq for e in active))
+        if key not in self._rotations:
+            if len(self._rotations) >= self._rotation_cache_size:
+                self._rotations = {}
+            self._rotations[key] = weighted_rotation(active)
+        self._key = key
+        self._rotation = self._rotations[key]
+        self._built = now
+        self._expires = self._next_boundary(now)
+
+    @property
+    def _position_key(self):
+        return ','.join(self._key[0])
+
+    def next(self, now=None):
+        now = now or datetime.now()
+        self._refresh(now)
+        if not self._rotation:
+            return -1
+        pkey = self._position_key
+        position = self._positions.get(pkey, 0) % len(self._rotation)
+        self._positions[pkey] = (position + 1) % len(self._rotation)
+        return self._rotation[position]
+
+    def peek(self, count=1, now=None):
+        now = now or datetime.now()
+        self._refresh(now)
+        if not self._rotation:
+            return []
+        position = self._positions.get(self._position_key, 0)
+        return [self._rotation[(position + i) % len(self._rotation)]
+                for i in range(count)]
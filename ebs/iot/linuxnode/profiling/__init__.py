@@ -0,0 +1,254 @@
+
+
+import os
+import threading
+from twisted.internet.threads import deferToThread
+
+from ..log import NodeLoggingMixin
+from ..basemixin import BaseGuiMixin
+from ..widgets.labels import ColorLabel
+from .sampler import StackSampler
+from .tracemem import TracemallocReporter
+from .stalls import StallDetector
+from .memory import MemoryWatchdog
+from .memory import rss
+
+
+class ProfilingMixin(NodeLoggingMixin):
+    # Field profiling, switched on by config. Everything is written under
+    # profiling_dir :
+    #   stacks.folded       reactor thread stack samples, for flamegraph.pl
+    #   tracemalloc.*.txt   top allocation differences between reports
+    #   stalls.log          stacks of the reactor thread while it blocked,
+    #                       the last 1 MB or so, and the 1 MB before in
+    #                       stalls.log.1
+    #   backrefs.*          reference chains of suspected leaks
+    #
+    # The loop monitor, which records those stalls, and the memory watchdog
+    # can also be enabled without the rest of profiling.
+    def __init__(self, *args, **kwargs):
+        self._profiling_sampler = None
+        self._profiling_tracemalloc = None
+        self._loop_monitor = None
+        self._memory_watchdog = None
+        self._memory_watchdog_busy = False
+        super(ProfilingMixin, self).__init__(*args, **kwargs)
+
+    @property
+    def profiling_dir(self):
+        path = os.path.join(self.log_dir, 'profiling')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def profiling_start(self):
+        if not self.config.profiling:
+            return
+        thread_id = self._reactor_thread_id
+
+        if self.config.profiling_sampler_interval:
+            self._profiling_sampler = StackSampler(
+                thread_id, os.path.join(self.profiling_dir, 'stacks.folded'),
+                interval=self.config.profiling_sampler_interval
+            )
+            self._profiling_sampler.start()
+
+        if self.config.profiling_tracemalloc_interval:
+            self._profiling_tracemalloc = TracemallocReporter(
+                self.profiling_dir, top=self.config.profiling_tracemalloc_top
+            )
+            self._profiling_tracemalloc.start()
+            self.scheduler.every(
+                'profiling.tracemalloc',
+                self.config.profiling_tracemalloc_interval,
+                self._profiling_tracemalloc_report, align=False
+            )
+
+        self.log.info("Profiling to {path}", path=self.profiling_dir)
+
+    def _profiling_tracemalloc_report(self):
+        d = deferToThread(self._profiling_tracemalloc.report)
+        d.addErrback(lambda f: self.log.failure(
+            "Could not write tracemalloc report", failure=f))
+
+    @property
+    def _reactor_thread_id(self):
+        # Everything is started from start(), in the reactor thread.
+        return threading.get_ident()
+
+    @property
+    def loop_monitor(self):
+        return self._loop_monitor
+
+    def loop_monitor_start(self):
+        if not self.config.loop_monitor and not \
+                (self.config.profiling and self.config.profiling_stall_threshold):
+            return
+        lags = self.metrics.histogram(
+            'node_loop_lag_seconds',
+            'How late the reactor ran a heartbeat it was due to run',
+            buckets=(0.001, 0.005, 0.01, 0.02, 0.05, 0.1,
+                     0.25, 0.5, 1, 2.5, 5, 10)
+        )
+        self._loop_monitor = StallDetector(
+            self.reactor, self._reactor_thread_id,
+            os.path.join(self.profiling_dir, 'stalls.log'),
+            threshold=self.config.profiling_stall_threshold,
+            interval=self.config.loop_monitor_interval,
+            on_stall=self._loop_stall, on_lag=lags.observe
+        )
+        self._loop_monitor.start()
+
+    def _loop_stall(self, stall):
+        self.metrics.counter(
+            'node_loop_stall_seconds_total',
+            'Time the reactor spent blocked, by the callback it was in',
+            labels=('callback',)
+        ).labels(stall.culprit or 'unknown').inc(stall.duration)
+        self.log.warn("Reactor was blocked for {duration:.3f}s in "
+                      "{culprit}", duration=stall.duration,
+                      culprit=stall.culprit or 'unknown')
+
+    _memory_rss_interval = 60
+
+    def memory_watchdog_start(self):
+        self.metrics.gauge(
+            'node_rss_bytes', 'Resident memory of the node'
+        ).set_function(rss)
+        if self.config.memory_restart_rss:
+            self.scheduler.every('memory.rss', self._memory_rss_interval,
+                                 self._memory_rss_check, align=False)
+        if not self.config.memory_watchdog_interval:
+            return
+        self._memory_watchdog = MemoryWatchdog(
+            self.profiling_dir,
+            window=self.config.memory_watchdog_window,
+            min_growth=self.config.memory_watchdog_min_growth
+        )
+        self.scheduler.every('memory.watchdog',
+                             self.config.memory_watchdog_interval,
+                             self._memory_watchdog_check, align=False)
+
+    def _memory_watchdog_check(self):
+        # The heap walks run in a thread, so that the reactor only has to
+        # share the GIL with them rather than wait for them.
+        if self._memory_watchdog_busy:
+            return
+        self._memory_watchdog_busy = True
+        watchdog = self._memory_watchdog
+        d = deferToThread(watchdog.check)
+        d.addCallback(self._memory_watchdog_suspects)
+
+        def _export(suspects):
+            if suspects:
+                return deferToThread(watchdog.export_chains)
+            return []
+        d.addCallback(_export)
+
+        def _exported(paths):
+            for path in paths:
+                self.log.info("Wrote reference chain to {path}", path=path)
+        d.addCallback(_exported)
+        d.addErrback(lambda f: self.log.failure(
+            "Memory watchdog check failed", failure=f))
+
+        def _done(_):
+            self._memory_watchdog_busy = False
+        d.addBoth(_done)
+
+    def _memory_watchdog_suspects(self, suspects):
+        growth = self.metrics.gauge(
+            'node_leak_suspect_growth',
+            'Growth in the count of types suspected to be leaking',
+            labels=('type',)
+        )
+        for name, count in suspects:
+            growth.labels(name).set(count)
+            self.log.warn("Possible leak of {type} : {count} more over "
+                          "the last {window} samples", type=name,
+                          count=count, window=self.config.memory_watchdog_window)
+        return suspects
+
+    def _memory_rss_check(self):
+        current = rss()
+        limit = self.config.memory_restart_rss * 1024 * 1024
+        if current > limit:
+            self.log.critical("RSS {rss:.0f} MB is over {limit} MB. "
+                              "Restarting.", rss=current / 1024 / 1024,
+                              limit=self.config.memory_restart_rss)
+            self.memory_restart()
+
+    def memory_restart(self):
+        # Stop the node, so that whatever supervises it can start it
+        # afresh.
+        self.reactor.stop()
+
+    def profiling_stop(self):
+        if self._profiling_sampler:
+            self._profiling_sampler.stop()
+            self._profiling_sampler = None
+        if self._profiling_tracemalloc:
+            self.scheduler.cancel('profiling.tracemalloc')
+            self._profiling_tracemalloc.stop()
+            self._profiling_tracemalloc = None
+        if self._loop_monitor:
+            self._loop_monitor.stop()
+            self._loop_monitor = None
+        self.scheduler.cancel('memory.rss')
+        if self._memory_watchdog:
+            self.scheduler.cancel('memory.watchdog')
+            self._memory_watchdog = None
+
+    def start(self):
+        super(ProfilingMixin, self).start()
+        self.profiling_start()
+        self.loop_monitor_start()
+        self.memory_watchdog_start()
+
+    def stop(self):
+        self.profiling_stop()
+        super(ProfilingMixin, self).stop()
+
+
+class ProfilingGuiMixin(ProfilingMixin, BaseGuiMixin):
+    def __init__(self, *args, **kwargs):
+        self._gui_loop_overlay = None
+        super(ProfilingGuiMixin, self).__init__(*args, **kwargs)
+
+    @property
+    def gui_loop_overlay(self):
+        if not self._gui_loop_overlay:
+            self._gui_loop_overlay = ColorLabel(
+                size_hint=(None, None), size=(700, 52), padding=(8, 8),
+                bgcolor=[0, 0, 0, 0.2], font_size='12sp', halign='left',
+                valign='middle', markup=True
+            )
+            self._gui_loop_overlay.bind(
+                size=self._gui_loop_overlay.setter('text_size'))
+            self.gui_debug_stack.add_widget(self._gui_loop_overlay)
+        return self._gui_loop_overlay
+
+    def _gui_loop_overlay_update(self):
+        monitor = self._loop_monitor
+        lags = sorted(monitor.lags)
+        if not lags:
+            return
+        text = "[font=RobotoMono-Regular]LOOP LAG[/font] p50 {0:.0f}ms " \
+               "p99 {1:.0f}ms max {2:.0f}ms, {3} stalls".format(
+                   lags[len(lags) // 2] * 1000,
+                   lags[int(len(lags) * 0.99)] * 1000,
+                   lags[-1] * 1000, monitor.stalls)
+        stall = monitor.last_stall
+        if stall:
+            text += "\nLast {0:.2f}s in {1}".format(
+                stall.duration, stall.culprit or 'unknown')
+        self.gui_loop_overlay.text = text
+
+    def loop_monitor_start(self):
+        super(ProfilingGuiMixin, self).loop_monitor_start()
+        if self._loop_monitor and self.config.gui_loop_overlay:
+            self.scheduler.every('profiling.overlay', 1,
+                                 self._gui_loop_overlay_update)
+
+    def profiling_stop(self):
+        self.scheduler.cancel('profiling.overlay')
+        super(ProfilingGuiMixin, self).profiling_stop()
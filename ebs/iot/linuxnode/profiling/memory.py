@@ -1,23 +1,157 @@
 
 
-import objgraph
+import os
+import gc
+import time
+import resource
+from collections import deque
 
+try:
+    import objgraph
+except ImportError:
+    objgraph = None
 
-previous_snapshot = {}
 
+def type_counts():
+    # Live objects tracked by the gc, by type name. The same as
+    # objgraph.typestats, without needing objgraph.
+    counts = {}
+    for o in gc.get_objects():
+        name = type(o).__name__
+        counts[name] = counts.get(name, 0) + 1
+    return counts
 
-def take_snapshot():
-    global previous_snapshot
-    snapshot = {t: c for (t, c) in objgraph.most_common_types(limit=100)}
-    print("Took snapshot of objgraph")
-    if previous_snapshot:
-        delta = {t: snapshot[t] - previous_snapshot.get(t, 0) for t in snapshot.keys()}
+
+def rss():
+    # Resident set size of this process in bytes. Where /proc isn't
+    # there, the peak, which is what getrusage has.
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class TypeSnapshot(object):
+    # Type counts, and how they changed since the snapshot before.
+    def __init__(self, previous=None):
+        self.counts = type_counts()
+        self.delta = {}
+        if previous:
+            self.delta = {t: c - previous.counts.get(t, 0)
+                          for t, c in self.counts.items()
+                          if c != previous.counts.get(t, 0)}
+
+    def most_changed(self, limit=20):
+        return sorted(self.delta.items(), key=lambda x: x[1],
+                      reverse=True)[:limit]
+
+
+def take_snapshot(previous=None):
+    # For use from a shell. Pass the snapshot this returns to the next
+    # call to see what changed in between.
+    snapshot = TypeSnapshot(previous)
+    if previous:
         print("Types with the most changes : ")
-        for t in sorted(delta.keys(), key=lambda x: delta[x], reverse=True):
-            if delta[t]:
-                print("{0:20} {1}".format(t, delta[t]))
-    previous_snapshot = snapshot
+        for t, delta in snapshot.most_changed():
+            print("{0:20} {1}".format(t, delta))
+    return snapshot
+
+
+def backref_chain(ob, max_depth=20):
+    if objgraph is None:
+        return None
+    return objgraph.find_backref_chain(ob, objgraph.is_proper_module,
+                                       max_depth=max_depth)
+
+
+def _short_repr(ob, limit=200):
+    try:
+        return repr(ob)[:limit]
+    except Exception:
+        return '<unrepresentable>'
 
 
 def show_chain(ob):
-    objgraph.show_chain(objgraph.find_backref_chain(ob, objgraph.is_proper_module))
+    if objgraph is None:
+        print("objgraph is not installed")
+        return
+    objgraph.show_chain(backref_chain(ob))
+
+
+class MemoryWatchdog(object):
+    # Samples RSS and the type counts every time check() is called, and
+    # keeps the last few samples. A type whose count has not gone down
+    # once across all of them, and has grown by at least min_growth, is a
+    # suspected leak. The back reference chains of an instance of the
+    # worst few are written to directory, once per type, as text and as a
+    # graphviz .dot file, if objgraph is available.
+    #
+    # Both check() and export_chains() walk the whole heap, and are meant
+    # to be run in a thread, one at a time.
+    def __init__(self, directory, window=6, min_growth=100, top=3):
+        self._directory = directory
+        self._min_growth = min_growth
+        self._top = top
+        self._samples = deque(maxlen=window)
+        self._rss = deque(maxlen=window)
+        self._exported = set()
+        self.suspects = []
+
+    @property
+    def rss(self):
+        if self._rss:
+            return self._rss[-1]
+
+    @property
+    def rss_growth(self):
+        if len(self._rss) > 1:
+            return self._rss[-1] - self._rss[0]
+        return 0
+
+    def check(self):
+        self._rss.append(rss())
+        self._samples.append(type_counts())
+        self.suspects = self._growing()
+        return self.suspects
+
+    def _growing(self):
+        if len(self._samples) < self._samples.maxlen:
+            return []
+        rval = []
+        last = self._samples[-1]
+        for name, count in last.items():
+            series = [s.get(name, 0) for s in self._samples]
+            if count - series[0] < self._min_growth:
+                continue
+            if all(b >= a for a, b in zip(series, series[1:])):
+                rval.append((name, count - series[0]))
+        rval.sort(key=lambda x: x[1], reverse=True)
+        return rval[:self._top]
+
+    def export_chains(self, limit=1):
+        # Costly. Each type is only exported the first time it's a suspect,
+        # and at most limit types each time.
+        if objgraph is None:
+            return []
+        rval = []
+        pending = [n for n, _ in self.suspects if n not in self._exported]
+        for name in pending[:limit]:
+            self._exported.add(name)
+            instances = objgraph.by_type(name)
+            if not instances:
+                continue
+            # The newest of them is the most likely to be a leaked one.
+            chain = backref_chain(instances[-1])
+            del instances
+            if not chain:
+                continue
+            path = os.path.join(self._directory, 'backrefs.{0}.{1}'.format(
+                name, time.strftime('%Y%m%d-%H%M%S')))
+            with open(path + '.txt', 'w') as f:
+                for ob in chain:
+                    f.write("{0} {1}\n".format(
+                        type(ob).__name__, _short_repr(ob)))
+            objgraph.show_chain(chain, filename=path + '.dot')
+            rval.append(path)
+        return rval
@@ -0,0 +1,16 @@
+
+
+from ..widgets.pool import WidgetPool
+
+
+def pool_statistics():
+    return [pool.statistics for pool in WidgetPool.pools()]
+
+
+def show_pool_statistics():
+    print("Widget pool allocation counters : ")
+    print("{0:12} {1:>8} {2:>8} {3:>8} {4:>8} {5:>8}".format(
+        'pool', 'free', 'created', 'reused', 'released', 'dropped'))
+    for stats in pool_statistics():
+        print("{name:12} {free:>8} {created:>8} {reused:>8} "
+              "{released:>8} {discarded:>8}".format(**stats))
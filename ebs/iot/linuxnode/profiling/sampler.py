@@ -0,0 +1,77 @@
+
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+
+def fold_stack(frame, limit=100):
+    # The stack as one line of the folded format flamegraph.pl and
+    # speedscope read, outermost frame first.
+    parts = []
+    while frame is not None and len(parts) < limit:
+        code = frame.f_code
+        parts.append("{0} ({1}:{2})".format(
+            code.co_name, os.path.basename(code.co_filename),
+            code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+class StackSampler(object):
+    # Samples the stack of one thread, usually the reactor's, from a
+    # thread of its own, and periodically writes out how often each stack
+    # was seen. The sampled thread doesn't do anything towards this, so it
+    # costs it little more than the sampler holding the GIL for a moment
+    # every interval.
+    def __init__(self, thread_id, path, interval=0.01, dump_interval=60):
+        self._thread_id = thread_id
+        self._path = path
+        self._interval = interval
+        self._dump_interval = dump_interval
+        self._counts = Counter()
+        self._samples = 0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def samples(self):
+        return self._samples
+
+    def start(self):
+        if self._thread:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        next_dump = time.monotonic() + self._dump_interval
+        while not self._stopping.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._counts[fold_stack(frame)] += 1
+                self._samples += 1
+            del frame
+            if time.monotonic() >= next_dump:
+                self.dump()
+                next_dump = time.monotonic() + self._dump_interval
+        self.dump()
+
+    def dump(self):
+        # Rewritten whole every time, with the counts since the start.
+        temp = self._path + '.tmp'
+        with open(temp, 'w') as f:
+            for stack, count in self._counts.most_common():
+                f.write("{0} {1}\n".format(stack, count))
+        os.replace(temp, self._path)
@@ -0,0 +1,7 @@
+
+
+def show_scheduler_statistics(node):
+    stats = node.scheduler.statistics
+    print("Tick scheduler : ")
+    print("{tasks:>4} tasks ({periodic} periodic), {runs} runs, "
+          "{wakeups_per_minute} wakeups in the last minute".format(**stats))
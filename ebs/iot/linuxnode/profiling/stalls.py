@@ -0,0 +1,155 @@
+
+
+import os
+import sys
+import time
+import threading
+import traceback
+from collections import deque
+from twisted.internet.task import LoopingCall
+
+
+# Frames of these modules are the event loop itself, or dispatch work
+# for it, rather than being the work it was asked to do.
+_loop_modules = ('twisted.', 'kivy.', 'ebs.iot.linuxnode.scheduler')
+
+
+def _is_loop_frame(frame):
+    return frame.f_globals.get('__name__', '').startswith(_loop_modules)
+
+
+def stall_culprit(frame):
+    # The callback the event loop was running when it got stuck : the
+    # outermost frame which was called from within the event loop's own.
+    # If it's stuck in the loop itself, the innermost frame.
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    if not frames:
+        return None
+    culprit = frames[0]
+    in_loop = False
+    for frame in reversed(frames):
+        if _is_loop_frame(frame):
+            in_loop = True
+        elif in_loop:
+            culprit = frame
+            break
+    code = culprit.f_code
+    return "{0}.{1}:{2}".format(culprit.f_globals.get('__name__', '?'),
+                                code.co_name, code.co_firstlineno)
+
+
+class Stall(object):
+    __slots__ = ('started', 'duration', 'culprit', 'stack')
+
+    def __init__(self, started, duration, culprit, stack):
+        self.started = started
+        self.duration = duration
+        self.culprit = culprit
+        self.stack = stack
+
+
+class StallDetector(object):
+    # A heartbeat in the reactor thread and a watchdog in a thread of its
+    # own. Each beat measures how late it ran, which is how long anything
+    # else scheduled on the loop would have had to wait. When the heartbeat
+    # is late by more than threshold, something in the reactor thread is
+    # blocking, and the watchdog takes its stack right then, while it's
+    # still stuck, along with the callback it was stuck in. Once the
+    # heartbeat is back, the stall is written out with how long it lasted.
+    # With a threshold of 0, only the lag is measured, and there is no
+    # watchdog.
+    #
+    # Once the file of stalls grows past max_bytes, it's moved aside to
+    # path.1, replacing the one before, and a fresh one started.
+    def __init__(self, reactor, thread_id, path, threshold=0.25,
+                 interval=None, on_stall=None, on_lag=None, history=200,
+                 max_bytes=1024 * 1024):
+        self._reactor = reactor
+        self._thread_id = thread_id
+        self._path = path
+        self._max_bytes = max_bytes
+        self._threshold = threshold
+        self._interval = interval or threshold / 4 or 0.05
+        self._on_stall = on_stall
+        self._on_lag = on_lag
+        self._last = None
+        self._heartbeat = None
+        self._stopping = threading.Event()
+        self._thread = None
+        self._stalls = 0
+        self.lags = deque(maxlen=history)
+        self.last_stall = None
+
+    @property
+    def stalls(self):
+        return self._stalls
+
+    def start(self):
+        if self._heartbeat:
+            return
+        self._last = time.monotonic()
+        self._heartbeat = LoopingCall(self._beat)
+        self._heartbeat.clock = self._reactor
+        self._heartbeat.start(self._interval, now=False)
+        if not self._threshold:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch,
+                                        name='stall-detector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._heartbeat and self._heartbeat.running:
+            self._heartbeat.stop()
+        self._heartbeat = None
+        if self._thread:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def _beat(self):
+        now = time.monotonic()
+        lag = max(0, now - self._last - self._interval)
+        self._last = now
+        self.lags.append(lag)
+        if self._on_lag:
+            self._on_lag(lag)
+
+    def _watch(self):
+        stall = None
+        while not self._stopping.wait(self._interval):
+            lag = time.monotonic() - self._last
+            if lag > self._threshold + self._interval:
+                if stall is None:
+                    frame = sys._current_frames().get(self._thread_id)
+                    if frame is None:
+                        continue
+                    stall = Stall(time.time() - lag, None,
+                                  stall_culprit(frame),
+                                  traceback.format_stack(frame))
+                    del frame
+            elif stall is not None:
+                stall.duration = time.time() - stall.started
+                self._record(stall)
+                stall = None
+
+    def _record(self, stall):
+        self._stalls += 1
+        self.last_stall = stall
+        try:
+            if os.path.getsize(self._path) > self._max_bytes:
+                os.replace(self._path, self._path + '.1')
+        except OSError:
+            pass
+        with open(self._path, 'a') as f:
+            f.write("{0} Reactor blocked for {1:.3f}s in {2} at :\n".format(
+                time.strftime('%Y-%m-%d %H:%M:%S',
+                              time.localtime(stall.started)),
+                stall.duration, stall.culprit or 'unknown'))
+            f.writelines(stall.stack)
+            f.write("\n")
+        if self._on_stall:
+            self._reactor.callFromThread(self._on_stall, stall)
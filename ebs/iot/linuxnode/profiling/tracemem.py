@@ -0,0 +1,64 @@
+
+
+import os
+import time
+import tracemalloc
+
+
+_filters = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class TracemallocReporter(object):
+    # Writes the lines whose allocations grew the most since the previous
+    # report into a file of its own. Only the newest few are kept.
+    def __init__(self, directory, top=25, frames=1, keep=20):
+        self._directory = directory
+        self._top = top
+        self._frames = frames
+        self._keep = keep
+        self._previous = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+        self._previous = self._snapshot()
+
+    def stop(self):
+        self._previous = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces(_filters)
+
+    def report(self):
+        # Safe to run outside the reactor thread, and better off there.
+        if self._previous is None:
+            return
+        snapshot = self._snapshot()
+        stats = snapshot.compare_to(self._previous, 'lineno')
+        self._previous = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+
+        path = os.path.join(self._directory, 'tracemalloc.{0}.txt'.format(
+            time.strftime('%Y%m%d-%H%M%S')))
+        with open(path, 'w') as f:
+            f.write("Traced {0:.1f} KiB, peak {1:.1f} KiB\n".format(
+                current / 1024, peak / 1024))
+            f.write("Top {0} differences since the last report :\n"
+                    "".format(self._top))
+            for stat in stats[:self._top]:
+                f.write("{0}\n".format(stat))
+        self._prune()
+        return path
+
+    def _prune(self):
+        reports = sorted(x for x in os.listdir(self._directory)
+                         if x.startswith('tracemalloc.'))
+        for name in reports[:-self._keep]:
+            os.remove(os.path.join(self._directory, name))
@@ -0,0 +1,13 @@
+
+
+def show_event_trace_summary(node):
+    summary = node.event_traces.summary()
+    print("Event traces, scheduled start to first frame (seconds) : ")
+    print("{0:8} {1:>6} {2:>8} {3:>8} {4:>8} {5:>8}".format(
+        'span', 'count', 'p50', 'p90', 'p99', 'max'))
+    for name, stats in summary.items():
+        values = ["{0:8.3f}".format(stats[k]) if stats[k] is not None
+                  else "{0:>8}".format('-')
+                  for k in ('p50', 'p90', 'p99', 'max')]
+        print("{0:8} {1:>6} {2}".format(name, stats['count'],
+                                        ' '.join(values)))
@@ -6,7 +6,7 @@ from datetime import datetime
 from datetime import timedelta
 from functools import partial
 
-from twisted import logger
+from twisted.logger import LogLevel
 from twisted.internet.defer import succeed
 from twisted.internet.task import cooperate
 from twisted.web.client import ResponseFailed
@@ -19,6 +19,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
 
+from .lazylog import LazyLogger
 from .http import HttpClientMixin
 from .http import _http_errors
 
@@ -154,6 +155,16 @@ class ResourceManager(object):
         self._cache_dir = None
         self._active_downloads = []
         super(ResourceManager, self).__init__(**kwargs)
+        metrics = node.metrics
+        cache = metrics.counter('node_cache_requests_total',
+                                'Prefetches by whether they were cached',
+                                labels=('result',))
+        self._m_cache_hit = cache.labels('hit')
+        self._m_cache_miss = cache.labels('miss')
+        self._m_download_bytes = metrics.counter(
+            'node_download_bytes_total', 'Bytes downloaded to the cache')
+        self._m_download_time = metrics.histogram(
+            'node_download_seconds', 'Duration of downloads to the cache')
 
     @property
     def node(self):
@@ -162,7 +173,7 @@ class ResourceManager(object):
     @property
     def log(self):
         if not self._log:
-            self._log = logger.Logger(namespace="rm", source=self)
+            self._log = LazyLogger(namespace="rm", source=self)
         return self._log
 
     def has(self, filename):
@@ -193,6 +204,26 @@ class ResourceManager(object):
         resource = self._resource_class(self, filename, url, rtype)
         resource.commit()
 
+    def commit_rtypes(self, rtypes):
+        # Set the rtypes of several resources already known to the manager
+        # in a single transaction. rtypes is a dict of filename to rtype.
+        # Filenames not known to the manager are ignored.
+        if not rtypes:
+            return
+        session = self.db()
+        try:
+            robjs = session.query(ResourceModel).filter(
+                ResourceModel.filename.in_(list(rtypes.keys()))
+            ).all()
+            for robj in robjs:
+                robj.rtype = rtypes[robj.filename] or 0
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     def remove(self, filename):
         session = self.db()
         # print("Trying to remove {0} from rdb".format(filename))
@@ -216,9 +247,11 @@ class ResourceManager(object):
         if resource.filename in self._active_downloads:
             return
         if resource.available:
+            self._m_cache_hit.inc()
             with open(resource.cache_path, 'a'):
                 os.utime(resource.cache_path, None)
             return
+        self._m_cache_miss.inc()
 
         if retries is None:
             retries = self._node.config.resource_prefetch_retries
@@ -246,6 +279,14 @@ class ResourceManager(object):
         def _dl_finalize(r, times, _):
             with open(r.cache_path, 'a'):
                 os.utime(r.cache_path, times)
+            size = os.path.getsize(r.cache_path)
+            duration = time.time() - times[0]
+            self._m_download_bytes.inc(size)
+            self._m_download_time.observe(duration)
+            self.log.info("Downloaded {filename} in {duration:.1f}s",
+                          filename=r.filename, url=r.url,
+                          size=size, duration=duration)
+            self._node.media_metadata.update(r.cache_path)
 
         d.addCallback(
             partial(_dl_finalize, resource, (time.time(), time.time()))
@@ -297,6 +338,7 @@ class CachingResourceManager(ResourceManager):
         )
         if d:
             def fetch_postprocess(_):
+                started = time.time()
                 task = cooperate(
                     self.cache_trim()
                 )
@@ -304,7 +346,9 @@ class CachingResourceManager(ResourceManager):
 
                 def _report_done(_):
                     # self.log.debug("Cache trim complete.")
-                    pass
+                    self._node.metrics.histogram(
+                        'node_cache_trim_seconds', 'Duration of cache trims'
+                    ).observe(time.time() - started)
                 td.addCallback(_report_done)
             d.addCallback(fetch_postprocess)
         else:
@@ -319,6 +363,7 @@ class CachingResourceManager(ResourceManager):
             os.remove(self.cache_path(filename))
         except FileNotFoundError:
             pass
+        self._node.media_metadata.remove(filename)
         return size
 
     def cache_has(self, filename):
@@ -484,8 +529,10 @@ class CachingResourceManager(ResourceManager):
         raise NothingToTrimError()
 
     def _cache_debug(self, resources, title, keyfunc):
+        if not self.log.enabled(LogLevel.debug):
+            return
         self.log.debug("------------------------------------")
-        self.log.debug("Cache Content {0}".format(title))
+        self.log.debug("Cache Content {title}", title=title)
         for r, _ in resources:
             self._node.log.debug(
                 "{key} {filename}",
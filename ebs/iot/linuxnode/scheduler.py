@@ -0,0 +1,124 @@
+
+
+import math
+from collections import deque
+from .lazylog import LazyLogger
+
+
+class _Task(object):
+    __slots__ = ('key', 'callback', 'due', 'slack', 'period')
+
+    def __init__(self, key, callback, due, slack=0, period=None):
+        self.key = key
+        self.callback = callback
+        self.due = due
+        self.slack = slack
+        self.period = period
+
+
+class TickScheduler(object):
+    # One timer for all the periodic and one-shot work of the node's UI.
+    #
+    # Periodic tasks are aligned to multiples of their period, so tasks with
+    # the same or related periods (every clock on screen, a timetable page
+    # turn every 12 seconds) fall due on the same boundaries. Each task may
+    # also allow some slack. The timer is armed for the latest moment the
+    # most urgent task can wait until, and every task which is due by then
+    # is run on that same wakeup. Since the reactor runs within the Kivy
+    # event loop, the widget updates made by all of them land in a single
+    # frame.
+    #
+    # wakeups_per_minute counts how often the timer actually fires.
+    _tolerance = 0.01
+
+    def __init__(self, reactor):
+        self._reactor = reactor
+        self._log = None
+        self._tasks = {}
+        self._timer = None
+        self._wakeups = deque()
+        self._runs = 0
+
+    @property
+    def log(self):
+        if not self._log:
+            self._log = LazyLogger(namespace="scheduler", source=self)
+        return self._log
+
+    def schedule(self, key, delay, callback, slack=0):
+        # Run callback once, delay seconds from now, or up to slack seconds
+        # later. Scheduling a key which is already pending replaces it.
+        due = self._reactor.seconds() + delay
+        self._tasks[key] = _Task(key, callback, due, slack)
+        self._arm()
+
+    def every(self, key, period, callback, slack=0, align=True):
+        # Run callback every period seconds. If align is set, at multiples
+        # of period, otherwise period seconds from now and on.
+        now = self._reactor.seconds()
+        if align:
+            due = (math.floor(now / period) + 1) * period
+        else:
+            due = now + period
+        self._tasks[key] = _Task(key, callback, due, slack, period)
+        self._arm()
+
+    def cancel(self, key):
+        if self._tasks.pop(key, None) is not None:
+            self._arm()
+
+    def active(self, key):
+        return key in self._tasks.keys()
+
+    def _arm(self):
+        if not self._tasks:
+            if self._timer and self._timer.active():
+                self._timer.cancel()
+            self._timer = None
+            return
+        deadline = min(t.due + t.slack for t in self._tasks.values())
+        delay = max(0, deadline - self._reactor.seconds())
+        if self._timer and self._timer.active():
+            if abs(self._timer.getTime() - deadline) > self._tolerance:
+                self._timer.reset(delay)
+            return
+        self._timer = self._reactor.callLater(delay, self._fire)
+
+    def _fire(self):
+        self._timer = None
+        now = self._reactor.seconds()
+        self._wakeups.append(now)
+        due = sorted((t for t in self._tasks.values()
+                      if t.due <= now + self._tolerance),
+                     key=lambda x: x.due)
+        for task in due:
+            if self._tasks.get(task.key, None) is not task:
+                # Cancelled or replaced by an earlier callback
+                continue
+            if task.period:
+                while task.due <= now + self._tolerance:
+                    task.due += task.period
+            else:
+                del self._tasks[task.key]
+            self._runs += 1
+            try:
+                task.callback()
+            except Exception:
+                self.log.failure("Scheduled task {key} failed", key=task.key)
+        self._arm()
+
+    @property
+    def wakeups_per_minute(self):
+        cutoff = self._reactor.seconds() - 60
+        while self._wakeups and self._wakeups[0] < cutoff:
+            self._wakeups.popleft()
+        return len(self._wakeups)
+
+    @property
+    def statistics(self):
+        return {
+            'tasks': len(self._tasks),
+            'periodic': len([t for t in self._tasks.values() if t.period]),
+            'runs': self._runs,
+            'wakeups_per_minute': self.wakeups_per_minute,
+        }
@@ -1,7 +1,6 @@
 
 
-from twisted import logger
-
+from ..lazylog import LazyLogger
 from .spec import BasicTableSpec
 
 
@@ -40,8 +39,8 @@ class BasicTable(object):
     @property
     def log(self):
         if not self._log:
-            self._log = logger.Logger(namespace="table.{0}".format(self._spec.name),
-                                      source=self)
+            self._log = LazyLogger(namespace="table.{0}".format(self._spec.name),
+                                   source=self)
         return self._log
 
     @property
@@ -64,4 +63,5 @@ class BasicTable(object):
                 dedup_record.append(tags)
             entry.parent = self
             self._entries.append(entry)
-        self.log.info("Extracted {0} Entries from API response".format(len(self._entries)))
+        self.log.info("Extracted {count} Entries from API response",
+                      count=len(self._entries))
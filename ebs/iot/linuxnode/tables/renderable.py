@@ -233,7 +233,7 @@ class BasicRenderableTable(BasicTable):
         return self.gui_table_container
 
     def redraw_entries(self, entries):
-        self.log.debug("Redrawing Table, Got {0} Entries".format(len(entries)))
+        self.log.debug("Redrawing Table, Got {n} Entries", n=len(entries))
         if hasattr(self, '_alternate_fallback_handler'):
             self._alternate_fallback_handler(None, entries)
         self._gui_table_entries.clear_widgets()
@@ -19,7 +19,8 @@ class TranslatableTableSpec(BasicTableSpec):
 
     def _i18n_install_languages(self):
         for language in self._languages:
-            self.parent.log.debug("Installing Language {0} for Table {1}".format(language, self.name))
+            self.parent.log.debug("Installing Language {language} for Table "
+                                  "{table}", language=language, table=self.name)
             self.i18n_install_language(language)
 
     @property
@@ -58,12 +58,13 @@ class AdvancedTextGuiMixin(AdvancedTextMixin, BaseGuiMixin):
         if self.config.text_fcm_system:
             fc = "system://{0}".format(fc)
         self._text_font_context = fc
-        self.log.info("Creating FontContextManager {0} using fonts in {1}"
-                      .format(fc, self.config.text_fcm_fonts))
+        self.log.info("Creating FontContextManager {fc} using fonts in {path}",
+                      fc=fc, path=self.config.text_fcm_fonts)
         FontContextManager.create(fc)
 
         for filename in os.listdir(self.config.text_fcm_fonts):
-            self.log.debug("Installing Font {0} to FCM {1}".format(filename, self._text_font_context))
+            self.log.debug("Installing Font {filename} to FCM {fc}",
+                           filename=filename, fc=self._text_font_context)
             FontContextManager.add_font(fc, os.path.join(self.config.text_fcm_fonts, filename))
 
     @property
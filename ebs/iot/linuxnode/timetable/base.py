@@ -1,9 +1,6 @@
 
 
 import arrow
-from twisted import logger
-from twisted.internet.task import deferLater
-from twisted.internet.defer import CancelledError
 
 from ebs.iot.linuxnode.log import NodeLoggingMixin
 from ebs.iot.linuxnode.text import AdvancedTextMixin
@@ -15,6 +12,7 @@ from ebs.iot.linuxnode.tables.renderable import BasicRenderableTableEntry
 from ebs.iot.linuxnode.tables.spec import BasicTablePalette
 from ebs.iot.linuxnode.tables.spec import BasicTableSpec
 from ebs.iot.linuxnode.tables.spec import BasicColumnSpec
+from ..lazylog import LazyLogger
 
 
 class TimetableEntry(BasicRenderableTableEntry):
@@ -41,7 +39,6 @@ class Timetable(AnimatedTable):
 
     def __init__(self, node, spec=None):
         self._log = None
-        self._redraw_task = None
         self._current_page = 0
         if not spec:
             spec = BasicTableSpec(self, [
@@ -63,8 +60,8 @@ class Timetable(AnimatedTable):
     @property
     def log(self):
         if not self._log:
-            self._log = logger.Logger(namespace="timetable.{0}".format(self._spec.name),
-                                      source=self)
+            self._log = LazyLogger(namespace="timetable.{0}".format(self._spec.name),
+                                   source=self)
         return self._log
 
     def build(self, entries):
@@ -75,41 +72,39 @@ class Timetable(AnimatedTable):
         return [x for x in sorted(self._entries, key=lambda y: y.ts_start)
                 if x.ts_start.shift(minutes=-1 * self.post_window) < arrow.now() < x.ts_end.shift(minutes=self.prior_window)]
 
+    @property
+    def _task_key(self):
+        return 'timetable', id(self)
+
     def start(self):
-        self.log.info("Starting Timetable Redraw Task for {0}".format(self))
+        self.log.info("Starting Timetable Redraw Task for {table}", table=self)
         self._current_page = 0
         self.step()
+        self._node.scheduler.every(self._task_key, self._period_page,
+                                   self.step, slack=1)
 
     def _turn_page(self):
         self._current_page += 1
         if self._current_page >= self.total_pages:
             self.next_language()
-            self.log.debug("Switched to Next Language : {}".format(self._i18n_language))
+            self.log.debug("Switched to Next Language : {language}",
+                           language=self._i18n_language)
             self._current_page = 0
 
     def step(self):
-        self.log.debug("Drawing page {0} / {1}".format(self._current_page + 1, self.total_pages))
+        self.log.debug("Drawing page {page} / {total}",
+                       page=self._current_page + 1, total=self.total_pages)
         self._turn_page()
         self.redraw_entries(entries=self.page_entities(self._current_page))
 
-        duration = self._period_page
-        self._redraw_task = deferLater(self._node.reactor, duration, self.step)
-
-        def _cancel_handler(failure):
-            failure.trap(CancelledError)
-        self._redraw_task.addErrback(_cancel_handler)
-
-        return self._redraw_task
-
     def retrigger(self):
-        if self._redraw_task.active():
-            self._redraw_task.cancel()
         self.step()
+        self._node.scheduler.every(self._task_key, self._period_page,
+                                   self.step, slack=1)
 
     def stop(self):
-        self.log.info("Stopping Timetable Redraw Task for {0}".format(self))
-        if self._redraw_task:
-            self._redraw_task.cancel()
+        self.log.info("Stopping Timetable Redraw Task for {table}", table=self)
+        self._node.scheduler.cancel(self._task_key)
 
 
 class BaseTimetableMixin(AdvancedTextMixin, NodeLoggingMixin):
@@ -122,9 +117,9 @@ class BaseTimetableMixin(AdvancedTextMixin, NodeLoggingMixin):
 
     def install(self):
         super(BaseTimetableMixin, self).install()
-        self.log.info("Installing TimeTable {0} with {1}"
-                      "".format(self._timetable_class.__name__,
-                                self._timetable_entry_class.__name__))
+        self.log.info("Installing TimeTable {table} with {entry}",
+                      table=self._timetable_class.__name__,
+                      entry=self._timetable_entry_class.__name__)
         self._timetable = self._timetable_class(self)
 
     def timetable_update(self, data, incremental=False):
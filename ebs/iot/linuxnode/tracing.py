@@ -0,0 +1,124 @@
+
+
+import time
+from datetime import datetime
+from collections import deque
+from collections import OrderedDict
+
+
+# Each span is the time between two of the stages of an event.
+#   wake    scheduled start to the scheduler waking up for it
+#   lookup  wakeup to the trigger, mostly the event database lookups
+#   media   trigger to the media being ready, metadata and image decode
+#           or player spawn included
+#   render  media ready to its first frame
+#   total   scheduled start to the first frame
+STAGES = ('scheduled', 'wake', 'trigger', 'ready', 'frame')
+SPANS = (
+    ('wake', 'scheduled', 'wake'),
+    ('lookup', 'wake', 'trigger'),
+    ('media', 'trigger', 'ready'),
+    ('render', 'ready', 'frame'),
+    ('total', 'scheduled', 'frame'),
+)
+
+
+def wallclock(dt):
+    # Event start times are naive local datetimes.
+    return time.time() + (dt - datetime.now()).total_seconds()
+
+
+def percentile(ordered, p):
+    # Nearest rank percentile of an already sorted list
+    if not ordered:
+        return None
+    rank = int(round(p / 100.0 * (len(ordered) - 1)))
+    return ordered[rank]
+
+
+class EventTrace(object):
+    __slots__ = ('emid', 'eid', 'marks', '_recorder')
+
+    def __init__(self, recorder, emid, eid, scheduled):
+        self._recorder = recorder
+        self.emid = emid
+        self.eid = eid
+        self.marks = {'scheduled': scheduled}
+
+    def mark(self, stage, when=None):
+        # Only the first time each stage is reached counts. Reaching the
+        # first frame completes the trace.
+        if stage in self.marks:
+            return
+        self.marks[stage] = when or time.time()
+        if stage == 'frame':
+            self.finish()
+
+    def clear(self, stage):
+        self.marks.pop(stage, None)
+
+    def finish(self):
+        # Record the trace as it is. Traces which never got to a first
+        # frame are kept too, with the spans they do have.
+        if self._recorder:
+            self._recorder.record(self)
+            self._recorder = None
+
+    def span(self, start, end):
+        if start in self.marks and end in self.marks:
+            return self.marks[end] - self.marks[start]
+
+    @property
+    def complete(self):
+        return 'frame' in self.marks
+
+    def __repr__(self):
+        spans = ' '.join('{0}={1:.3f}'.format(name, self.span(s, e))
+                         for name, s, e in SPANS
+                         if self.span(s, e) is not None)
+        return "<EventTrace {0} {1} {2}>".format(self.emid, self.eid, spans)
+
+
+class EventTraceRecorder(object):
+    # Keeps the last few traces of events from their scheduled start to
+    # their first frame on screen, to summarize as percentiles. Each span
+    # also goes to the metrics registry, if one is given, so that it can
+    # be compared across nodes.
+    def __init__(self, size=500, metrics=None):
+        self._traces = deque(maxlen=size)
+        self._spans = {}
+        if metrics:
+            family = metrics.histogram(
+                'node_event_span_seconds',
+                'Time between the stages of events, scheduled to first frame',
+                labels=('span',),
+                buckets=(-1, 0, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30, 60)
+            )
+            self._spans = {name: family.labels(name) for name, _, _ in SPANS}
+
+    def start(self, emid, eid, start_time):
+        return EventTrace(self, emid, eid, wallclock(start_time))
+
+    def record(self, trace):
+        self._traces.append(trace)
+        for name, start, end in SPANS:
+            value = trace.span(start, end)
+            if value is not None and name in self._spans:
+                self._spans[name].observe(value)
+
+    @property
+    def traces(self):
+        return list(self._traces)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        rval = OrderedDict()
+        for name, start, end in SPANS:
+            values = sorted(v for v in (t.span(start, end)
+                                        for t in self._traces)
+                            if v is not None)
+            stats = OrderedDict([('count', len(values))])
+            for p in percentiles:
+                stats['p{0}'.format(p)] = percentile(values, p)
+            stats['max'] = values[-1] if values else None
+            rval[name] = stats
+        return rval
@@ -1,39 +1,45 @@
 
-from twisted.internet.task import deferLater
-from twisted.internet.defer import CancelledError
-from .labels import SelfScalingLabel
 
-import arrow
+import time
+
+from kivy.uix.widget import Widget
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color
+from kivy.graphics import Rectangle
+from kivy.properties import ListProperty
+from kivy.properties import StringProperty
+from kivy.properties import NumericProperty
+from kivy.properties import BooleanProperty
+
+from .labels import SelfScalingLabel
 
 
 class ClockBase(object):
+    _period = 1
+
     def __init__(self, node):
         self._node = node
-        self._update_task = None
         super(ClockBase, self).__init__()
 
+    @property
+    def _task_key(self):
+        return 'clock', id(self)
+
     def update(self):
         raise NotImplementedError
 
     def start(self):
-        self._node.log.info("Starting Update Task for {0}".format(self))
+        self._node.log.info("Starting Update Task for {clock}", clock=self)
         self.step()
 
     def step(self):
         self.update()
-        self._update_task = deferLater(self._node.reactor, 1, self.step)
-
-        def _cancel_handler(failure):
-            failure.trap(CancelledError)
-
-        self._update_task.addErrback(_cancel_handler)
-
-        return self._update_task
+        # All clocks tick together, on the second.
+        self._node.scheduler.every(self._task_key, self._period, self.update)
 
     def stop(self):
-        self._node.log.info("Stopping Update Task for {0}".format(self))
-        if self._update_task:
-            self._update_task.cancel()
+        self._node.log.info("Stopping Update Task for {clock}", clock=self)
+        self._node.scheduler.cancel(self._task_key)
 
 
 class SimpleDigitalClock(ClockBase, SelfScalingLabel):
@@ -42,4 +48,107 @@ class SimpleDigitalClock(ClockBase, SelfScalingLabel):
         SelfScalingLabel.__init__(self, **kwargs)
 
     def update(self):
-        self.text = arrow.now().format("HH:mm:ss")
+        self.text = time.strftime("%H:%M:%S", time.localtime())
+
+
+_glyph_cache = {}
+
+
+def clock_glyphs(charset, font_size, font_name=None, bold=False):
+    # Textures for each of the characters in charset, rendered once per
+    # font and shared by every clock using it. Glyphs are rendered in white
+    # and tinted when drawn, so the color does not need to be part of the key.
+    key = (charset, font_size, font_name, bold)
+    if key not in _glyph_cache.keys():
+        params = {'font_size': font_size, 'bold': bold}
+        if font_name:
+            params['font_name'] = font_name
+        glyphs = {}
+        for char in charset:
+            label = CoreLabel(text=char, **params)
+            label.refresh()
+            glyphs[char] = label.texture
+        _glyph_cache[key] = glyphs
+    return _glyph_cache[key]
+
+
+class GlyphDigitalClock(ClockBase, Widget):
+    # A digital clock composed from pre-rendered glyph textures instead of
+    # having the text provider rasterize the whole string every second.
+    # Each character of the display has its own rectangle, and a tick only
+    # swaps the textures of the characters which changed, which is usually
+    # just the last one. The glyphs are scaled to fit the widget, with the
+    # digits in fixed width cells so the display does not jitter.
+    font_size = NumericProperty('42sp')
+    font_name = StringProperty('', allownone=True)
+    bold = BooleanProperty(False)
+    color = ListProperty([1, 1, 1, 1])
+
+    _format = "%H:%M:%S"
+    _charset = "0123456789:"
+
+    def __init__(self, node, **kwargs):
+        self._glyphs = None
+        self._text = ''
+        self._drawn = ''
+        self._cells = []
+        self._scale = 1
+        ClockBase.__init__(self, node)
+        Widget.__init__(self, **kwargs)
+        length = len(time.strftime(self._format, time.localtime(0)))
+        with self.canvas:
+            self._color = Color(*self.color)
+            self._rects = [Rectangle() for _ in range(length)]
+        self.bind(font_size=self._load_glyphs,
+                  font_name=self._load_glyphs,
+                  bold=self._load_glyphs,
+                  pos=self._layout, size=self._layout,
+                  color=self._set_color)
+        self._load_glyphs()
+
+    def _set_color(self, *_):
+        self._color.rgba = self.color
+
+    def _load_glyphs(self, *_):
+        self._glyphs = clock_glyphs(self._charset, self.font_size,
+                                    self.font_name, self.bold)
+        self._layout()
+
+    def _layout(self, *_):
+        # Digits share the width of the widest of them. Anything else is
+        # given its own width.
+        digit_width = max(self._glyphs[x].width for x in '0123456789')
+        sample = time.strftime(self._format, time.localtime(0))
+        widths = [digit_width if x.isdigit() else self._glyphs[x].width
+                  for x in sample]
+        height = max(x.height for x in self._glyphs.values())
+        if not self.width or not self.height:
+            return
+        self._scale = min(self.width / sum(widths), self.height / height)
+        x = self.x + (self.width - sum(widths) * self._scale) / 2
+        y = self.y + (self.height - height * self._scale) / 2
+        self._cells = []
+        for width in widths:
+            self._cells.append((x, y, width * self._scale))
+            x += width * self._scale
+        self._drawn = ''
+        self._render(self._text)
+
+    def _render(self, text):
+        self._text = text
+        if not self._cells:
+            return
+        for idx, char in enumerate(text):
+            if idx < len(self._drawn) and self._drawn[idx] == char:
+                continue
+            texture = self._glyphs[char]
+            x, y, cell_width = self._cells[idx]
+            width = texture.width * self._scale
+            rect = self._rects[idx]
+            rect.texture = texture
+            rect.pos = (x + (cell_width - width) / 2, y)
+            rect.size = (width, texture.height * self._scale)
+        self._drawn = text
+
+    def update(self):
+        self._render(time.strftime(self._format, time.localtime()))
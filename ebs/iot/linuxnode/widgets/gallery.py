@@ -10,7 +10,7 @@ from kivy.properties import StringProperty
 from kivy.animation import Animation
 
 from .colors import ColorBoxLayout
-from .image import StandardImage
+from .image import image_pool
 
 
 class ImageGallery(ColorBoxLayout):
@@ -49,7 +49,10 @@ class ImageGallery(ColorBoxLayout):
 
     def hide(self):
         self.clear_widgets()
+        self._discard(self._image)
         self._image = None
+        for instance in list(self.animation_layer.children):
+            self._discard(instance)
         self.animation_layer.clear_widgets()
         self._animation_layer = None
         self._reset_transitions()
@@ -88,8 +91,7 @@ class ImageGallery(ColorBoxLayout):
                 if not self._animation_layer:
                     return
                 self.animation_layer.remove_widget(instance)
-                if hasattr(instance, 'stop'):
-                    instance.stop()
+                self._discard(instance)
 
             if self._exit_retrace:
                 sgn = -1
@@ -117,6 +119,19 @@ class ImageGallery(ColorBoxLayout):
             self._entry_animation.bind(on_complete=_when_done)
         return self._entry_animation
 
+    @staticmethod
+    def build_image(source):
+        return image_pool.acquire(source=source, allow_stretch=True,
+                                  keep_ratio=True, anim_delay=0.08)
+
+    @staticmethod
+    def _discard(instance):
+        if instance is None:
+            return
+        if hasattr(instance, 'stop'):
+            instance.stop()
+        image_pool.release(instance)
+
     def _detach_image(self):
         if self._image:
             if self._image.parent == self:
@@ -147,8 +162,7 @@ class ImageGallery(ColorBoxLayout):
         if isinstance(value, Widget):
             self._image = value
         else:
-            self._image = StandardImage(source=value, allow_stretch=True,
-                                        keep_ratio=True, anim_delay=0.08)
+            self._image = self.build_image(value)
 
         if not self.visible:
             self.add_widget(self._image)
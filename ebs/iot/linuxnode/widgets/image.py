@@ -5,33 +5,57 @@ from PIL import Image as PILImage
 
 from kivy.uix.image import Image
 
+from ..lazylog import LazyLogger
 from .colors import BackgroundColorMixin
+from .pool import WidgetPool
 
 from kivy.graphics.opengl import glGetIntegerv
 from kivy.graphics.opengl import GL_MAX_TEXTURE_SIZE
 _image_max_size = glGetIntegerv(GL_MAX_TEXTURE_SIZE)[0]
+_log = LazyLogger(namespace="image")
+
+
+def image_size_proof(source):
+    # Shrink the image at source in place if it is larger than the largest
+    # texture the GPU can hold. This only touches the disk and PIL, so it is
+    # safe to run in a worker thread ahead of widget construction.
+    PILImage.MAX_IMAGE_PIXELS = None
+    im = PILImage.open(source)
+    size = im.size
+    sf = max([float(s) / _image_max_size for s in size])
+    if sf > 1:
+        target = [int(s / sf) for s in size]
+        _log.info("Resizing image {source} from {size} to {target}",
+                  source=source, size=size, target=target)
+        im = im.resize(target, PILImage.ANTIALIAS)
+        im.save(source)
+    im.close()
+    del im
+    return source
 
 
 class SizeProofImage(Image):
     def __init__(self, **kwargs):
         source = kwargs.get('source', None)
         if source:
-            PILImage.MAX_IMAGE_PIXELS = None
-            im = PILImage.open(source)
-            size = im.size
-            sf = max([float(s) / _image_max_size for s in size])
-            if sf > 1:
-                target = [int(s / sf) for s in size]
-                print("Resizing image {1} to {2} {0}"
-                      "".format(source, size, target))
-                im = im.resize(target, PILImage.ANTIALIAS)
-                im.save(source)
-            im.close()
-            del im
+            image_size_proof(source)
         Image.__init__(self, **kwargs)
 
+    def reset(self, **kwargs):
+        # Prepare a recycled widget for reuse. Setting a new source reloads
+        # the texture.
+        source = kwargs.get('source', None)
+        if source:
+            image_size_proof(source)
+        self.size_hint = (1, 1)
+        self.pos = (0, 0)
+        self.opacity = 1
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
 
 StandardImage = SizeProofImage
+image_pool = WidgetPool(StandardImage, name='image')
 
 
 class BleedImage(BackgroundColorMixin, StandardImage):
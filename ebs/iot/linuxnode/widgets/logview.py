@@ -0,0 +1,99 @@
+
+
+from collections import deque
+from kivy.clock import Clock
+from kivy.uix.widget import Widget
+from kivy.core.text.markup import MarkupLabel as CoreMarkupLabel
+from kivy.graphics import Color
+from kivy.graphics import Rectangle
+from kivy.graphics import InstructionGroup
+from kivy.properties import NumericProperty
+
+from .colors import BackgroundColorMixin
+
+
+class LogView(BackgroundColorMixin, Widget):
+    # The tail of a log, newest line at the bottom. Each line is rendered
+    # into its own texture and kept in a ring of maxlen lines. Lines passed
+    # to append() are queued and taken in once per frame, and a line is
+    # only rendered when it first needs to be on screen. A burst of lines
+    # larger than the view costs just the lines which remain visible, and
+    # existing lines are never rendered again unless the width changes.
+    font_size = NumericProperty('12sp')
+    padding = NumericProperty(8)
+    spacing = NumericProperty(0)
+
+    def __init__(self, maxlen=100, **kwargs):
+        bgcolor = kwargs.pop('bgcolor', None)
+        self._lines = deque(maxlen=maxlen)
+        self._pending = deque(maxlen=maxlen)
+        self._rects = []
+        self._text_width = None
+        Widget.__init__(self, **kwargs)
+        BackgroundColorMixin.__init__(self, bgcolor=bgcolor)
+        self._group = InstructionGroup()
+        self.canvas.add(Color(1, 1, 1, 1))
+        self.canvas.add(self._group)
+        self._flush_trigger = Clock.create_trigger(self._flush)
+        self.bind(pos=self._layout, size=self._layout,
+                  font_size=self._invalidate)
+
+    def append(self, markup):
+        self._pending.append(markup)
+        self._flush_trigger()
+
+    def clear(self):
+        self._pending.clear()
+        self._lines.clear()
+        self._layout()
+
+    def _flush(self, *_):
+        while self._pending:
+            self._lines.append([self._pending.popleft(), None])
+        self._layout()
+
+    def _invalidate(self, *_):
+        for line in self._lines:
+            line[1] = None
+        self._layout()
+
+    def _render(self, markup):
+        label = CoreMarkupLabel(text=markup, font_size=self.font_size,
+                                text_size=(self._text_width, None),
+                                halign='left')
+        label.refresh()
+        return label.texture
+
+    def _rect(self, idx):
+        while len(self._rects) <= idx:
+            rect = Rectangle(size=(0, 0))
+            self._group.add(rect)
+            self._rects.append(rect)
+        return self._rects[idx]
+
+    def _layout(self, *_):
+        text_width = max(self.width - 2 * self.padding, 1)
+        if text_width != self._text_width:
+            self._text_width = text_width
+            for line in self._lines:
+                line[1] = None
+        used = 0
+        y = self.y + self.padding
+        top = self.top - self.padding
+        for line in reversed(self._lines):
+            if line[1] is None:
+                line[1] = self._render(line[0])
+            texture = line[1]
+            if not texture:
+                continue
+            if y + texture.height > top:
+                break
+            rect = self._rect(used)
+            used += 1
+            if rect.texture is not texture:
+                rect.texture = texture
+            rect.pos = (self.x + self.padding, y)
+            rect.size = texture.size
+            y += texture.height + self.spacing
+        for rect in self._rects[used:]:
+            rect.size = (0, 0)
@@ -1,107 +1,176 @@
-
-
 import re
-from kivy.uix.label import Label
-from kivy.uix.widget import Widget
-from kivy.uix.scrollview import ScrollView
+from bisect import bisect_right
 
-from kivy.core.window import Window
+from kivy.uix.widget import Widget
+from kivy.core.text import Label as CoreLabel
 from kivy.animation import Animation
+from kivy.graphics import Color
+from kivy.graphics import Rectangle
+from kivy.graphics import InstructionGroup
 from kivy.properties import NumericProperty
 
-from .colors import ColorBoxLayout
+from .colors import BackgroundColorMixin
 
 
-class MarqueeLabel(ScrollView):
-    spacer_width = NumericProperty(None)
+class MarqueeStrip(object):
+    # The text of a marquee rendered into a strip of textures laid end to
+    # end. Text is rendered in chunks of no more than limit characters,
+    # split at word boundaries where possible, so that no single texture
+    # grows past what the GPU can hold however long the text is. Short text
+    # is just the one texture.
+    def __init__(self, text, limit=64, **label_params):
+        self.text = text
+        self.tiles = []
+        self.starts = []
+        self.length = 0
+        for chunk in self._split(text, limit):
+            label = CoreLabel(text=chunk, **label_params)
+            label.refresh()
+            if not label.texture:
+                continue
+            self.tiles.append(label.texture)
+            self.starts.append(self.length)
+            self.length += label.texture.width
+
+    @staticmethod
+    def _split(text, limit):
+        try:
+            chunks = split_string(text, limit)
+        except ValueError:
+            chunks = [text[i:i + limit] for i in range(0, len(text), limit)]
+        return [x for x in chunks if x]
+
+
+class MarqueeLabel(BackgroundColorMixin, Widget):
+    # Scrolls a MarqueeStrip across the widget from right to left. Only the
+    # part of the strip which is on screen is drawn, one rectangle per
+    # visible tile, with texture coordinates selecting the visible part of
+    # each. Scrolling just moves those coordinates along, so the cost of a
+    # frame does not depend on the length of the text.
+    offset = NumericProperty(0)
+    speed = NumericProperty(75)
+    font_size = NumericProperty('15sp')
 
     def __init__(self, **kwargs):
-        bgcolor = kwargs.pop('bgcolor')
-        ScrollView.__init__(self, bar_width=0)
-
-        self._layout = ColorBoxLayout(size_hint_x=None,
-                                      bgcolor=bgcolor,
-                                      orientation='horizontal')
-        self._mainlabels = []
-        self._lspacer = Widget(size_hint_x=None, width=Window.width)
-        self._rspacer = Widget(size_hint_x=None, width=Window.width)
-        self.add_widget(self._layout)
-
-        text = kwargs.pop('text')
+        bgcolor = kwargs.pop('bgcolor', None)
+        text = kwargs.pop('text', '')
+        font_size = kwargs.pop('font_size', '15sp')
+        self._strip = None
+        self._rects = []
+        self._animation = None
+        self._loop = False
+        self._callback = None
         self._label_params = kwargs
+        Widget.__init__(self, font_size=font_size)
+        BackgroundColorMixin.__init__(self, bgcolor=bgcolor)
+        self._tiles = InstructionGroup()
+        self.canvas.add(Color(1, 1, 1, 1))
+        self.canvas.add(self._tiles)
+        self.bind(offset=self._scroll, pos=self._scroll, size=self._scroll)
         self.text = text
 
-    def update_widths(self):
-        width = self._lspacer.width + \
-                self._rspacer.width + \
-                sum([x.width for x in self._mainlabels])
-        self._layout.width = width
-        self.width = width
+    def render(self, text):
+        # The core label wants the font size in pixels.
+        return MarqueeStrip(text, font_size=self.font_size,
+                            **self._label_params)
 
-    def _set_spacer_width(self, _, size):
-        self._lspacer.width = size[0]
-        self._rspacer.width = size[0]
-        self.update_widths()
+    @property
+    def strip(self):
+        return self._strip
 
-    def on_parent(self, _, parent):
-        if parent:
-            parent.bind(size=self._set_spacer_width)
+    @strip.setter
+    def strip(self, value):
+        self._strip = value
+        self._scroll()
 
     @property
     def text(self):
-        return ' '.join([x.text for x in self._mainlabels])
-
-    def _set_mainlabel_width(self, l, size):
-        l.width = size[0]
-        self.update_widths()
+        if not self._strip:
+            return ''
+        return self._strip.text
 
     @text.setter
     def text(self, value):
-        self.remove_widget(self._layout)
-
-        texts = split_string(value, 64)
-        self._layout.clear_widgets()
-        self._layout.add_widget(self._lspacer)
-
-        self._mainlabels = []
-        for t in texts:
-            l = Label(text=t, size_hint_x=None,
-                      text_size=(None, None), **self._label_params)
-            self._layout.add_widget(l)
-            l.bind(texture_size=self._set_mainlabel_width)
-            l.texture_update()
-            self._mainlabels.append(l)
-
-        self._layout.add_widget(self._rspacer)
-        self.add_widget(self._layout)
-        self.update_widths()
-
-    def start(self, loop=True):
-        speed = 75
-        scroll_distance = self._layout.width - self._lspacer.width
-        duration = scroll_distance / speed
-        # print("Scroll was", self.scroll_x)
-        self.scroll_x = 0
-        # print("Using duration", duration)
-        self._animation = Animation(scroll_x=1, duration=duration)
-        if loop:
-            self._animation.bind(on_complete=self._check_complete)
-            pass
+        self.strip = self.render(value)
+
+    def _rect(self, idx):
+        while len(self._rects) <= idx:
+            rect = Rectangle(size=(0, 0))
+            self._tiles.add(rect)
+            self._rects.append(rect)
+        return self._rects[idx]
+
+    def _scroll(self, *_):
+        # The strip starts at the right edge of the widget when offset is 0,
+        # and has scrolled completely off the left edge when offset is the
+        # length of the strip plus the width of the widget.
+        used = 0
+        strip = self._strip
+        if strip and strip.tiles:
+            left = self.offset - self.width
+            right = self.offset
+            idx = max(bisect_right(strip.starts, left) - 1, 0)
+            while idx < len(strip.tiles) and strip.starts[idx] < right:
+                tile = strip.tiles[idx]
+                start = strip.starts[idx]
+                lo = max(left, start)
+                hi = min(right, start + tile.width)
+                idx += 1
+                if hi <= lo:
+                    continue
+                rect = self._rect(used)
+                used += 1
+                if rect.texture is not tile:
+                    rect.texture = tile
+                u, v = tile.uvpos
+                w, h = tile.uvsize
+                u0 = u + w * (lo - start) / tile.width
+                u1 = u + w * (hi - start) / tile.width
+                rect.tex_coords = (u0, v, u1, v, u1, v + h, u0, v + h)
+                rect.pos = (self.x + lo - left,
+                            self.y + (self.height - tile.height) / 2)
+                rect.size = (hi - lo, tile.height)
+        for rect in self._rects[used:]:
+            rect.size = (0, 0)
+
+    @property
+    def scroll_length(self):
+        if not self._strip:
+            return self.width
+        return self._strip.length + self.width
+
+    def start(self, loop=True, callback=None):
+        # Scroll the text through once, then either start over or call
+        # callback.
+        self._loop = loop
+        self._callback = callback
+        self._run()
+
+    def _run(self):
+        if self._animation:
+            self._animation.cancel(self)
+        self.offset = 0
+        self._animation = Animation(offset=self.scroll_length,
+                                    duration=self.scroll_length / self.speed)
+        self._animation.bind(on_complete=self._on_complete)
         self._animation.start(self)
 
-    def _check_complete(self, animation, instance):
-        # print(instance.scroll_x)
-        # print(self._mainlabels[-1].x + self._mainlabels[-1].width)
-        if instance.scroll_x > 0.95:
-            # print("Repeating")
-            self._animation.unbind(on_scroll=self._check_complete)
-            animation.stop(self)
-            self.start()
+    def _on_complete(self, *_):
+        if self._loop:
+            self._run()
+            return
+        self._animation = None
+        if self._callback:
+            callback, self._callback = self._callback, None
+            callback()
 
     def stop(self):
-        self._animation.unbind(on_scroll=self._check_complete)
-        self._animation.stop(self)
-        self.clear_widgets()
+        # Animation.cancel, unlike stop, does not dispatch on_complete.
+        self._callback = None
+        if self._animation:
+            self._animation.cancel(self)
+            self._animation = None
+        self.offset = 0
 
 
 def split_string(text, limit):
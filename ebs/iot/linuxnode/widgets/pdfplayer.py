@@ -47,8 +47,12 @@ class PDFPlayer(FloatLayout):
     interval = NumericProperty(10)
 
     def __init__(self, source, loop=True, temp_dir=None,
-                 exit_retrace=False, **kwargs):
+                 exit_retrace=False, autostart=True, scheduler=None,
+                 **kwargs):
         super(PDFPlayer, self).__init__(**kwargs)
+        # Page turns run off the node's TickScheduler if one is provided,
+        # and off the Kivy Clock otherwise.
+        self._scheduler = scheduler
 
         self._gallery = ImageGallery(parent_layout=self,
                                      animation_vector=(-1, 0),
@@ -58,6 +62,7 @@ class PDFPlayer(FloatLayout):
         self._current_page = -1
         self._task = None
         self._cancelled = False
+        self._autostart = autostart
         self._pages = []
 
         if not temp_dir:
@@ -92,10 +97,16 @@ class PDFPlayer(FloatLayout):
 
         if not os.path.exists(self.pages_dir):
             Thread(target=self._generate_images,
-                   args=[self._start_display]).start()
+                   args=[self._pages_generated]).start()
         else:
             self._start_display()
 
+    def _pages_generated(self):
+        # Called from the conversion thread. The page turns and the
+        # scheduler they run off are only safe to touch from the main
+        # thread, so pick up from there.
+        Clock.schedule_once(lambda _: self._start_display(), 0)
+
     def _start_display(self):
         if self._cancelled:
             return
@@ -106,12 +117,25 @@ class PDFPlayer(FloatLayout):
 
         self._pages = sorted(glob.glob(os.path.join(self.pages_dir, '*.png')),
                              key=_sort_key)
-        self.start()
+        if self._autostart:
+            self.start()
+
+    @property
+    def ready(self):
+        return bool(self._pages)
+
+    def _cancel_task(self):
+        if self._scheduler:
+            self._scheduler.cancel(('pdf', id(self)))
+        elif self._task:
+            self._task.cancel()
+            self._task = None
 
     def stop(self):
         self._cancelled = True
-        if self._task:
-            self._task.cancel()
+        self._cancel_task()
+        # Return the page widgets to the image pool
+        self._gallery.current = None
 
     def _next_page(self):
         if self._current_page < len(self._pages) - 1:
@@ -126,9 +150,16 @@ class PDFPlayer(FloatLayout):
             return
         self._gallery.current = self._pages[self._current_page]
 
-    def start(self):
-        self.stop()
+    def start(self, *_):
+        # If the pages are still being generated, this will be picked up
+        # again by _start_display once they are ready.
+        self._autostart = True
+        self._cancel_task()
         if not self._pages:
             return
-        self._task = Clock.schedule_interval(self.step, self.interval)
+        if self._scheduler:
+            self._scheduler.every(('pdf', id(self)), self.interval,
+                                  self.step, slack=1, align=False)
+        else:
+            self._task = Clock.schedule_interval(self.step, self.interval)
         self.step()
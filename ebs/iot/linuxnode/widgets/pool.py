@@ -0,0 +1,80 @@
+
+
+from kivy.animation import Animation
+
+
+class WidgetPool(object):
+    # A bounded free list of widgets of a single class. Widgets handed out
+    # by acquire() are either fresh or recycled ones which have been reset
+    # with the provided properties by their reset() method. Widgets which are
+    # released when the pool is already full are simply dropped.
+    _pools = []
+
+    def __init__(self, widget_class, capacity=4, name=None):
+        self._widget_class = widget_class
+        self._capacity = capacity
+        self._name = name or widget_class.__name__
+        self._free = []
+        self._created = 0
+        self._reused = 0
+        self._released = 0
+        self._discarded = 0
+        self._pools.append(self)
+
+    @classmethod
+    def pools(cls):
+        return list(cls._pools)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, value):
+        self._capacity = value
+        while len(self._free) > self._capacity:
+            self._free.pop(0)
+            self._discarded += 1
+
+    def acquire(self, **kwargs):
+        if self._free:
+            widget = self._free.pop()
+            widget.reset(**kwargs)
+            self._reused += 1
+        else:
+            widget = self._widget_class(**kwargs)
+            self._created += 1
+        return widget
+
+    def release(self, widget):
+        # Subclasses of the pooled class are not interchangeable with it,
+        # so they are left alone.
+        if type(widget) is not self._widget_class:
+            return False
+        if any(x is widget for x in self._free):
+            return False
+        Animation.cancel_all(widget)
+        if widget.parent:
+            widget.parent.remove_widget(widget)
+        if len(self._free) >= self._capacity:
+            self._discarded += 1
+            return False
+        self._free.append(widget)
+        self._released += 1
+        return True
+
+    @property
+    def statistics(self):
+        return {
+            'name': self._name,
+            'capacity': self._capacity,
+            'free': len(self._free),
+            'created': self._created,
+            'reused': self._reused,
+            'released': self._released,
+            'discarded': self._discarded,
+        }
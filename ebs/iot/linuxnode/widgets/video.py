@@ -0,0 +1,125 @@
+
+
+from kivy.uix.video import Video
+from kivy.uix.floatlayout import FloatLayout
+from kivy.properties import NumericProperty
+from kivy.animation import Animation
+
+
+class VideoPlaylist(FloatLayout):
+    # Plays videos one after another through two Video widgets used
+    # alternately. While one plays, the next can be loaded and prerolled in
+    # the other with prepare(). play() then crossfades to it, so consecutive
+    # videos play without a gap. The last frame of a finished video stays on
+    # screen until the next one starts or stop() is called.
+    crossfade = NumericProperty(0.4)
+
+    def __init__(self, **kwargs):
+        super(VideoPlaylist, self).__init__(**kwargs)
+        self._slots = [self._build_slot(), self._build_slot()]
+        self._sources = [None, None]
+        self._current = None
+        self._loop = False
+        self._when_done = None
+        for slot in self._slots:
+            slot.bind(eos=self._on_eos)
+            self.add_widget(slot)
+
+    @staticmethod
+    def _build_slot():
+        return Video(allow_stretch=True, opacity=0, size_hint=(1, 1),
+                     pos_hint={'x': 0, 'y': 0})
+
+    @property
+    def _idle(self):
+        if self._current is None:
+            return 0
+        return 1 - self._current
+
+    @property
+    def playing(self):
+        return self._current is not None and \
+            self._slots[self._current].state == 'play'
+
+    def _load(self, idx, source):
+        if self._sources[idx] == source:
+            return
+        slot = self._slots[idx]
+        Animation.cancel_all(slot)
+        slot.opacity = 0
+        slot.state = 'pause'
+        slot.source = source
+        self._sources[idx] = source
+
+    def prepare(self, source):
+        self._load(self._idle, source)
+
+    def play(self, source, loop=False, when_done=None, when_showing=None):
+        idx = self._idle
+        self._load(idx, source)
+        self._loop = loop
+        self._when_done = when_done
+        incoming = self._slots[idx]
+        outgoing = self._current
+        self._current = idx
+
+        # Bring the incoming video to the top before fading it in
+        self.remove_widget(incoming)
+        self.add_widget(incoming)
+
+        def _switch(*_):
+            incoming.unbind(texture=_switch)
+            if when_showing:
+                when_showing()
+            Animation(opacity=1, d=self.crossfade).start(incoming)
+            if outgoing is not None:
+                self._retire(outgoing)
+
+        if incoming.texture:
+            _switch()
+        else:
+            incoming.bind(texture=_switch)
+        incoming.state = 'play'
+
+    def _retire(self, idx):
+        slot = self._slots[idx]
+        animation = Animation(opacity=0, d=self.crossfade)
+
+        def _unload(*_):
+            if self._current == idx:
+                return
+            slot.unload()
+            slot.source = ''
+            self._sources[idx] = None
+        animation.bind(on_complete=_unload)
+        animation.start(slot)
+
+    def _on_eos(self, slot, eos):
+        if not eos or self._current is None or \
+                slot is not self._slots[self._current]:
+            return
+        if self._loop:
+            slot.seek(0)
+            slot.state = 'play'
+            return
+        if self._when_done:
+            when_done, self._when_done = self._when_done, None
+            when_done()
+
+    def hold(self):
+        # Stop the current video where it is, leaving its frame on screen.
+        self._when_done = None
+        if self._current is not None:
+            slot = self._slots[self._current]
+            if slot.state == 'play':
+                slot.state = 'pause'
+
+    def stop(self):
+        self._when_done = None
+        for idx, slot in enumerate(self._slots):
+            Animation.cancel_all(slot)
+            slot.opacity = 0
+            slot.unload()
+            slot.source = ''
+            self._sources[idx] = None
+        self._current = None